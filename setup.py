@@ -9,7 +9,8 @@ setup(
     packages=find_packages(where="src"),
     package_data={"": ["py.typed"]},
     install_requires=[
-        "pydantic>=2.0.0",
+        "pydantic>=2.0.0,<3",
+        "numpy>=1.22.0",
         "requests>=2.28.0",
         "pyyaml>=6.0",
         "fastapi>=0.100.0",
@@ -6,12 +6,13 @@ The agent combines memory, thought, tools, and policy to interact with the envir
 """
 
 from typing import Dict, List, Optional, Any, Callable, Union, Tuple
-import uuid
 import time
 import logging
 
 from .state import InformationState, StateTransition
 from .memory import Memory, InMemoryStorage
+from .records import new_state, new_transition
+from ..llm.metrics import MetricsRegistry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -113,7 +114,8 @@ class Agent:
                  tools: Optional[Dict[str, Tool]] = None,
                  reward_model = None,
                  name: str = "AgenticIR",
-                 verbose: bool = False):
+                 verbose: bool = False,
+                 metrics: Optional[MetricsRegistry] = None):
         """
         Initialize the agent.
         
@@ -126,6 +128,7 @@ class Agent:
             reward_model: Model for calculating rewards
             name: Name of the agent
             verbose: Whether to print verbose output
+            metrics: Optional registry the agent's LLM client records calls in
         """
         self.policy = policy
         self.memory = memory or InMemoryStorage()
@@ -135,6 +138,7 @@ class Agent:
         self.reward_model = reward_model
         self.name = name
         self.verbose = verbose
+        self.metrics = metrics
         
         self.current_state: Optional[InformationState] = None
         self.target_state: Optional[InformationState] = None
@@ -208,9 +212,9 @@ class Agent:
         # Update policy with the experience
         self.policy.update(state, action, next_state, reward)
         
-        # Store the transition in memory
-        if self.memory:
-            transition = StateTransition(
+        # Store the transition in memory, unless the policy update already recorded it there
+        if self.memory and getattr(self.policy, "memory", None) is not self.memory:
+            transition = new_transition(
                 source_state_id=state.id,
                 target_state_id=next_state.id,
                 action=action.name,
@@ -243,8 +247,7 @@ class Agent:
             tool_result = tool(**action.parameters)
             
             # Create a new state based on the tool result
-            next_state = InformationState(
-                id=str(uuid.uuid4()),
+            next_state = new_state(
                 text=f"Result of {action.name}: {tool_result}",
                 parent_id=state.id,
                 available_actions=state.available_actions,
@@ -253,8 +256,7 @@ class Agent:
             )
         else:
             # If no tool is available, create a dummy next state
-            next_state = InformationState(
-                id=str(uuid.uuid4()),
+            next_state = new_state(
                 text=f"After {action.name}: {state.text}",
                 parent_id=state.id,
                 available_actions=state.available_actions,
@@ -411,6 +413,32 @@ class Agent:
         
         return reflections
     
+    def get_llm_metrics(self, component: Optional[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get the aggregated metrics of the agent's LLM calls.
+        
+        Args:
+            component: Optional component to report (e.g. "policy" or "thought.plan")
+            
+        Returns:
+            A dictionary mapping each component to its metrics (see
+            MetricsRegistry.summary), empty if the agent has no registry
+        """
+        if self.metrics is None:
+            return {}
+        return self.metrics.summary(component)
+    
+    def dump_llm_metrics(self, path: str) -> None:
+        """
+        Write the aggregated metrics of the agent's LLM calls to a JSON file.
+        
+        Args:
+            path: The file to write
+        """
+        if self.metrics is None:
+            raise ValueError("The agent has no metrics registry")
+        self.metrics.dump(path)
+    
     def save(self, path: str) -> None:
         """
         Save the agent's state to disk.
@@ -0,0 +1,364 @@
+"""
+Asynchronous memory for Agentic IR.
+
+This module defines AsyncMemory, the asyncio counterpart of the Memory
+interface, so agent loops running on an event loop can store and retrieve
+states without blocking it. Memory I/O then overlaps with LLM calls and other
+sessions in the same loop.
+
+Two implementations are provided: ThreadedAsyncMemory runs any synchronous
+Memory on a worker thread, and AsyncPersistentMemory keeps its in-memory
+indexes on the event loop and only moves disk I/O to a worker thread.
+"""
+
+import asyncio
+import functools
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from .state import InformationState, StateTransition
+from .memory import Memory, ConcurrentMemory, PersistentMemory
+from .index import ExperienceIndex
+from .similarity import SimilarityEngine
+from .shared_data import SharedDataStore
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AsyncMemory(ABC):
+    """
+    Abstract base class for asynchronous memory implementations.
+
+    Mirrors Memory with coroutine methods.
+    """
+
+    @abstractmethod
+    async def add_state(self, state: InformationState) -> None:
+        """
+        Add a state to memory.
+
+        Args:
+            state: The state to add
+        """
+        pass
+
+    @abstractmethod
+    async def add_transition(self, transition: StateTransition) -> Optional[int]:
+        """
+        Add a transition to memory.
+
+        Args:
+            transition: The transition to add
+
+        Returns:
+            The ID assigned to the transition, if the implementation assigns one
+        """
+        pass
+
+    @abstractmethod
+    async def get_state(self, state_id: str) -> Optional[InformationState]:
+        """
+        Retrieve a state by ID.
+
+        Args:
+            state_id: The ID of the state to retrieve
+
+        Returns:
+            The state if found, None otherwise
+        """
+        pass
+
+    @abstractmethod
+    async def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
+        """
+        Retrieve a transition by source and target state IDs.
+
+        Args:
+            source_id: The ID of the source state
+            target_id: The ID of the target state
+
+        Returns:
+            The transition if found, None otherwise
+        """
+        pass
+
+    @abstractmethod
+    async def get_transitions_from(self, state_id: str) -> List[StateTransition]:
+        """
+        Retrieve all transitions from a given state.
+
+        Args:
+            state_id: The ID of the source state
+
+        Returns:
+            A list of transitions
+        """
+        pass
+
+    @abstractmethod
+    async def get_transitions_to(self, state_id: str) -> List[StateTransition]:
+        """
+        Retrieve all transitions to a given state.
+
+        Args:
+            state_id: The ID of the target state
+
+        Returns:
+            A list of transitions
+        """
+        pass
+
+    @abstractmethod
+    async def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
+        """
+        Retrieve the history of states leading to the given state.
+
+        Args:
+            state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
+
+        Returns:
+            A list of states in chronological order
+        """
+        pass
+
+    @abstractmethod
+    async def search_states(self, query: str, limit: int = 5) -> List[InformationState]:
+        """
+        Search for states matching the query.
+
+        Args:
+            query: The search query
+            limit: Maximum number of results to return
+
+        Returns:
+            A list of matching states
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        Clear all states and transitions from memory.
+        """
+        pass
+
+    async def aclose(self) -> None:
+        """
+        Release the resources held by the memory (no-op by default).
+        """
+        pass
+
+class ThreadedAsyncMemory(AsyncMemory):
+    """
+    Asynchronous adapter that runs a synchronous Memory on worker threads.
+
+    Memory implementations that are not thread-safe are run on a single
+    worker thread, which also keeps their calls in submission order. A
+    ConcurrentMemory is given several workers, so reads run in parallel.
+    """
+
+    def __init__(self, memory: Memory, max_workers: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Initialize the adapter.
+
+        Args:
+            memory: The synchronous memory to wrap
+            max_workers: Number of worker threads (default: 4 for a
+                ConcurrentMemory, 1 otherwise)
+            executor: Optional executor to use instead of creating one
+        """
+        self.memory = memory
+        if executor is None:
+            if max_workers is None:
+                max_workers = 4 if isinstance(memory, ConcurrentMemory) else 1
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-memory")
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+        self.executor = executor
+
+    async def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a memory method on the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def add_state(self, state: InformationState) -> None:
+        await self._call(self.memory.add_state, state)
+
+    async def add_transition(self, transition: StateTransition) -> Optional[int]:
+        return await self._call(self.memory.add_transition, transition)
+
+    async def get_state(self, state_id: str) -> Optional[InformationState]:
+        return await self._call(self.memory.get_state, state_id)
+
+    async def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
+        return await self._call(self.memory.get_transition, source_id, target_id)
+
+    async def get_transitions_from(self, state_id: str) -> List[StateTransition]:
+        return await self._call(self.memory.get_transitions_from, state_id)
+
+    async def get_transitions_to(self, state_id: str) -> List[StateTransition]:
+        return await self._call(self.memory.get_transitions_to, state_id)
+
+    async def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
+        return await self._call(self.memory.get_state_history, state_id, max_depth)
+
+    async def search_states(self, query: str, limit: int = 5) -> List[InformationState]:
+        return await self._call(self.memory.search_states, query, limit)
+
+    async def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                       successful_only: bool = False) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get relevant past experiences for a state, if the wrapped memory supports it.
+
+        Args:
+            state: The current state
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+
+        Returns:
+            A list of (state, transition) tuples
+        """
+        if not hasattr(self.memory, "get_relevant_experiences"):
+            return []
+        return await self._call(self.memory.get_relevant_experiences, state, max_results, successful_only)
+
+    async def clear(self) -> None:
+        await self._call(self.memory.clear)
+
+    async def aclose(self) -> None:
+        """
+        Shut down the worker threads, if the adapter created them.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+class AsyncPersistentMemory(AsyncMemory):
+    """
+    Native asynchronous persistent memory.
+
+    Uses the same on-disk layout as PersistentMemory. The in-memory indexes
+    are only touched from the event loop, where their operations are short
+    and need no locking; file reads and writes run on a single I/O thread,
+    which keeps them in order, so a state is never read back before it has
+    been written.
+    """
+
+    def __init__(self, storage_path: str, experience_index: Optional[ExperienceIndex] = None,
+                 similarity_engine: Optional[SimilarityEngine] = None,
+                 data_store: Optional[SharedDataStore] = None):
+        """
+        Initialize the persistent storage.
+
+        Args:
+            storage_path: Path to the storage directory
+            experience_index: Optional vector index for similarity-based experience retrieval
+            similarity_engine: Optional term matrix for batch similarity queries
+            data_store: Optional store used to share identical state data sub-objects in memory
+        """
+        self.store = PersistentMemory(storage_path, experience_index=experience_index,
+                                      similarity_engine=similarity_engine, data_store=data_store)
+        self.in_memory = self.store.in_memory
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-memory-io")
+
+    async def _io_call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a disk operation on the I/O thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, functools.partial(fn, *args))
+
+    async def add_state(self, state: InformationState) -> None:
+        """
+        Add a state to memory and write it to disk.
+
+        Args:
+            state: The state to add
+        """
+        self.in_memory.add_state(state)
+        # Encode on the loop, where the shared data store is owned; blobs not
+        # yet known to be stored are re-checked on the I/O thread before writing
+        state = self.in_memory.states[state.id]
+        payload, blobs = self.store._encode_state(state, is_stored=self.store._stored_blobs.__contains__)
+        await self._io_call(self.store._write_state, state.id, payload, blobs)
+
+    async def add_transition(self, transition: StateTransition) -> int:
+        """
+        Add a transition to memory and write it to disk.
+
+        Args:
+            transition: The transition to add
+
+        Returns:
+            The ID assigned to the transition
+        """
+        transition_id = self.in_memory.add_transition(transition)
+        await self._io_call(self.store._save_transition, transition)
+        return transition_id
+
+    async def get_state(self, state_id: str) -> Optional[InformationState]:
+        """
+        Retrieve a state by ID, loading it from disk if it is not cached.
+
+        Args:
+            state_id: The ID of the state to retrieve
+
+        Returns:
+            The state if found, None otherwise
+        """
+        state = self.in_memory.get_state(state_id)
+        if state:
+            return state
+
+        payload = await self._io_call(self.store._read_state_payload, state_id)
+        if payload is None:
+            return None
+        blobs = await self._io_call(self.store._read_payload_blobs, payload)
+        # The state may have been added while the files were being read
+        state = self.in_memory.get_state(state_id)
+        if state is None:
+            self.in_memory.add_state(self.store._decode_state(payload, blobs.__getitem__))
+            state = self.in_memory.get_state(state_id)
+        return state
+
+    async def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
+        return self.in_memory.get_transition(source_id, target_id)
+
+    async def get_transitions_from(self, state_id: str) -> List[StateTransition]:
+        return self.in_memory.get_transitions_from(state_id)
+
+    async def get_transitions_to(self, state_id: str) -> List[StateTransition]:
+        return self.in_memory.get_transitions_to(state_id)
+
+    async def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
+        return self.in_memory.get_state_history(state_id, max_depth)
+
+    async def search_states(self, query: str, limit: int = 5) -> List[InformationState]:
+        return self.in_memory.search_states(query, limit)
+
+    async def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                       successful_only: bool = False) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get relevant past experiences for a state.
+
+        Args:
+            state: The current state
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+
+        Returns:
+            A list of (state, transition) tuples
+        """
+        return self.in_memory.get_relevant_experiences(state, max_results, successful_only)
+
+    async def clear(self) -> None:
+        self.store.clear()
+
+    async def aclose(self) -> None:
+        """
+        Wait for pending disk writes and stop the I/O thread.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._io.shutdown, wait=True))
@@ -0,0 +1,302 @@
+"""
+Binary codec for Agentic IR records.
+
+This module implements a compact, versioned binary encoding for
+InformationState, StateTransition, Thought and RewardEvent. Each record starts
+with one precompiled struct per record type that packs the header, the flags
+and floats and the lengths of the variable fields, followed by the bodies of
+those fields: text as UTF-8 and dicts and lists as JSON via pydantic-core.
+Decoding reads text fields straight out of a memoryview over the input buffer
+without intermediate bytes copies, and builds models without re-running
+validation.
+"""
+
+import struct
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pydantic_core
+
+from .state import InformationState, StateTransition
+from .thought import Thought
+from .reward import RewardEvent
+from .records import construct
+
+MAGIC = b"AIR"
+VERSION = 1
+
+# Record type tags
+TAG_STATE = 1
+TAG_TRANSITION = 2
+TAG_THOUGHT = 3
+TAG_REWARD_EVENT = 4
+
+# Dict encodings (only JSON is written or read)
+DICT_JSON = 0
+
+Record = Union[InformationState, StateTransition, Thought, RewardEvent]
+
+_HEADER = struct.Struct("<3sBBB")  # magic, version, record tag, dict encoding
+_LENGTH = struct.Struct("<I")
+
+# Header and fixed fields per record type: a bitmask of the text fields that
+# are None, the lengths of the variable fields (text, then dicts and lists, in
+# the order their bodies follow) and the packed flags and floats
+_STATE = struct.Struct("<3sBBB" "B" "IIIIII" "d")  # id, text, parent_id, data, metadata, actions; timestamp
+_TRANSITION = struct.Struct("<3sBBB" "B" "IIIII" "?dd")  # source, target, action, params, metadata; success, reward, timestamp
+_THOUGHT = struct.Struct("<3sBBB" "B" "IIIIII" "d")  # id, text, type, state_id, parent_id, metadata; timestamp
+_REWARD_EVENT = struct.Struct("<3sBBB" "B" "IIII" "dd")  # state_id, transition_id, components, metadata; value, timestamp
+
+_to_json = pydantic_core.to_json
+_from_json = pydantic_core.from_json
+
+class CodecError(ValueError):
+    """Raised when a buffer cannot be decoded."""
+
+def _json(value: Any) -> bytes:
+    """Encode a dict or list field; empty containers have an empty body."""
+    return _to_json(value, fallback=str) if value else b""
+
+class BinaryCodec:
+    """
+    Encoder and decoder for the binary record format.
+    """
+
+    def encode(self, record: Record) -> bytes:
+        """
+        Encode a record.
+
+        Args:
+            record: The record to encode
+
+        Returns:
+            The encoded bytes
+        """
+        if isinstance(record, InformationState):
+            state_id = record.id.encode("utf-8")
+            text = record.text.encode("utf-8")
+            parent_id = record.parent_id.encode("utf-8") if record.parent_id is not None else b""
+            data = _json(record.data)
+            metadata = _json(record.metadata)
+            actions = _json(record.available_actions)
+            return b"".join((
+                _STATE.pack(MAGIC, VERSION, TAG_STATE, DICT_JSON, (record.parent_id is None) << 2,
+                            len(state_id), len(text), len(parent_id), len(data), len(metadata), len(actions),
+                            record.timestamp),
+                state_id, text, parent_id, data, metadata, actions
+            ))
+        if isinstance(record, StateTransition):
+            source_id = record.source_state_id.encode("utf-8")
+            target_id = record.target_state_id.encode("utf-8")
+            action = record.action.encode("utf-8")
+            action_params = _json(record.action_params)
+            metadata = _json(record.metadata)
+            return b"".join((
+                _TRANSITION.pack(MAGIC, VERSION, TAG_TRANSITION, DICT_JSON, 0, len(source_id), len(target_id),
+                                 len(action), len(action_params), len(metadata),
+                                 record.success, record.reward, record.timestamp),
+                source_id, target_id, action, action_params, metadata
+            ))
+        if isinstance(record, Thought):
+            thought_id = record.id.encode("utf-8")
+            text = record.text.encode("utf-8")
+            thought_type = record.type.encode("utf-8")
+            state_id = record.state_id.encode("utf-8")
+            parent_id = record.parent_id.encode("utf-8") if record.parent_id is not None else b""
+            metadata = _json(record.metadata)
+            return b"".join((
+                _THOUGHT.pack(MAGIC, VERSION, TAG_THOUGHT, DICT_JSON, (record.parent_id is None) << 4, len(thought_id), len(text),
+                              len(thought_type), len(state_id), len(parent_id), len(metadata), record.timestamp),
+                thought_id, text, thought_type, state_id, parent_id, metadata
+            ))
+        if isinstance(record, RewardEvent):
+            state_id = record.state_id.encode("utf-8")
+            transition_id = record.transition_id.encode("utf-8") if record.transition_id is not None else b""
+            components = _json(record.components)
+            metadata = _json(record.metadata)
+            return b"".join((
+                _REWARD_EVENT.pack(MAGIC, VERSION, TAG_REWARD_EVENT, DICT_JSON, (record.transition_id is None) << 1,
+                                   len(state_id), len(transition_id), len(components), len(metadata),
+                                   record.value, record.timestamp),
+                state_id, transition_id, components, metadata
+            ))
+        raise TypeError(f"Cannot encode object of type {type(record).__name__}")
+
+    def decode(self, buffer: Union[bytes, bytearray, memoryview]) -> Record:
+        """
+        Decode a single record.
+
+        Args:
+            buffer: The encoded bytes
+
+        Returns:
+            The decoded record
+        """
+        record, offset = self._decode_at(memoryview(buffer), 0)
+        if offset != len(buffer):
+            raise CodecError(f"Trailing data after record ({len(buffer) - offset} bytes)")
+        return record
+
+    def encode_many(self, records: Sequence[Record]) -> bytes:
+        """
+        Encode a sequence of records into one length-framed buffer.
+
+        Args:
+            records: The records to encode
+
+        Returns:
+            The encoded bytes
+        """
+        parts = []
+        for record in records:
+            encoded = self.encode(record)
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+
+    def iter_decode(self, buffer: Union[bytes, bytearray, memoryview]) -> Iterator[Record]:
+        """
+        Decode the records of a buffer produced by encode_many().
+
+        Args:
+            buffer: The encoded bytes
+
+        Returns:
+            An iterator of decoded records
+        """
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(view):
+            try:
+                (length,) = _LENGTH.unpack_from(view, offset)
+            except struct.error as e:
+                raise CodecError(f"Truncated frame length: {e}") from e
+            offset += _LENGTH.size
+            if offset + length > len(view):
+                raise CodecError("Truncated frame")
+            # Decode within the frame, so a corrupt record cannot read into the next one
+            record, end = self._decode_at(view[:offset + length], offset)
+            if end != offset + length:
+                raise CodecError("Record length does not match its frame")
+            offset = end
+            yield record
+
+    def _decode_at(self, view: memoryview, offset: int) -> Tuple[Record, int]:
+        """Decode the record starting at offset, returning (record, end offset)."""
+        try:
+            magic, version, tag, dict_encoding = _HEADER.unpack_from(view, offset)
+        except struct.error as e:
+            raise CodecError(f"Truncated header: {e}") from e
+        if magic != MAGIC:
+            raise CodecError("Not an Agentic IR record")
+        if version > VERSION:
+            raise CodecError(f"Unsupported record version {version}")
+        if dict_encoding != DICT_JSON:
+            raise CodecError(f"Unsupported dict encoding {dict_encoding}")
+
+        spec = _SPECS.get(tag)
+        if spec is None:
+            raise CodecError(f"Unknown record tag {tag}")
+        layout, model_cls, text_names, nullable, container_fields, fixed_names = spec
+        try:
+            fields = layout.unpack_from(view, offset)
+        except struct.error as e:
+            raise CodecError(f"Truncated record: {e}") from e
+        offset += layout.size
+
+        nulls = fields[4]
+        if nulls & ~nullable:
+            raise CodecError("Missing required text field")
+        text_count = len(text_names)
+        variable_count = text_count + len(container_fields)
+        lengths = fields[5:5 + variable_count]
+        text_end = offset + sum(lengths[:text_count])
+        end = text_end + sum(lengths[text_count:])
+        if end > len(view):
+            raise CodecError("Truncated record fields")
+
+        # Fields were validated when the record was encoded
+        values = dict(zip(fixed_names, fields[5 + variable_count:]))
+        # Decode all text fields at once, directly from the buffer without
+        # copying the bytes first. For ASCII text the byte lengths are also
+        # character lengths, so the fields can be sliced out of the result.
+        try:
+            text = str(view[offset:text_end], "utf-8")
+        except UnicodeDecodeError as e:
+            raise CodecError(f"Invalid UTF-8 in text field: {e}") from e
+        ascii_text = len(text) == text_end - offset
+        start = 0 if ascii_text else offset
+        for index, name in enumerate(text_names):
+            stop = start + lengths[index]
+            if nulls >> index & 1:
+                if stop != start:
+                    raise CodecError(f"Text field '{name}' is both None and non-empty")
+                values[name] = None
+            elif ascii_text:
+                values[name] = text[start:stop]
+            else:
+                try:
+                    values[name] = str(view[start:stop], "utf-8")
+                except UnicodeDecodeError as e:
+                    raise CodecError(f"Invalid UTF-8 in text field '{name}': {e}") from e
+            start = stop
+
+        offset = text_end
+        for index, (name, kind) in enumerate(container_fields, text_count):
+            stop = offset + lengths[index]
+            values[name] = _get_container(view[offset:stop], kind)
+            offset = stop
+
+        return construct(model_cls, values), offset
+
+def _get_container(body: memoryview, kind: type) -> Any:
+    """Decode a dict or list field, checking that it holds the expected container."""
+    if not body:
+        return kind()
+    try:
+        value = _from_json(bytes(body))
+    except ValueError as e:
+        raise CodecError(f"Malformed {kind.__name__} field: {e}") from e
+    if type(value) is not kind:
+        raise CodecError(f"{kind.__name__.capitalize()} field holds a {type(value).__name__}")
+    return value
+
+# Per record tag: the layout of the fixed part, the model class, the text
+# fields, the bitmask of those that may be None, the dict and list fields and
+# the fixed fields following the lengths
+_SPECS = {
+    TAG_STATE: (_STATE, InformationState, ("id", "text", "parent_id"), 0b100,
+                (("data", dict), ("metadata", dict), ("available_actions", list)), ("timestamp",)),
+    TAG_TRANSITION: (_TRANSITION, StateTransition, ("source_state_id", "target_state_id", "action"), 0,
+                     (("action_params", dict), ("metadata", dict)), ("success", "reward", "timestamp")),
+    TAG_THOUGHT: (_THOUGHT, Thought, ("id", "text", "type", "state_id", "parent_id"), 0b10000,
+                  (("metadata", dict),), ("timestamp",)),
+    TAG_REWARD_EVENT: (_REWARD_EVENT, RewardEvent, ("state_id", "transition_id"), 0b10,
+                       (("components", dict), ("metadata", dict)), ("value", "timestamp")),
+}
+
+# Default codec instance
+default_codec = BinaryCodec()
+
+def encode(record: Record) -> bytes:
+    """
+    Encode a record with the default codec.
+
+    Args:
+        record: The record to encode
+
+    Returns:
+        The encoded bytes
+    """
+    return default_codec.encode(record)
+
+def decode(buffer: Union[bytes, bytearray, memoryview]) -> Record:
+    """
+    Decode a record with the default codec.
+
+    Args:
+        buffer: The encoded bytes
+
+    Returns:
+        The decoded record
+    """
+    return default_codec.decode(buffer)
@@ -0,0 +1,865 @@
+"""
+Index structures for Agentic IR memory.
+
+This module implements the auxiliary indexes that memory implementations
+maintain alongside their primary state and transition stores, so that
+common queries do not have to scan or sort the whole memory.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import zlib
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .state import StateTransition
+from .records import construct
+
+class RecencyIndex:
+    """
+    Time-ordered index of state IDs.
+
+    Entries are kept sorted by timestamp, with ties broken by insertion order,
+    so the most recent states can be enumerated in O(k) without sorting.
+    Appending states in timestamp order is O(1).
+    """
+
+    def __init__(self):
+        """Initialize the recency index."""
+        # Sorted ascending by (timestamp, -sequence); iterated in reverse for recency
+        self._keys: List[Tuple[float, int]] = []
+        self._ids: List[str] = []
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._next_sequence = 0
+
+    def add(self, state_id: str, timestamp: float) -> None:
+        """
+        Add or update a state in the index.
+
+        A state that is added again keeps its original insertion sequence,
+        mirroring how a dict keeps the position of a re-assigned key.
+
+        Args:
+            state_id: The ID of the state
+            timestamp: The timestamp of the state
+        """
+        timestamp = timestamp if timestamp else 0
+        previous = self._entries.get(state_id)
+        if previous is not None:
+            if previous[0] == timestamp:
+                return
+            self._remove_key(previous)
+            sequence = -previous[1]
+        else:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+
+        key = (timestamp, -sequence)
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._ids.insert(position, state_id)
+        self._entries[state_id] = key
+
+    def remove(self, state_id: str) -> None:
+        """
+        Remove a state from the index.
+
+        Args:
+            state_id: The ID of the state to remove
+        """
+        key = self._entries.pop(state_id, None)
+        if key is not None:
+            self._remove_key(key)
+
+    def most_recent(self) -> Iterator[str]:
+        """
+        Iterate over state IDs from most to least recent.
+
+        Returns:
+            An iterator of state IDs
+        """
+        return reversed(self._ids)
+
+    def clear(self) -> None:
+        """Remove all entries from the index."""
+        self._keys.clear()
+        self._ids.clear()
+        self._entries.clear()
+        self._next_sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _remove_key(self, key: Tuple[float, int]) -> None:
+        position = bisect.bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._ids[position]
+
+class ExperienceIndex:
+    """
+    Vector index over state texts for similarity-based experience retrieval.
+
+    Each state text is embedded when the state is added, either with a
+    caller-supplied embedding function (e.g. ``OllamaClient.get_embeddings``)
+    or by hashing its words into a fixed-size signed vector. Rows are
+    L2-normalized and stored in a NumPy matrix, so a query is a single
+    matrix-vector product followed by a partial top-k selection. Removed
+    rows are compacted away once they outnumber the live ones.
+    """
+
+    # Removed rows tolerated before compaction, at least
+    COMPACT_MIN_ROWS = 64
+
+    def __init__(self, dim: int = 1024, embedding_fn: Optional[Callable[[str], Sequence[float]]] = None,
+                 initial_capacity: int = 256):
+        """
+        Initialize the experience index.
+
+        Args:
+            dim: Dimension of the hashed vectors (ignored if embedding_fn is set)
+            embedding_fn: Optional function that embeds a text into a dense vector
+            initial_capacity: Number of rows to preallocate
+        """
+        self.embedding_fn = embedding_fn
+        self.dim = dim if embedding_fn is None else 0
+        self._capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._active = np.zeros(self._capacity, dtype=bool)
+        self._has_transition = np.zeros(self._capacity, dtype=bool)
+        self._has_success = np.zeros(self._capacity, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._pending_marks: Dict[str, bool] = {}
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a text into a normalized vector.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            A float32 vector with unit L2 norm (or all zeros for empty text)
+        """
+        if self.embedding_fn is not None:
+            vector = np.asarray(self.embedding_fn(text), dtype=np.float32)
+        else:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for token in text.lower().split():
+                h = zlib.crc32(token.encode("utf-8"))
+                vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            # Not in place: the embedding function may return an array it keeps
+            vector = vector / norm
+        return vector
+
+    def add(self, state_id: str, text: str) -> None:
+        """
+        Add or re-embed a state.
+
+        Args:
+            state_id: The ID of the state
+            text: The text of the state
+        """
+        vector = self.embed(text)
+        if self._matrix is None:
+            if self.dim == 0:
+                self.dim = vector.shape[0]
+            self._matrix = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        if vector.shape[0] != self.dim:
+            # An embedding backend failure (e.g. empty vector); index as a zero row
+            vector = np.zeros(self.dim, dtype=np.float32)
+
+        row = self._rows.get(state_id)
+        if row is None:
+            row = len(self._ids)
+            if row >= self._capacity:
+                self._grow()
+            self._ids.append(state_id)
+            self._rows[state_id] = row
+            self._active[row] = True
+            marked_success = self._pending_marks.pop(state_id, None)
+            if marked_success is not None:
+                self._has_transition[row] = True
+                self._has_success[row] = marked_success
+
+        self._matrix[row] = vector
+
+    def mark_transition(self, state_id: str, success: bool) -> None:
+        """
+        Record that a state has an outgoing transition.
+
+        Args:
+            state_id: The ID of the source state
+            success: Whether the transition was successful
+        """
+        row = self._rows.get(state_id)
+        if row is None:
+            self._pending_marks[state_id] = self._pending_marks.get(state_id, False) or success
+            return
+        self._has_transition[row] = True
+        if success:
+            self._has_success[row] = True
+
+    def remove(self, state_id: str) -> None:
+        """
+        Remove a state from the index.
+
+        Args:
+            state_id: The ID of the state to remove
+        """
+        self._pending_marks.pop(state_id, None)
+        row = self._rows.pop(state_id, None)
+        if row is not None:
+            self._ids[row] = None
+            self._active[row] = False
+            self._has_transition[row] = False
+            self._has_success[row] = False
+            removed = len(self._ids) - len(self._rows)
+            if removed > max(self.COMPACT_MIN_ROWS, len(self._rows)):
+                self._compact()
+
+    def top_k(self, text: str, k: int, exclude: Optional[str] = None,
+              successful_only: bool = False, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Find the states most similar to a text.
+
+        Only states with at least one outgoing transition are considered.
+
+        Args:
+            text: The query text
+            k: Maximum number of results to return
+            exclude: Optional state ID to leave out of the results
+            successful_only: Only consider states with a successful outgoing transition
+            min_score: Results must score strictly above this similarity
+
+        Returns:
+            A list of (state_id, cosine similarity) tuples, most similar first
+        """
+        n = len(self._ids)
+        if k <= 0 or n == 0 or self._matrix is None:
+            return []
+
+        mask = self._has_success[:n] if successful_only else self._has_transition[:n]
+        mask = mask & self._active[:n]
+        if exclude is not None and exclude in self._rows:
+            mask = mask.copy()
+            mask[self._rows[exclude]] = False
+
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        scores = self._matrix[candidates] @ self.embed(text)
+        relevant = scores > min_score
+        candidates, scores = candidates[relevant], scores[relevant]
+        if candidates.size == 0:
+            return []
+        if candidates.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        # Stable sort keeps older states first among equal scores
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [(self._ids[candidates[i]], float(scores[i])) for i in top]
+
+    def clear(self) -> None:
+        """Remove all entries from the index."""
+        self._active[:] = False
+        self._has_transition[:] = False
+        self._has_success[:] = False
+        self._rows.clear()
+        self._ids.clear()
+        self._pending_marks.clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _compact(self) -> None:
+        """Drop removed rows, keeping the live ones in insertion order."""
+        live = np.flatnonzero(self._active[:len(self._ids)])
+        count = live.size
+        for name in ("_active", "_has_transition", "_has_success"):
+            column = getattr(self, name)
+            column[:count] = column[live]
+            column[count:] = False
+        if self._matrix is not None:
+            self._matrix[:count] = self._matrix[live]
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {state_id: row for row, state_id in enumerate(self._ids)}
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        matrix = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = matrix
+        for name in ("_active", "_has_transition", "_has_success"):
+            old = getattr(self, name)
+            grown = np.zeros(self._capacity, dtype=bool)
+            grown[:old.shape[0]] = old
+            setattr(self, name, grown)
+
+class InvertedIndex:
+    """
+    Incremental inverted index for full-text search over state texts.
+
+    Postings map each term to the states containing it, so a query only
+    touches the postings of its own terms. Results are ranked with BM25.
+    Query terms ending in ``*`` match every indexed term with that prefix,
+    resolved by binary search over the sorted vocabulary.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the inverted index.
+
+        Args:
+            k1: BM25 term-frequency saturation parameter
+            b: BM25 document-length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._vocabulary: List[str] = []
+        self._total_length = 0
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        Split a text into lowercase terms.
+
+        Args:
+            text: The text to tokenize
+
+        Returns:
+            A list of terms
+        """
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    def add(self, state_id: str, text: str) -> None:
+        """
+        Add or re-index a state.
+
+        Args:
+            state_id: The ID of the state
+            text: The text of the state
+        """
+        if state_id in self._doc_terms:
+            self.remove(state_id)
+
+        terms = self.tokenize(text)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            postings[state_id] = count
+
+        self._doc_terms[state_id] = counts
+        self._doc_lengths[state_id] = len(terms)
+        self._total_length += len(terms)
+
+    def remove(self, state_id: str) -> None:
+        """
+        Remove a state from the index.
+
+        Args:
+            state_id: The ID of the state to remove
+        """
+        counts = self._doc_terms.pop(state_id, None)
+        if counts is None:
+            return
+
+        for term in counts:
+            postings = self._postings[term]
+            del postings[state_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+        self._total_length -= self._doc_lengths.pop(state_id)
+
+    def expand(self, query_term: str) -> List[str]:
+        """
+        Resolve a query term to the indexed terms it matches.
+
+        Args:
+            query_term: A term, or a prefix followed by ``*``
+
+        Returns:
+            The matching indexed terms
+        """
+        if not query_term.endswith("*"):
+            term = query_term.lower()
+            return [term] if term in self._postings else []
+
+        prefix = query_term[:-1].lower()
+        matches = []
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            matches.append(self._vocabulary[position])
+            position += 1
+        return matches
+
+    def search(self, query: str, limit: int = 5, match_all: bool = False) -> List[Tuple[str, float]]:
+        """
+        Search for states matching a query.
+
+        Args:
+            query: Whitespace-separated terms; a trailing ``*`` makes a term a prefix query
+            limit: Maximum number of results to return
+            match_all: Require every query term to match (otherwise any term may match)
+
+        Returns:
+            A list of (state_id, score) tuples, best match first
+        """
+        query_terms = []
+        for raw in query.split():
+            terms = self.tokenize(raw)
+            if terms and raw.endswith("*"):
+                terms[-1] += "*"
+            query_terms.extend(terms)
+        query_terms = list(dict.fromkeys(query_terms))
+        if not query_terms or not self._doc_terms or limit <= 0:
+            return []
+
+        num_docs = len(self._doc_terms)
+        avg_length = self._total_length / num_docs if num_docs else 0.0
+        scores: Dict[str, float] = {}
+        matched_terms: Dict[str, int] = {}
+
+        for query_term in query_terms:
+            matched_here = set()
+            for term in self.expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1.0 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for state_id, tf in postings.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[state_id] / avg_length) if avg_length else self.k1
+                    scores[state_id] = scores.get(state_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+                    matched_here.add(state_id)
+            if match_all:
+                for state_id in matched_here:
+                    matched_terms[state_id] = matched_terms.get(state_id, 0) + 1
+                if not matched_here:
+                    return []
+
+        if match_all:
+            scores = {sid: score for sid, score in scores.items() if matched_terms.get(sid) == len(query_terms)}
+
+        # Ties keep the order in which states were first matched
+        ranked = heapq.nsmallest(limit, enumerate(scores.items()), key=lambda item: (-item[1][1], item[0]))
+        return [item for _, item in ranked]
+
+    def clear(self) -> None:
+        """Remove all entries from the index."""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_lengths.clear()
+        self._vocabulary.clear()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+class AncestorIndex:
+    """
+    Index of parent links between states for fast history reconstruction.
+
+    Depths are memoized along every walked path, and skip pointers to the
+    2^i-th ancestor are built lazily, so the n-th ancestor of a state is found
+    in O(log n) and the last k states of a history are collected in O(k).
+    Caches are only invalidated when a state is re-parented or inserted above
+    existing states, which does not happen when states are added in order.
+    """
+
+    def __init__(self):
+        """Initialize the ancestor index."""
+        self._parents: Dict[str, Optional[str]] = {}
+        self._child_counts: Dict[str, int] = {}
+        self._depths: Dict[str, int] = {}
+        self._jumps: Dict[str, List[Optional[str]]] = {}
+
+    def add(self, state_id: str, parent_id: Optional[str]) -> None:
+        """
+        Add or update the parent link of a state.
+
+        Args:
+            state_id: The ID of the state
+            parent_id: The ID of its parent state, if any
+        """
+        if state_id in self._parents:
+            if self._parents[state_id] == parent_id:
+                return
+            self.remove(state_id)
+
+        # Existing states below this one now have a longer history
+        if self._child_counts.get(state_id):
+            self._invalidate()
+
+        self._parents[state_id] = parent_id
+        if parent_id is not None:
+            self._child_counts[parent_id] = self._child_counts.get(parent_id, 0) + 1
+
+    def remove(self, state_id: str) -> None:
+        """
+        Remove a state from the index.
+
+        Args:
+            state_id: The ID of the state to remove
+        """
+        if state_id not in self._parents:
+            return
+
+        parent_id = self._parents.pop(state_id)
+        if parent_id is not None:
+            remaining = self._child_counts[parent_id] - 1
+            if remaining:
+                self._child_counts[parent_id] = remaining
+            else:
+                del self._child_counts[parent_id]
+
+        if self._child_counts.get(state_id):
+            self._invalidate()
+        else:
+            self._depths.pop(state_id, None)
+            self._jumps.pop(state_id, None)
+
+    def depth(self, state_id: str) -> int:
+        """
+        Get the number of indexed ancestors of a state.
+
+        Args:
+            state_id: The ID of the state
+
+        Returns:
+            The depth of the state (0 for a root), or -1 if it is not indexed
+        """
+        if state_id not in self._parents:
+            return -1
+        depth = self._depths.get(state_id)
+        if depth is not None:
+            return depth
+
+        # Walk up to the first memoized ancestor or the root of the chain
+        path = [state_id]
+        on_path = {state_id}
+        base = -1
+        parent_id = self._parents[state_id]
+        while parent_id is not None and parent_id in self._parents and parent_id not in on_path:
+            known = self._depths.get(parent_id)
+            if known is not None:
+                base = known
+                break
+            path.append(parent_id)
+            on_path.add(parent_id)
+            parent_id = self._parents[parent_id]
+
+        # Memoize the whole walked path; a cycle is cut at its topmost state
+        for offset, ancestor_id in enumerate(reversed(path)):
+            self._depths[ancestor_id] = base + 1 + offset
+        return self._depths[state_id]
+
+    def ancestor(self, state_id: str, n: int) -> Optional[str]:
+        """
+        Get the n-th ancestor of a state using skip pointers.
+
+        Args:
+            state_id: The ID of the state
+            n: How many generations to go up (0 returns the state itself)
+
+        Returns:
+            The ID of the ancestor, or None if the history is shorter than n
+        """
+        if n < 0 or n > self.depth(state_id):
+            return None
+
+        current = state_id
+        level = 0
+        while n and current is not None:
+            if n & 1:
+                current = self._jump(current, level)
+            n >>= 1
+            level += 1
+        return current
+
+    def path(self, state_id: str, max_depth: Optional[int] = None) -> List[str]:
+        """
+        Get the chain of state IDs leading to a state.
+
+        Args:
+            state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
+
+        Returns:
+            A list of state IDs in chronological order, ending with state_id
+        """
+        depth = self.depth(state_id)
+        if depth < 0:
+            return []
+
+        length = depth + 1 if max_depth is None else min(depth + 1, max(max_depth, 0))
+        result: List[Optional[str]] = [None] * length
+        current = state_id
+        for position in range(length - 1, -1, -1):
+            result[position] = current
+            current = self._parents[current]
+        return result
+
+    def clear(self) -> None:
+        """Remove all entries from the index."""
+        self._parents.clear()
+        self._child_counts.clear()
+        self._invalidate()
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def _jump(self, state_id: str, level: int) -> Optional[str]:
+        """Get the 2^level-th ancestor of a state, extending its skip pointers as needed."""
+        jumps = self._jumps.get(state_id)
+        if jumps is None:
+            parent_id = self._parents[state_id] if self.depth(state_id) > 0 else None
+            jumps = self._jumps[state_id] = [parent_id]
+
+        while len(jumps) <= level:
+            previous = jumps[-1]
+            jumps.append(None if previous is None else self._jump(previous, len(jumps) - 1))
+        return jumps[level]
+
+    def _invalidate(self) -> None:
+        self._depths.clear()
+        self._jumps.clear()
+
+class TransitionTable:
+    """
+    Compact multi-edge store of state transitions.
+
+    Every transition gets an integer ID and is stored as one row across
+    parallel typed arrays (source, target, action, reward, success, timestamp),
+    with state IDs and action names interned to integer codes. Action
+    parameters and metadata are only kept for transitions that have them.
+    Repeated transitions between the same pair of states are all retained,
+    and adjacency lists by source and target give the transitions of a state
+    without scanning. Removed transitions keep their row, marked as not live,
+    so IDs stay stable.
+    """
+
+    def __init__(self):
+        """Initialize the transition table."""
+        self.sources = array("l")
+        self.targets = array("l")
+        self.actions = array("l")
+        self.rewards = array("d")
+        self.successes = array("b")
+        self.timestamps = array("d")
+        self.live = array("b")
+        self.state_ids: List[str] = []
+        self.action_names: List[str] = []
+        self.by_source: Dict[str, List[int]] = {}
+        self.by_target: Dict[str, List[int]] = {}
+        self._state_codes: Dict[str, int] = {}
+        self._action_codes: Dict[str, int] = {}
+        self._latest_by_pair: Dict[Tuple[int, int], int] = {}
+        self._action_params: Dict[int, Dict[str, Any]] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+
+    def append(self, transition: StateTransition) -> int:
+        """
+        Append a transition to the table.
+
+        Args:
+            transition: The transition to store
+
+        Returns:
+            The integer ID assigned to the transition
+        """
+        transition_id = len(self.sources)
+        source_code = self._intern_state(transition.source_state_id)
+        target_code = self._intern_state(transition.target_state_id)
+
+        action_code = self._action_codes.get(transition.action)
+        if action_code is None:
+            action_code = self._action_codes[transition.action] = len(self.action_names)
+            self.action_names.append(transition.action)
+
+        self.sources.append(source_code)
+        self.targets.append(target_code)
+        self.actions.append(action_code)
+        self.rewards.append(transition.reward)
+        self.successes.append(1 if transition.success else 0)
+        self.timestamps.append(transition.timestamp)
+        self.live.append(1)
+        if transition.action_params:
+            self._action_params[transition_id] = transition.action_params
+        if transition.metadata:
+            self._metadata[transition_id] = transition.metadata
+
+        self.by_source.setdefault(transition.source_state_id, []).append(transition_id)
+        self.by_target.setdefault(transition.target_state_id, []).append(transition_id)
+        self._latest_by_pair[(source_code, target_code)] = transition_id
+
+        return transition_id
+
+    def get(self, transition_id: int) -> Optional[StateTransition]:
+        """
+        Materialize a stored transition.
+
+        Args:
+            transition_id: The ID of the transition
+
+        Returns:
+            The transition if the ID is valid, None otherwise
+        """
+        if not 0 <= transition_id < len(self.sources) or not self.live[transition_id]:
+            return None
+
+        # Fields were validated when the transition was appended
+        return construct(StateTransition, {
+            "source_state_id": self.state_ids[self.sources[transition_id]],
+            "target_state_id": self.state_ids[self.targets[transition_id]],
+            "action": self.action_names[self.actions[transition_id]],
+            "action_params": self._action_params.get(transition_id, {}),
+            "success": bool(self.successes[transition_id]),
+            "reward": self.rewards[transition_id],
+            "timestamp": self.timestamps[transition_id],
+            "metadata": self._metadata.get(transition_id, {}),
+        })
+
+    def latest(self, source_id: str, target_id: str) -> Optional[int]:
+        """
+        Get the ID of the most recent transition between two states.
+
+        Args:
+            source_id: The ID of the source state
+            target_id: The ID of the target state
+
+        Returns:
+            The transition ID, or None if there is no such transition
+        """
+        source_code = self._state_codes.get(source_id)
+        target_code = self._state_codes.get(target_id)
+        if source_code is None or target_code is None:
+            return None
+        return self._latest_by_pair.get((source_code, target_code))
+
+    def ids_from(self, state_id: str) -> List[int]:
+        """
+        Get the IDs of all transitions leaving a state, oldest first.
+
+        Args:
+            state_id: The ID of the source state
+
+        Returns:
+            A list of transition IDs
+        """
+        return self.by_source.get(state_id, [])
+
+    def ids_to(self, state_id: str) -> List[int]:
+        """
+        Get the IDs of all transitions entering a state, oldest first.
+
+        Args:
+            state_id: The ID of the target state
+
+        Returns:
+            A list of transition IDs
+        """
+        return self.by_target.get(state_id, [])
+
+    def ids(self) -> Iterator[int]:
+        """
+        Iterate over the IDs of all live transitions, oldest first.
+
+        Returns:
+            An iterator of transition IDs
+        """
+        return (transition_id for transition_id, live in enumerate(self.live) if live)
+
+    def remove(self, transition_id: int) -> bool:
+        """
+        Remove a transition.
+
+        Args:
+            transition_id: The ID of the transition
+
+        Returns:
+            True if the transition was live
+        """
+        if not 0 <= transition_id < len(self.sources) or not self.live[transition_id]:
+            return False
+
+        self.live[transition_id] = 0
+        source_code = self.sources[transition_id]
+        target_code = self.targets[transition_id]
+        for adjacency, code in ((self.by_source, source_code), (self.by_target, target_code)):
+            state_id = self.state_ids[code]
+            ids = adjacency[state_id]
+            ids.remove(transition_id)
+            if not ids:
+                del adjacency[state_id]
+        self._action_params.pop(transition_id, None)
+        self._metadata.pop(transition_id, None)
+
+        pair = (source_code, target_code)
+        if self._latest_by_pair.get(pair) == transition_id:
+            del self._latest_by_pair[pair]
+            # Fall back to the previous transition between the same pair, if any
+            for other_id in reversed(self.by_source.get(self.state_ids[source_code], [])):
+                if self.targets[other_id] == target_code:
+                    self._latest_by_pair[pair] = other_id
+                    break
+        return True
+
+    def remove_state(self, state_id: str) -> List[int]:
+        """
+        Remove every transition leaving or entering a state.
+
+        Args:
+            state_id: The ID of the state
+
+        Returns:
+            The IDs of the removed transitions
+        """
+        removed = list(self.by_source.get(state_id, [])) + list(self.by_target.get(state_id, []))
+        return [transition_id for transition_id in removed if self.remove(transition_id)]
+
+    def clear(self) -> None:
+        """Remove all transitions from the table."""
+        for column in (self.sources, self.targets, self.actions, self.rewards, self.successes,
+                       self.timestamps, self.live):
+            del column[:]
+        self.state_ids.clear()
+        self.action_names.clear()
+        self.by_source.clear()
+        self.by_target.clear()
+        self._state_codes.clear()
+        self._action_codes.clear()
+        self._latest_by_pair.clear()
+        self._action_params.clear()
+        self._metadata.clear()
+
+    def __len__(self) -> int:
+        """Number of transition IDs assigned, including removed transitions."""
+        return len(self.sources)
+
+    def _intern_state(self, state_id: str) -> int:
+        code = self._state_codes.get(state_id)
+        if code is None:
+            code = self._state_codes[state_id] = len(self.state_ids)
+            self.state_ids.append(state_id)
+        return code
@@ -0,0 +1,108 @@
+"""
+Synchronization primitives for Agentic IR.
+
+This module implements the reader-writer lock used by the concurrent memory
+implementations: any number of threads may read at once, while writers get
+exclusive access.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+class ReadWriteLock:
+    """
+    Writer-preferring reader-writer lock.
+
+    New readers wait while a writer is waiting, so a steady stream of reads
+    cannot starve writes. Both sides are reentrant per thread, and a thread
+    holding the write lock may also take the read lock; upgrading a read lock
+    to a write lock is not supported and raises RuntimeError.
+    """
+
+    def __init__(self):
+        """Initialize the lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # Ident of the thread holding the write lock
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        """Acquire the lock for reading."""
+        local = self._local
+        depth = getattr(local, "read_depth", 0)
+        if depth or self._writer == threading.get_ident():
+            local.read_depth = depth + 1
+            return
+
+        with self._condition:
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        local.read_depth = 1
+
+    def release_read(self) -> None:
+        """Release a read acquisition."""
+        local = self._local
+        depth = getattr(local, "read_depth", 0)
+        if not depth:
+            raise RuntimeError("Read lock released without being held")
+        local.read_depth = depth - 1
+        if depth > 1 or self._writer == threading.get_ident():
+            return
+
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Acquire the lock for writing."""
+        local = self._local
+        if self._writer == threading.get_ident():
+            local.write_depth += 1
+            return
+        if getattr(local, "read_depth", 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = threading.get_ident()
+        local.write_depth = 1
+
+    def release_write(self) -> None:
+        """Release a write acquisition."""
+        if self._writer != threading.get_ident():
+            raise RuntimeError("Write lock released by a thread that does not hold it")
+        local = self._local
+        local.write_depth -= 1
+        if local.write_depth:
+            return
+
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Context manager that holds the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Context manager that holds the lock for writing."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -5,13 +5,24 @@ This module implements the memory component of the Agentic IR framework,
 which is responsible for storing and retrieving information states and transitions.
 """
 
+import os
+import math
 import time
+import heapq
 import json
 import logging
-from typing import Dict, List, Optional, Any, Set, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
 from abc import ABC, abstractmethod
 
-from .state import InformationState, StateTransition
+from .state import InformationState, StateTransition, compare_many
+from .similarity import SimilarityEngine
+from .index import RecencyIndex, ExperienceIndex, InvertedIndex, AncestorIndex, TransitionTable
+from .shared_data import SharedDataStore, REF_KEY
+from .codec import default_codec
+from .locks import ReadWriteLock
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -36,12 +47,15 @@ class Memory(ABC):
         pass
     
     @abstractmethod
-    def add_transition(self, transition: StateTransition) -> None:
+    def add_transition(self, transition: StateTransition) -> Optional[int]:
         """
         Add a transition to memory.
         
         Args:
             transition: The transition to add
+            
+        Returns:
+            The ID assigned to the transition, if the implementation assigns one
         """
         pass
     
@@ -50,6 +64,11 @@ class Memory(ABC):
         """
         Retrieve a state by ID.
         
+        The state's data keeps the types it was added with, unless the
+        memory shares state data (e.g. InMemoryStorage with a data_store):
+        its dicts and lists then come back as read-only FrozenDicts and
+        tuples.
+        
         Args:
             state_id: The ID of the state to retrieve
             
@@ -99,12 +118,13 @@ class Memory(ABC):
         pass
     
     @abstractmethod
-    def get_state_history(self, state_id: str) -> List[InformationState]:
+    def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
         """
         Retrieve the history of states leading to the given state.
         
         Args:
             state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
             
         Returns:
             A list of states in chronological order
@@ -139,52 +159,82 @@ class InMemoryStorage(Memory):
     This implementation stores all states and transitions in memory.
     """
     
-    def __init__(self):
-        """Initialize the in-memory storage."""
+    # Recent states considered per missing result when filling up similar experiences
+    RECENCY_FILL_FACTOR = 4
+    
+    def __init__(self, experience_index: Optional[ExperienceIndex] = None,
+                 data_store: Optional[SharedDataStore] = None,
+                 similarity_engine: Optional[SimilarityEngine] = None):
+        """
+        Initialize the in-memory storage.
+        
+        Args:
+            experience_index: Optional vector index used to retrieve experiences
+                by similarity to the current state instead of by recency
+            data_store: Optional store used to share identical state data
+                sub-objects between states; their data is then read-only
+                (see add_state). Without one, states are stored as given
+            similarity_engine: Optional term matrix used to score states against
+                a query in one vectorized pass
+        """
         self.states: Dict[str, InformationState] = {}
-        self.transitions: Dict[Tuple[str, str], StateTransition] = {}
-        self.transitions_from: Dict[str, Set[str]] = {}
-        self.transitions_to: Dict[str, Set[str]] = {}
-        self.state_transitions: Dict[str, List[str]] = {}  # State ID -> List of transition IDs
+        self.transition_table = TransitionTable()  # Transition ID -> transition, with adjacency lists
+        self.recency_index = RecencyIndex()
+        self.search_index = InvertedIndex()
+        self.ancestor_index = AncestorIndex()
+        self.experience_index = experience_index
+        self.data_store = data_store
+        self.similarity_engine = similarity_engine
         logger.info("Initialized InMemoryStorage")
     
     def add_state(self, state: InformationState) -> None:
         """
         Add a state to memory.
         
+        With a data store, the state's data is interned, so sub-objects it
+        shares with other states (e.g. an unchanged user profile) are only
+        held once. Memory then keeps a copy of the state holding the interned
+        data, whose dicts and lists are read-only FrozenDicts and tuples; the
+        given state is left unchanged.
+        
         Args:
             state: The state to add
         """
+        if self.data_store is not None:
+            data = self.data_store.intern_data(state.data)
+            previous = self.states.get(state.id)
+            if previous is not None:
+                self.data_store.release_data(previous.data)
+            state = state.model_copy(update={"data": data})
         self.states[state.id] = state
+        self.recency_index.add(state.id, state.timestamp)
+        self.search_index.add(state.id, state.text)
+        self.ancestor_index.add(state.id, state.parent_id)
+        if self.experience_index is not None:
+            self.experience_index.add(state.id, state.text)
+        if self.similarity_engine is not None:
+            self.similarity_engine.add(state.id, state.text)
         logger.debug(f"Added state {state.id} to memory")
     
-    def add_transition(self, transition: StateTransition) -> None:
+    def add_transition(self, transition: StateTransition) -> int:
         """
         Add a transition to memory.
         
+        Repeated transitions between the same pair of states are all kept.
+        
         Args:
             transition: The transition to add
+            
+        Returns:
+            The ID assigned to the transition
         """
-        key = (transition.source_state_id, transition.target_state_id)
-        self.transitions[key] = transition
-        
-        # Update the from/to mappings
-        if transition.source_state_id not in self.transitions_from:
-            self.transitions_from[transition.source_state_id] = set()
-        self.transitions_from[transition.source_state_id].add(transition.target_state_id)
+        transition_id = self.transition_table.append(transition)
         
-        if transition.target_state_id not in self.transitions_to:
-            self.transitions_to[transition.target_state_id] = set()
-        self.transitions_to[transition.target_state_id].add(transition.source_state_id)
+        if self.experience_index is not None:
+            self.experience_index.mark_transition(transition.source_state_id, transition.success)
         
-        # Generate a unique ID for the transition
-        transition_id = f"{transition.source_state_id}_{transition.target_state_id}_{transition.timestamp}"
-        
-        # Store the transition
-        self.state_transitions[transition.source_state_id] = self.state_transitions.get(transition.source_state_id, [])
-        self.state_transitions[transition.source_state_id].append(transition_id)
-        
-        logger.debug(f"Added transition from {transition.source_state_id} to {transition.target_state_id}")
+        logger.debug(f"Added transition {transition_id} from {transition.source_state_id} to {transition.target_state_id}")
+        return transition_id
     
     def get_state(self, state_id: str) -> Optional[InformationState]:
         """
@@ -200,7 +250,7 @@ class InMemoryStorage(Memory):
     
     def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
         """
-        Retrieve a transition by source and target state IDs.
+        Retrieve the most recent transition by source and target state IDs.
         
         Args:
             source_id: The ID of the source state
@@ -209,8 +259,20 @@ class InMemoryStorage(Memory):
         Returns:
             The transition if found, None otherwise
         """
-        key = (source_id, target_id)
-        return self.transitions.get(key)
+        transition_id = self.transition_table.latest(source_id, target_id)
+        return self.transition_table.get(transition_id) if transition_id is not None else None
+    
+    def get_transition_by_id(self, transition_id: int) -> Optional[StateTransition]:
+        """
+        Retrieve a transition by the ID returned from add_transition.
+        
+        Args:
+            transition_id: The ID of the transition
+            
+        Returns:
+            The transition if found, None otherwise
+        """
+        return self.transition_table.get(transition_id)
     
     def get_transitions_from(self, state_id: str) -> List[StateTransition]:
         """
@@ -220,18 +282,9 @@ class InMemoryStorage(Memory):
             state_id: The ID of the source state
             
         Returns:
-            A list of transitions
+            A list of transitions, oldest first
         """
-        if state_id not in self.transitions_from:
-            return []
-        
-        result = []
-        for target_id in self.transitions_from[state_id]:
-            transition = self.get_transition(state_id, target_id)
-            if transition:
-                result.append(transition)
-        
-        return result
+        return [self.transition_table.get(tid) for tid in self.transition_table.ids_from(state_id)]
     
     def get_transitions_to(self, state_id: str) -> List[StateTransition]:
         """
@@ -241,122 +294,259 @@ class InMemoryStorage(Memory):
             state_id: The ID of the target state
             
         Returns:
-            A list of transitions
+            A list of transitions, oldest first
         """
-        if state_id not in self.transitions_to:
-            return []
-        
-        result = []
-        for source_id in self.transitions_to[state_id]:
-            transition = self.get_transition(source_id, state_id)
-            if transition:
-                result.append(transition)
-        
-        return result
+        return [self.transition_table.get(tid) for tid in self.transition_table.ids_to(state_id)]
     
-    def get_state_history(self, state_id: str) -> List[InformationState]:
+    def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
         """
         Retrieve the history of states leading to the given state.
         
         Args:
             state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
             
         Returns:
             A list of states in chronological order
         """
-        result = []
-        current_id = state_id
-        
-        while current_id:
-            state = self.get_state(current_id)
-            if not state:
-                break
-                
-            result.insert(0, state)  # Insert at the beginning to maintain chronological order
-            current_id = state.parent_id
+        return [self.states[ancestor_id] for ancestor_id in self.ancestor_index.path(state_id, max_depth)]
+    
+    def get_ancestor(self, state_id: str, generations: int = 1) -> Optional[InformationState]:
+        """
+        Retrieve an ancestor of a state without walking the whole history.
         
-        return result
+        Args:
+            state_id: The ID of the state
+            generations: How many generations to go up (1 returns the parent)
+            
+        Returns:
+            The ancestor state if the history is long enough, None otherwise
+        """
+        ancestor_id = self.ancestor_index.ancestor(state_id, generations)
+        return self.states.get(ancestor_id) if ancestor_id is not None else None
     
-    def search_states(self, query: str, limit: int = 5) -> List[InformationState]:
+    def search_states(self, query: str, limit: int = 5, match_all: bool = False) -> List[InformationState]:
         """
         Search for states matching the query.
         
+        Matches are ranked by BM25 relevance using the inverted index. Query
+        terms ending in ``*`` match any word with that prefix.
+        
         Args:
             query: The search query
             limit: Maximum number of results to return
+            match_all: Require every query term to match
             
         Returns:
-            A list of matching states
+            A list of matching states, most relevant first
         """
-        # Simple implementation: search for the query in the state text
-        query_lower = query.lower()
-        matches = []
-        
-        for state in self.states.values():
-            if query_lower in state.text.lower():
-                matches.append(state)
-                if len(matches) >= limit:
-                    break
-        
-        return matches
+        return [
+            self.states[state_id]
+            for state_id, _ in self.search_index.search(query, limit, match_all=match_all)
+        ]
     
     def clear(self) -> None:
         """
         Clear all states and transitions from memory.
         """
         self.states.clear()
-        self.transitions.clear()
-        self.transitions_from.clear()
-        self.transitions_to.clear()
-        self.state_transitions.clear()
+        self.transition_table.clear()
+        self.recency_index.clear()
+        self.search_index.clear()
+        self.ancestor_index.clear()
+        if self.data_store is not None:
+            self.data_store.clear()
+        if self.experience_index is not None:
+            self.experience_index.clear()
+        if self.similarity_engine is not None:
+            self.similarity_engine.clear()
         logger.info("Cleared memory")
     
-    def get_relevant_experiences(self, state: InformationState, max_results: int = 3) -> List[Tuple[InformationState, StateTransition]]:
+    def remove_state(self, state_id: str) -> bool:
+        """
+        Remove a state and every transition leaving or entering it.
+        
+        States that had the removed state as their parent keep their
+        parent_id; their histories now start below the gap.
+        
+        Args:
+            state_id: The ID of the state to remove
+            
+        Returns:
+            True if the state was in memory
+        """
+        state = self.states.pop(state_id, None)
+        if state is None:
+            return False
+        if self.data_store is not None:
+            self.data_store.release_data(state.data)
+        self.transition_table.remove_state(state_id)
+        self.recency_index.remove(state_id)
+        self.search_index.remove(state_id)
+        self.ancestor_index.remove(state_id)
+        if self.experience_index is not None:
+            self.experience_index.remove(state_id)
+        if self.similarity_engine is not None:
+            self.similarity_engine.remove(state_id)
+        logger.debug(f"Removed state {state_id} from memory")
+        return True
+    
+    def find_similar_states(self, state: InformationState, limit: int = 5,
+                            metric: str = "jaccard") -> List[Tuple[InformationState, float]]:
+        """
+        Find the stored states most similar to a state.
+        
+        With a similarity engine all states are scored in one vectorized pass;
+        otherwise they are compared one by one with their cached word sets.
+        
+        Args:
+            state: The state to compare with
+            limit: Maximum number of results to return
+            metric: "jaccard", or "cosine" (requires a similarity engine)
+            
+        Returns:
+            A list of (state, similarity) tuples, most similar first
+        """
+        if self.similarity_engine is not None:
+            return [
+                (self.states[state_id], score)
+                for state_id, score in self.similarity_engine.top_k(state.text, limit, metric, exclude=state.id)
+            ]
+        if metric != "jaccard":
+            raise ValueError(f"Metric '{metric}' requires a similarity engine")
+        
+        candidates = [past_state for past_state in self.states.values() if past_state.id != state.id]
+        scored = [
+            (past_state, score)
+            for past_state, score in zip(candidates, compare_many(state, candidates))
+            if score > 0
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+    
+    def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                 successful_only: bool = False) -> List[Tuple[InformationState, StateTransition]]:
         """
         Get relevant past experiences for a state.
         
+        If an experience index is configured, past states are ranked by their
+        similarity to the given state, and the most recent states fill any
+        remaining results (e.g. when nothing is similar); otherwise the most
+        recent states are used.
+        
         Args:
             state: The current state
             max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
             
         Returns:
             A list of (state, transition) tuples
         """
-        # Simple implementation: just return the most recent transitions
-        results = []
+        if self.experience_index is not None:
+            results = []
+            for past_state_id, _ in self.experience_index.top_k(
+                state.text, max_results, exclude=state.id, successful_only=successful_only
+            ):
+                transition = self._select_experience_transition(past_state_id, successful_only)
+                if transition:
+                    results.append((self.states[past_state_id], transition))
+            if len(results) < max_results:
+                chosen = {past_state.id for past_state, _ in results}
+                missing = max_results - len(results)
+                results.extend(self._recent_experiences(
+                    state, missing, successful_only, skip=chosen,
+                    max_candidates=missing * self.RECENCY_FILL_FACTOR
+                ))
+            return results
+        
+        return self._recent_experiences(state, max_results, successful_only)
+    
+    def _recent_experiences(self, state: InformationState, max_results: int, successful_only: bool,
+                            skip: Optional[Set[str]] = None,
+                            max_candidates: Optional[int] = None) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get the experiences of the most recent past states.
         
-        # Sort states by timestamp (most recent first)
-        sorted_states = sorted(
-            [s for s in self.states.values() if s.id != state.id],
-            key=lambda s: s.timestamp if s.timestamp else 0,
-            reverse=True
-        )
+        Args:
+            state: The current state (left out)
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+            skip: Optional IDs of states to leave out
+            max_candidates: Number of most recent states to consider (default: max_results)
+            
+        Returns:
+            A list of (state, transition) tuples
+        """
+        if max_candidates is None:
+            max_candidates = max_results
+        results = []
         
-        # Get the most recent states and their transitions
-        for past_state in sorted_states[:max_results]:
-            transitions = self.get_transitions_from(past_state.id)
-            if transitions:
-                # Use the first transition for simplicity
-                results.append((past_state, transitions[0]))
+        # Walk the recency index (most recent first) instead of sorting all states
+        candidates = 0
+        for past_state_id in self.recency_index.most_recent():
+            if candidates >= max_candidates or len(results) >= max_results:
+                break
+            if past_state_id == state.id or (skip and past_state_id in skip):
+                continue
+            candidates += 1
+            
+            transition = self._select_experience_transition(past_state_id, successful_only)
+            if transition:
+                results.append((self.states[past_state_id], transition))
         
         return results
+    
+    def _select_experience_transition(self, state_id: str, successful_only: bool) -> Optional[StateTransition]:
+        """
+        Pick the transition to report for a past state.
+        
+        Args:
+            state_id: The ID of the past state
+            successful_only: Only consider successful transitions
+            
+        Returns:
+            The transition, or None if there is no suitable one
+        """
+        for transition in self.get_transitions_from(state_id):
+            # Use the first (suitable) transition for simplicity
+            if transition.success or not successful_only:
+                return transition
+        return None
 
 class PersistentMemory(Memory):
     """
     Persistent implementation of the Memory interface.
     
-    This implementation stores states and transitions on disk.
+    This implementation stores states and transitions on disk. State data is
+    written content-addressed: each dict or list is stored once as a blob under
+    ``blobs/`` and states reference their data sub-objects by hash.
     """
     
-    def __init__(self, storage_path: str):
+    def __init__(self, storage_path: str, experience_index: Optional[ExperienceIndex] = None,
+                 similarity_engine: Optional[SimilarityEngine] = None,
+                 data_store: Optional[SharedDataStore] = None):
         """
         Initialize the persistent storage.
         
         Args:
             storage_path: Path to the storage directory
+            experience_index: Optional vector index for similarity-based experience retrieval
+            similarity_engine: Optional term matrix for batch similarity queries
+            data_store: Optional store used to share identical state data
+                sub-objects in memory too (see InMemoryStorage)
         """
         self.storage_path = storage_path
-        self.in_memory = InMemoryStorage()  # Use in-memory storage as a cache
+        # Use in-memory storage as a cache
+        self.in_memory = InMemoryStorage(experience_index=experience_index, data_store=data_store,
+                                         similarity_engine=similarity_engine)
+        # Encodes state data into blobs; a shared store also skips re-encoding
+        # interned sub-objects whose blob is already on disk
+        self._blob_store = data_store if data_store is not None else SharedDataStore()
+        self.states_path = os.path.join(storage_path, "states")
+        self.blobs_path = os.path.join(storage_path, "blobs")
+        os.makedirs(self.states_path, exist_ok=True)
+        os.makedirs(self.blobs_path, exist_ok=True)
+        self._stored_blobs: Set[str] = set()
         logger.info(f"Initialized PersistentMemory at {storage_path}")
     
     def add_state(self, state: InformationState) -> None:
@@ -367,17 +557,22 @@ class PersistentMemory(Memory):
             state: The state to add
         """
         self.in_memory.add_state(state)
-        self._save_state(state)
+        # Save the stored state: interned data skips blobs already on disk
+        self._save_state(self.in_memory.states[state.id])
     
-    def add_transition(self, transition: StateTransition) -> None:
+    def add_transition(self, transition: StateTransition) -> int:
         """
         Add a transition to memory.
         
         Args:
             transition: The transition to add
+            
+        Returns:
+            The ID assigned to the transition
         """
-        self.in_memory.add_transition(transition)
+        transition_id = self.in_memory.add_transition(transition)
         self._save_transition(transition)
+        return transition_id
     
     def get_state(self, state_id: str) -> Optional[InformationState]:
         """
@@ -397,6 +592,7 @@ class PersistentMemory(Memory):
         state = self._load_state(state_id)
         if state:
             self.in_memory.add_state(state)
+            state = self.in_memory.get_state(state_id)
         
         return state
     
@@ -422,6 +618,18 @@ class PersistentMemory(Memory):
         
         return transition
     
+    def get_transition_by_id(self, transition_id: int) -> Optional[StateTransition]:
+        """
+        Retrieve a transition by the ID returned from add_transition.
+        
+        Args:
+            transition_id: The ID of the transition
+            
+        Returns:
+            The transition if found, None otherwise
+        """
+        return self.in_memory.get_transition_by_id(transition_id)
+    
     def get_transitions_from(self, state_id: str) -> List[StateTransition]:
         """
         Retrieve all transitions from a given state.
@@ -449,18 +657,19 @@ class PersistentMemory(Memory):
         # For simplicity, we'll just use the in-memory implementation
         return self.in_memory.get_transitions_to(state_id)
     
-    def get_state_history(self, state_id: str) -> List[InformationState]:
+    def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
         """
         Retrieve the history of states leading to the given state.
         
         Args:
             state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
             
         Returns:
             A list of states in chronological order
         """
         # For simplicity, we'll just use the in-memory implementation
-        return self.in_memory.get_state_history(state_id)
+        return self.in_memory.get_state_history(state_id, max_depth)
     
     def search_states(self, query: str, limit: int = 5) -> List[InformationState]:
         """
@@ -476,6 +685,36 @@ class PersistentMemory(Memory):
         # For simplicity, we'll just use the in-memory implementation
         return self.in_memory.search_states(query, limit)
     
+    def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                 successful_only: bool = False) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get relevant past experiences for a state.
+        
+        Args:
+            state: The current state
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+            
+        Returns:
+            A list of (state, transition) tuples
+        """
+        return self.in_memory.get_relevant_experiences(state, max_results, successful_only)
+    
+    def find_similar_states(self, state: InformationState, limit: int = 5,
+                            metric: str = "jaccard") -> List[Tuple[InformationState, float]]:
+        """
+        Find the stored states most similar to a state.
+        
+        Args:
+            state: The state to compare with
+            limit: Maximum number of results to return
+            metric: "jaccard", or "cosine" (requires a similarity engine)
+            
+        Returns:
+            A list of (state, similarity) tuples, most similar first
+        """
+        return self.in_memory.find_similar_states(state, limit, metric)
+    
     def clear(self) -> None:
         """
         Clear all states and transitions from memory.
@@ -483,16 +722,78 @@ class PersistentMemory(Memory):
         self.in_memory.clear()
         # In a real implementation, you would also clear the on-disk storage
     
+    def remove_state(self, state_id: str) -> bool:
+        """
+        Remove a state from memory and from disk.
+        
+        Data blobs are left in place, since other states may share them.
+        
+        Args:
+            state_id: The ID of the state to remove
+            
+        Returns:
+            True if the state was stored
+        """
+        removed = self.in_memory.remove_state(state_id)
+        path = self._state_path(state_id)
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+        return removed
+    
     def _save_state(self, state: InformationState) -> None:
         """
         Save a state to disk.
         
+        Only data blobs that are not already on disk are written.
+        
         Args:
             state: The state to save
         """
-        # In a real implementation, you would save the state to disk
-        # For example, using JSON serialization
-        pass
+        payload, blobs = self._encode_state(state)
+        self._write_state(state.id, payload, blobs)
+    
+    def _encode_state(self, state: InformationState,
+                      is_stored: Optional[Callable[[str], bool]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Encode a state into its on-disk payload and data blobs.
+        
+        Args:
+            state: The state to encode
+            is_stored: Check for blobs that need not be encoded again
+                (default: blobs known to be on disk, checking the disk if needed)
+            
+        Returns:
+            A tuple of (payload, blobs by digest)
+        """
+        blobs: Dict[str, str] = {}
+        is_stored = is_stored or self._is_blob_stored
+        payload = state.model_dump()
+        payload["data"] = {
+            key: self._blob_store.encode(value, blobs, is_stored=is_stored)
+            for key, value in state.data.items()
+        }
+        return payload, blobs
+    
+    def _write_state(self, state_id: str, payload: Dict[str, Any], blobs: Dict[str, str]) -> None:
+        """
+        Write an encoded state and its new data blobs to disk.
+        
+        Args:
+            state_id: The ID of the state
+            payload: The encoded state
+            blobs: Data blobs by digest
+        """
+        for digest, blob in blobs.items():
+            if not self._is_blob_stored(digest):
+                blob_path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                with open(blob_path, "w", encoding="utf-8") as f:
+                    f.write(blob)
+                self._stored_blobs.add(digest)
+        
+        with open(self._state_path(state_id), "w", encoding="utf-8") as f:
+            json.dump(payload, f, default=str)
     
     def _save_transition(self, transition: StateTransition) -> None:
         """
@@ -514,8 +815,69 @@ class PersistentMemory(Memory):
         Returns:
             The state if found, None otherwise
         """
-        # In a real implementation, you would load the state from disk
-        return None
+        payload = self._read_state_payload(state_id)
+        if payload is None:
+            return None
+        return self._decode_state(payload, self._read_blob)
+    
+    def _read_state_payload(self, state_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the encoded payload of a state from disk.
+        
+        Args:
+            state_id: The ID of the state
+            
+        Returns:
+            The payload if the state is stored, None otherwise
+        """
+        path = self._state_path(state_id)
+        if not os.path.exists(path):
+            return None
+        
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _read_payload_blobs(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Read every data blob referenced by a state payload, recursively.
+        
+        Args:
+            payload: The encoded state
+            
+        Returns:
+            Blobs by digest
+        """
+        blobs: Dict[str, str] = {}
+        pending = [value for value in payload.get("data", {}).values() if isinstance(value, dict)]
+        while pending:
+            digest = pending.pop()[REF_KEY]
+            if digest in blobs:
+                continue
+            blobs[digest] = self._read_blob(digest)
+            body = json.loads(blobs[digest])
+            children = body["d"].values() if "d" in body else body["l"]
+            pending.extend(child for child in children if isinstance(child, dict))
+        return blobs
+    
+    def _decode_state(self, payload: Dict[str, Any], load_blob: Callable[[str], str]) -> InformationState:
+        """
+        Decode a state payload.
+        
+        The data is read-only (to be interned) if the memory shares state
+        data, and plain dicts and lists otherwise.
+        
+        Args:
+            payload: The encoded state
+            load_blob: Function that returns the serialized blob for a digest
+            
+        Returns:
+            The state
+        """
+        payload["data"] = {
+            key: self._blob_store.decode(value, load_blob, frozen=self.in_memory.data_store is not None)
+            for key, value in payload.get("data", {}).items()
+        }
+        return InformationState(**payload)
     
     def _load_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
         """
@@ -529,4 +891,722 @@ class PersistentMemory(Memory):
             The transition if found, None otherwise
         """
         # In a real implementation, you would load the transition from disk
-        return None 
\ No newline at end of file
+        return None 
+    
+    def _state_path(self, state_id: str) -> str:
+        """Get the file path of a stored state."""
+        return os.path.join(self.states_path, quote(state_id, safe="") + ".json")
+    
+    def _blob_path(self, digest: str) -> str:
+        """Get the file path of a stored data blob."""
+        return os.path.join(self.blobs_path, digest[:2], digest + ".json")
+    
+    def _is_blob_stored(self, digest: str) -> bool:
+        """Check whether a data blob is already on disk."""
+        if digest in self._stored_blobs:
+            return True
+        if os.path.exists(self._blob_path(digest)):
+            self._stored_blobs.add(digest)
+            return True
+        return False
+    
+    def _read_blob(self, digest: str) -> str:
+        """Read a data blob from disk."""
+        with open(self._blob_path(digest), "r", encoding="utf-8") as f:
+            return f.read()
+
+class ShardedMemory(Memory):
+    """
+    Memory partitioned into independent shards by a session or user key.
+    
+    Each state is routed to the shard named by its routing key, which is
+    taken from ``state.metadata[key_field]`` (or a custom key function) and
+    otherwise inherited from its parent state. Transitions are stored in the
+    shard of their source state. Lookups, history and experience retrieval
+    stay within one shard; global search queries all loaded shards in
+    parallel.
+    
+    Shards can be unloaded when a user goes idle. With a storage path,
+    in-memory shards are written to ``<storage_path>/<key>.air`` with the
+    binary codec on unload and loaded back the next time they are needed.
+    
+    The shard table is guarded by a reader-writer lock: creating, loading
+    and unloading shards take it for writing, and writes into a shard hold
+    it for reading, so a shard cannot be unloaded while a state or
+    transition is being added to it. Shards used by several threads at once
+    must be thread-safe themselves (e.g. a ConcurrentMemory shard factory).
+    """
+    
+    def __init__(self, shard_factory: Optional[Callable[[str], Memory]] = None,
+                 key_fn: Optional[Callable[[InformationState], Optional[str]]] = None,
+                 key_field: str = "session_id", default_key: str = "default",
+                 storage_path: Optional[str] = None, max_workers: int = 4):
+        """
+        Initialize the sharded memory.
+        
+        Args:
+            shard_factory: Function that creates the memory for a shard key
+                (default: a new InMemoryStorage per shard)
+            key_fn: Optional function that returns the routing key of a state
+            key_field: Metadata field holding the routing key, if key_fn is not set
+            default_key: Shard for states without a routing key or parent
+            storage_path: Optional directory where unloaded shards are persisted
+            max_workers: Maximum number of shards queried in parallel
+        """
+        self.shard_factory = shard_factory or (lambda key: InMemoryStorage())
+        self.key_fn = key_fn
+        self.key_field = key_field
+        self.default_key = default_key
+        self.storage_path = storage_path
+        self.max_workers = max_workers
+        self.shards: Dict[str, Memory] = {}
+        self._shard_of: Dict[str, str] = {}  # State ID -> shard key
+        self._last_access: Dict[str, float] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Guards the three dicts above; see the class docstring
+        self.lock = ReadWriteLock()
+        if storage_path:
+            os.makedirs(storage_path, exist_ok=True)
+        logger.info("Initialized ShardedMemory")
+    
+    def shard_key(self, state: InformationState) -> str:
+        """
+        Determine the shard a state belongs to.
+        
+        Args:
+            state: The state to route
+            
+        Returns:
+            The shard key
+        """
+        key = self.key_fn(state) if self.key_fn is not None else state.metadata.get(self.key_field)
+        if key is not None:
+            return str(key)
+        if state.parent_id is not None and state.parent_id in self._shard_of:
+            return self._shard_of[state.parent_id]
+        return self.default_key
+    
+    def get_shard(self, key: str) -> Memory:
+        """
+        Get the memory of a shard, creating or reloading it if needed.
+        
+        Args:
+            key: The shard key
+            
+        Returns:
+            The shard's memory
+        """
+        with self.lock.read():
+            shard = self.shards.get(key)
+            if shard is not None:
+                # Only updates an existing key, which readers may do
+                self._last_access[key] = time.monotonic()
+                return shard
+        with self.lock.write():
+            shard = self.shards.get(key)
+            if shard is None:
+                shard = self.shard_factory(key)
+                # Publish the shard only once it is loaded
+                self._load_shard(key, shard)
+                self.shards[key] = shard
+            self._last_access[key] = time.monotonic()
+            return shard
+    
+    def unload_shard(self, key: str, persist: bool = True) -> bool:
+        """
+        Drop a shard from memory.
+        
+        Args:
+            key: The shard key
+            persist: Whether to write an in-memory shard to the storage path first
+            
+        Returns:
+            True if the shard was loaded
+        """
+        with self.lock.write():
+            shard = self.shards.pop(key, None)
+            self._last_access.pop(key, None)
+            if shard is None:
+                return False
+            # Save before releasing the lock, so the shard is not reloaded from an older file
+            if persist and self.storage_path and isinstance(shard, InMemoryStorage):
+                self._save_shard(key, shard)
+        logger.info(f"Unloaded shard {key}")
+        return True
+    
+    def unload_idle(self, max_idle_seconds: float, persist: bool = True) -> List[str]:
+        """
+        Unload the shards that have not been accessed recently.
+        
+        Args:
+            max_idle_seconds: Shards idle for longer than this are unloaded
+            persist: Whether to persist in-memory shards first
+            
+        Returns:
+            The keys of the unloaded shards
+        """
+        with self.lock.write():
+            cutoff = time.monotonic() - max_idle_seconds
+            idle = [key for key, last_access in self._last_access.items() if last_access < cutoff]
+            for key in idle:
+                self.unload_shard(key, persist)
+        return idle
+    
+    def add_state(self, state: InformationState) -> None:
+        """
+        Add a state to its shard.
+        
+        Args:
+            state: The state to add
+        """
+        key = self.shard_key(state)
+        
+        def add(shard: Memory) -> None:
+            shard.add_state(state)
+            # Unlocked readers only look up single keys, and the code that
+            # iterates the dict holds the write lock
+            self._shard_of[state.id] = key
+        
+        self._write_shard(key, add)
+    
+    def add_transition(self, transition: StateTransition) -> Optional[int]:
+        """
+        Add a transition to the shard of its source state.
+        
+        Args:
+            transition: The transition to add
+            
+        Returns:
+            None, since transition IDs are only unique within a shard
+        """
+        key = self._shard_of.get(transition.source_state_id,
+                                 self._shard_of.get(transition.target_state_id, self.default_key))
+        self._write_shard(key, lambda shard: shard.add_transition(transition))
+        return None
+    
+    def get_state(self, state_id: str) -> Optional[InformationState]:
+        """
+        Retrieve a state by ID.
+        
+        Args:
+            state_id: The ID of the state to retrieve
+            
+        Returns:
+            The state if found, None otherwise
+        """
+        shard = self._shard_for(state_id)
+        return shard.get_state(state_id) if shard is not None else None
+    
+    def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
+        """
+        Retrieve a transition by source and target state IDs.
+        
+        Args:
+            source_id: The ID of the source state
+            target_id: The ID of the target state
+            
+        Returns:
+            The transition if found, None otherwise
+        """
+        shard = self._shard_for(source_id)
+        return shard.get_transition(source_id, target_id) if shard is not None else None
+    
+    def get_transitions_from(self, state_id: str) -> List[StateTransition]:
+        """
+        Retrieve all transitions from a given state.
+        
+        Args:
+            state_id: The ID of the source state
+            
+        Returns:
+            A list of transitions
+        """
+        shard = self._shard_for(state_id)
+        return shard.get_transitions_from(state_id) if shard is not None else []
+    
+    def get_transitions_to(self, state_id: str) -> List[StateTransition]:
+        """
+        Retrieve all transitions to a given state.
+        
+        Transitions are stored with their source state, so shards other than
+        the target's own are searched as well.
+        
+        Args:
+            state_id: The ID of the target state
+            
+        Returns:
+            A list of transitions
+        """
+        shard = self._shard_for(state_id)
+        transitions = shard.get_transitions_to(state_id) if shard is not None else []
+        with self.lock.read():
+            others = list(self.shards.values())
+        for other in others:
+            if other is not shard:
+                transitions.extend(other.get_transitions_to(state_id))
+        return transitions
+    
+    def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
+        """
+        Retrieve the history of states leading to the given state.
+        
+        Args:
+            state_id: The ID of the state
+            max_depth: Maximum number of states to return (the most recent ones)
+            
+        Returns:
+            A list of states in chronological order
+        """
+        shard = self._shard_for(state_id)
+        return shard.get_state_history(state_id, max_depth) if shard is not None else []
+    
+    def search_states(self, query: str, limit: int = 5, shard_key: Optional[str] = None) -> List[InformationState]:
+        """
+        Search for states matching the query.
+        
+        Args:
+            query: The search query
+            limit: Maximum number of results to return
+            shard_key: Only search this shard (default: all loaded shards)
+            
+        Returns:
+            A list of matching states. Scores are not comparable between
+            shards, so global results interleave the shards' rankings.
+        """
+        if shard_key is not None:
+            return self.get_shard(shard_key).search_states(query, limit)
+        return self._merge_ranked(self._map_shards(lambda shard: shard.search_states(query, limit)), limit)
+    
+    def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                 successful_only: bool = False,
+                                 global_tier: bool = False) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get relevant past experiences for a state.
+        
+        Args:
+            state: The current state
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+            global_tier: Also draw on other shards once the state's own shard
+                has no more experiences
+            
+        Returns:
+            A list of (state, transition) tuples, from the state's own shard first
+        """
+        def experiences(shard: Memory) -> List[Tuple[InformationState, StateTransition]]:
+            if not hasattr(shard, "get_relevant_experiences"):
+                return []
+            return shard.get_relevant_experiences(state, max_results, successful_only)
+        
+        own_key = self._shard_of.get(state.id, self.shard_key(state))
+        results = experiences(self.get_shard(own_key))
+        if global_tier and len(results) < max_results:
+            others = self._map_shards(experiences, exclude=own_key)
+            results.extend(self._merge_ranked(others, max_results - len(results)))
+        return results[:max_results]
+    
+    def clear(self) -> None:
+        """
+        Clear all shards, including persisted ones.
+        """
+        with self.lock.write():
+            for shard in self.shards.values():
+                shard.clear()
+            self.shards.clear()
+            self._shard_of.clear()
+            self._last_access.clear()
+            if self.storage_path:
+                for name in os.listdir(self.storage_path):
+                    if name.endswith(".air"):
+                        os.remove(os.path.join(self.storage_path, name))
+        logger.info("Cleared sharded memory")
+    
+    def _shard_for(self, state_id: str) -> Optional[Memory]:
+        """Get the shard a known state was routed to."""
+        key = self._shard_of.get(state_id)
+        return self.get_shard(key) if key is not None else None
+    
+    def _write_shard(self, key: str, fn: Callable[[Memory], Any]) -> Any:
+        """Apply a write to a shard while holding the read lock, so it cannot be unloaded meanwhile."""
+        while True:
+            with self.lock.read():
+                shard = self.shards.get(key)
+                if shard is not None:
+                    self._last_access[key] = time.monotonic()
+                    return fn(shard)
+            # Create or reload the shard, then take the read lock again
+            self.get_shard(key)
+    
+    def _map_shards(self, fn: Callable[[Memory], List[Any]], exclude: Optional[str] = None) -> List[List[Any]]:
+        """Apply a query to every loaded shard, in parallel when there are several."""
+        with self.lock.read():
+            shards = [shard for key, shard in self.shards.items() if key != exclude]
+        if len(shards) <= 1 or self.max_workers <= 1:
+            return [fn(shard) for shard in shards]
+        if self._executor is None:
+            with self.lock.write():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="memory-shard")
+        return list(self._executor.map(fn, shards))
+    
+    @staticmethod
+    def _merge_ranked(rankings: List[List[Any]], limit: int) -> List[Any]:
+        """Interleave per-shard rankings by rank."""
+        merged = []
+        for rank in range(max((len(ranking) for ranking in rankings), default=0)):
+            for ranking in rankings:
+                if rank < len(ranking):
+                    merged.append(ranking[rank])
+                    if len(merged) >= limit:
+                        return merged
+        return merged
+    
+    def _shard_file(self, key: str) -> str:
+        return os.path.join(self.storage_path, quote(key, safe="") + ".air")
+    
+    def _save_shard(self, key: str, shard: InMemoryStorage) -> None:
+        """Write an in-memory shard's states and transitions to its shard file."""
+        table = shard.transition_table
+        records = list(shard.states.values()) + [table.get(i) for i in table.ids()]
+        path = self._shard_file(key)
+        with open(path + ".tmp", "wb") as f:
+            f.write(default_codec.encode_many(records))
+        os.replace(path + ".tmp", path)
+    
+    def _load_shard(self, key: str, shard: Memory) -> None:
+        """Load a persisted shard file into a freshly created shard."""
+        if not self.storage_path or not isinstance(shard, InMemoryStorage):
+            return
+        path = self._shard_file(key)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            buffer = f.read()
+        for record in default_codec.iter_decode(buffer):
+            if isinstance(record, InformationState):
+                shard.add_state(record)
+                self._shard_of[record.id] = key
+            else:
+                shard.add_transition(record)
+        logger.info(f"Loaded shard {key} from {path}")
+
+class ConcurrentMemory(InMemoryStorage):
+    """
+    Thread-safe in-memory storage for agent sessions running in parallel.
+    
+    All indexes are guarded by one reader-writer lock: reads from any number
+    of threads proceed concurrently and only block while a state or
+    transition is being written. The ancestor index memoizes depths and skip
+    pointers while answering queries, so history lookups additionally
+    serialize on their own small lock.
+    """
+    
+    def __init__(self, experience_index: Optional[ExperienceIndex] = None,
+                 data_store: Optional[SharedDataStore] = None,
+                 similarity_engine: Optional[SimilarityEngine] = None):
+        """
+        Initialize the concurrent storage.
+        
+        Args:
+            experience_index: Optional vector index used to retrieve experiences
+            data_store: Optional store used to share identical state data sub-objects
+            similarity_engine: Optional term matrix for batch similarity queries
+        """
+        self.lock = ReadWriteLock()
+        self._history_lock = threading.Lock()
+        super().__init__(experience_index=experience_index, data_store=data_store,
+                         similarity_engine=similarity_engine)
+    
+    def add_state(self, state: InformationState) -> None:
+        with self.lock.write():
+            super().add_state(state)
+    
+    def add_transition(self, transition: StateTransition) -> int:
+        with self.lock.write():
+            return super().add_transition(transition)
+    
+    def clear(self) -> None:
+        with self.lock.write():
+            super().clear()
+    
+    def remove_state(self, state_id: str) -> bool:
+        with self.lock.write():
+            return super().remove_state(state_id)
+    
+    def get_state(self, state_id: str) -> Optional[InformationState]:
+        with self.lock.read():
+            return super().get_state(state_id)
+    
+    def get_transition(self, source_id: str, target_id: str) -> Optional[StateTransition]:
+        with self.lock.read():
+            return super().get_transition(source_id, target_id)
+    
+    def get_transition_by_id(self, transition_id: int) -> Optional[StateTransition]:
+        with self.lock.read():
+            return super().get_transition_by_id(transition_id)
+    
+    def get_transitions_from(self, state_id: str) -> List[StateTransition]:
+        with self.lock.read():
+            return super().get_transitions_from(state_id)
+    
+    def get_transitions_to(self, state_id: str) -> List[StateTransition]:
+        with self.lock.read():
+            return super().get_transitions_to(state_id)
+    
+    def get_state_history(self, state_id: str, max_depth: Optional[int] = None) -> List[InformationState]:
+        with self.lock.read(), self._history_lock:
+            return super().get_state_history(state_id, max_depth)
+    
+    def get_ancestor(self, state_id: str, generations: int = 1) -> Optional[InformationState]:
+        with self.lock.read(), self._history_lock:
+            return super().get_ancestor(state_id, generations)
+    
+    def search_states(self, query: str, limit: int = 5, match_all: bool = False) -> List[InformationState]:
+        with self.lock.read():
+            return super().search_states(query, limit, match_all)
+    
+    def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                 successful_only: bool = False) -> List[Tuple[InformationState, StateTransition]]:
+        with self.lock.read():
+            return super().get_relevant_experiences(state, max_results, successful_only)
+    
+    def find_similar_states(self, state: InformationState, limit: int = 5,
+                            metric: str = "jaccard") -> List[Tuple[InformationState, float]]:
+        with self.lock.read():
+            return super().find_similar_states(state, limit, metric)
+
+class DecayingMemory(ConcurrentMemory):
+    """
+    Thread-safe in-memory storage whose states expire and lose importance over time.
+    
+    Each state has an importance score that starts at ``initial_importance``,
+    grows by the reward of every transition leaving the state and by
+    ``access_weight`` whenever the state is read or retrieved, and decays
+    exponentially with the given half-life. Experience retrieval ranks
+    candidates by their current importance.
+    
+    A state expires ``ttl`` seconds after its last access, or once its
+    importance has decayed below ``min_importance``. Both times follow from
+    the state's last update, so expiries are kept in a heap and a sweep only
+    pops the entries that are due; entries made stale by later updates are
+    rescheduled when popped.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, half_life: float = 3600.0,
+                 min_importance: Optional[float] = None, initial_importance: float = 1.0,
+                 access_weight: float = 0.1, clock: Callable[[], float] = time.time,
+                 experience_index: Optional[ExperienceIndex] = None,
+                 data_store: Optional[SharedDataStore] = None,
+                 similarity_engine: Optional[SimilarityEngine] = None):
+        """
+        Initialize the decaying storage.
+        
+        Args:
+            ttl: Seconds after its last access until a state expires (None for no TTL)
+            half_life: Seconds for a state's importance to halve
+            min_importance: States whose importance decays below this expire
+                (None to only expire by TTL)
+            initial_importance: Importance of a newly added state
+            access_weight: Importance added each time a state is accessed
+            clock: Function returning the current time in seconds
+            experience_index: Optional vector index used to retrieve experiences
+            data_store: Optional store used to share identical state data sub-objects
+            similarity_engine: Optional term matrix for batch similarity queries
+        """
+        super().__init__(experience_index=experience_index, data_store=data_store,
+                         similarity_engine=similarity_engine)
+        if half_life <= 0:
+            raise ValueError("half_life must be positive")
+        self.ttl = ttl
+        self.half_life = half_life
+        self.min_importance = min_importance
+        self.initial_importance = initial_importance
+        self.access_weight = access_weight
+        self.clock = clock
+        self._decay_rate = math.log(2) / half_life
+        self._decay_lock = threading.Lock()
+        self._importance: Dict[str, Tuple[float, float]] = {}  # State ID -> (importance, as of time)
+        self._last_access: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._scheduled: Dict[str, float] = {}  # State ID -> its earliest heap entry
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+    
+    def importance(self, state_id: str, now: Optional[float] = None) -> float:
+        """
+        Get the current importance of a state.
+        
+        Args:
+            state_id: The ID of the state
+            now: Time to evaluate the decay at (default: the clock)
+            
+        Returns:
+            The decayed importance, or 0 if the state is not in memory
+        """
+        entry = self._importance.get(state_id)
+        if entry is None:
+            return 0.0
+        value, as_of = entry
+        elapsed = (self.clock() if now is None else now) - as_of
+        return value * math.exp(-self._decay_rate * max(elapsed, 0.0))
+    
+    def add_state(self, state: InformationState) -> None:
+        with self.lock.write():
+            super().add_state(state)
+            now = self.clock()
+            with self._decay_lock:
+                self._importance[state.id] = (self.initial_importance, now)
+                self._last_access[state.id] = now
+                self._schedule(state.id, now)
+    
+    def add_transition(self, transition: StateTransition) -> int:
+        with self.lock.write():
+            transition_id = super().add_transition(transition)
+            if transition.source_state_id in self.states:
+                self._bump(transition.source_state_id, transition.reward, accessed=False)
+            return transition_id
+    
+    def get_state(self, state_id: str) -> Optional[InformationState]:
+        state = super().get_state(state_id)
+        if state is not None:
+            self._bump(state_id, self.access_weight, accessed=True)
+        return state
+    
+    def get_relevant_experiences(self, state: InformationState, max_results: int = 3,
+                                 successful_only: bool = False,
+                                 candidate_factor: int = 4) -> List[Tuple[InformationState, StateTransition]]:
+        """
+        Get relevant past experiences for a state, ranked by importance.
+        
+        A pool of ``max_results * candidate_factor`` candidates is retrieved as
+        usual (by similarity or recency), then ordered by current importance;
+        candidates of equal importance keep their retrieval order.
+        
+        Args:
+            state: The current state
+            max_results: Maximum number of results to return
+            successful_only: Only return experiences whose transition was successful
+            candidate_factor: How many candidates to consider per result
+            
+        Returns:
+            A list of (state, transition) tuples
+        """
+        candidates = super().get_relevant_experiences(state, max_results * candidate_factor, successful_only)
+        now = self.clock()
+        candidates.sort(key=lambda experience: self.importance(experience[0].id, now), reverse=True)
+        results = candidates[:max_results]
+        for past_state, _ in results:
+            self._bump(past_state.id, self.access_weight, accessed=True)
+        return results
+    
+    def remove_state(self, state_id: str) -> bool:
+        with self.lock.write():
+            with self._decay_lock:
+                self._importance.pop(state_id, None)
+                self._last_access.pop(state_id, None)
+                self._scheduled.pop(state_id, None)
+            return super().remove_state(state_id)
+    
+    def clear(self) -> None:
+        with self.lock.write():
+            super().clear()
+            with self._decay_lock:
+                self._importance.clear()
+                self._last_access.clear()
+                self._expiry_heap.clear()
+                self._scheduled.clear()
+    
+    def sweep(self, now: Optional[float] = None) -> List[str]:
+        """
+        Remove the states that have expired.
+        
+        Args:
+            now: Time to sweep at (default: the clock)
+            
+        Returns:
+            The IDs of the removed states
+        """
+        now = self.clock() if now is None else now
+        expired = []
+        with self.lock.write():
+            with self._decay_lock:
+                while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                    scheduled_at, state_id = heapq.heappop(self._expiry_heap)
+                    if self._scheduled.get(state_id) != scheduled_at:
+                        continue  # Superseded by an earlier entry, or the state is gone
+                    del self._scheduled[state_id]
+                    if self._expiry(state_id) <= now:
+                        expired.append(state_id)
+                    else:
+                        self._schedule(state_id, now)
+            for state_id in expired:
+                self.remove_state(state_id)
+        if expired:
+            logger.info(f"Expired {len(expired)} states")
+        return expired
+    
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Start a background thread that sweeps expired states periodically.
+        
+        Args:
+            interval: Seconds between sweeps
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+        
+        def run():
+            while not self._stop_sweeper.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Error sweeping memory: {e}")
+        
+        self._sweeper = threading.Thread(target=run, name="memory-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def stop_sweeper(self) -> None:
+        """
+        Stop the background sweeper, if it is running.
+        """
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+    
+    def _bump(self, state_id: str, delta: float, accessed: bool) -> None:
+        """Add to a state's importance and reschedule its expiry if it moved earlier."""
+        now = self.clock()
+        with self._decay_lock:
+            if state_id not in self._importance:
+                return
+            self._importance[state_id] = (self.importance(state_id, now) + delta, now)
+            if accessed:
+                self._last_access[state_id] = now
+            self._schedule(state_id, now)
+    
+    def _expiry(self, state_id: str) -> float:
+        """Compute when a state expires, from its last access and importance."""
+        expiry = math.inf
+        if self.ttl is not None:
+            expiry = self._last_access[state_id] + self.ttl
+        if self.min_importance is not None:
+            value, as_of = self._importance[state_id]
+            if value <= self.min_importance:
+                expiry = min(expiry, as_of)
+            elif self.min_importance > 0:
+                expiry = min(expiry, as_of + math.log(value / self.min_importance) / self._decay_rate)
+            # A non-positive floor is never reached by a decaying positive importance
+        return expiry
+    
+    def _schedule(self, state_id: str, now: float) -> None:
+        """Push a heap entry for a state unless an earlier one is already pending."""
+        expiry = max(self._expiry(state_id), now)
+        if expiry == math.inf:
+            return
+        scheduled_at = self._scheduled.get(state_id)
+        if scheduled_at is None or expiry < scheduled_at:
+            self._scheduled[state_id] = expiry
+            heapq.heappush(self._expiry_heap, (expiry, state_id))
@@ -14,6 +14,9 @@ import logging
 
 from .state import InformationState
 from .memory import Memory
+from .records import new_transition
+from ..llm.errors import LLMError
+from ..llm.metrics import tag_caller
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -122,10 +125,20 @@ class LLMPolicy(Policy):
     
     This policy uses a language model to generate actions based on the current state,
     memory of past interactions, and potentially generated thoughts.
+    
+    If the LLM call fails with an LLMError (timeout, unreachable server, open
+    circuit breaker, ...), the action is selected by the fallback policy, if
+    one is set; otherwise the error is raised.
+    
+    With a session_fn, each decision opens a session and generates the
+    thoughts and then the action in it, so the state and the thoughts are
+    sent (and processed by the model) once rather than at every step.
     """
     
     def __init__(self, llm_fn: Callable[[str], str], memory: Optional[Memory] = None, 
-                 thought_generator = None, thought_manager = None, verbose: bool = False):
+                 thought_generator = None, thought_manager = None, verbose: bool = False,
+                 fallback_policy: Optional[Policy] = None,
+                 session_fn: Optional[Callable[[], Callable[..., str]]] = None):
         """
         Initialize the LLMPolicy.
         
@@ -135,12 +148,19 @@ class LLMPolicy(Policy):
             thought_generator: ThoughtGenerator for generating thoughts
             thought_manager: ThoughtManager for storing and organizing thoughts
             verbose: Whether to print verbose output
+            fallback_policy: Optional policy used when the LLM fails (e.g. RandomPolicy)
+            session_fn: Optional function returning a new session (e.g. from
+                OllamaClient.create_session_function); a session is called as
+                session(prompt) for thoughts and session(prompt, stop_on_json=True)
+                for the action, and continues one conversation across the calls
         """
         self.llm_fn = llm_fn
         self.memory = memory
         self.thought_generator = thought_generator
         self.thought_manager = thought_manager
         self.verbose = verbose
+        self.fallback_policy = fallback_policy
+        self.session_fn = session_fn
     
     def select_action(self, state: InformationState, **kwargs) -> Action:
         """
@@ -152,31 +172,46 @@ class LLMPolicy(Policy):
             
         Returns:
             The selected action
+            
+        Raises:
+            LLMError: If the LLM fails and there is no fallback policy
         """
         thoughts = []
+        session = None
         
-        # Generate thoughts if there's a thought generator and manager
-        if self.thought_generator and self.thought_manager:
-            if self.verbose:
-                logger.info("Generating thoughts...")
-            thoughts = self.thought_generator.generate_thoughts(state, llm_fn=self.llm_fn)
-            for thought in thoughts:
-                self.thought_manager.add_thought(thought)
-        
-        # Get relevant experiences from memory if available
-        relevant_experiences = []
-        if self.memory:
+        try:
+            # Generate thoughts if there's a thought generator and manager
+            if self.thought_generator and self.thought_manager:
+                if self.verbose:
+                    logger.info("Generating thoughts...")
+                if self.session_fn is not None:
+                    session = self.session_fn()
+                thoughts = self.thought_generator.generate_thoughts(state, llm_fn=self.llm_fn, session=session)
+                for thought in thoughts:
+                    self.thought_manager.add_thought(thought)
+            
+            # Get relevant experiences from memory if available
+            relevant_experiences = []
+            if self.memory:
+                if self.verbose:
+                    logger.info("Retrieving relevant experiences...")
+                relevant_experiences = self.memory.get_relevant_experiences(state)
+            
+            # Get response from LLM, continuing the session the thoughts were generated in
             if self.verbose:
-                logger.info("Retrieving relevant experiences...")
-            relevant_experiences = self.memory.get_relevant_experiences(state)
-        
-        # Generate prompt for LLM
-        prompt = self._generate_action_prompt(state, thoughts, relevant_experiences)
-        
-        # Get response from LLM
-        if self.verbose:
-            logger.info("Generating action with LLM...")
-        response = self.llm_fn(prompt)
+                logger.info("Generating action with LLM...")
+            with tag_caller("policy"):
+                if session is not None and thoughts:
+                    prompt = self._generate_action_prompt(state, thoughts, relevant_experiences, continued=True)
+                    response = session(prompt, stop_on_json=True)
+                else:
+                    prompt = self._generate_action_prompt(state, thoughts, relevant_experiences)
+                    response = self.llm_fn(prompt)
+        except LLMError as e:
+            if self.fallback_policy is None:
+                raise
+            logger.warning(f"LLM call failed ({type(e).__name__}: {e}), using fallback policy")
+            return self.fallback_policy.select_action(state, **kwargs)
         
         # Parse the response to extract action
         if self.verbose:
@@ -202,8 +237,7 @@ class LLMPolicy(Policy):
         """
         # LLM policy doesn't explicitly update parameters, but we can store the experience in memory
         if self.memory:
-            from .state import StateTransition
-            transition = StateTransition(
+            transition = new_transition(
                 source_state_id=state.id,
                 target_state_id=next_state.id,
                 action=action.name,
@@ -219,7 +253,7 @@ class LLMPolicy(Policy):
             self.memory.add_transition(transition)
     
     def _generate_action_prompt(self, state: InformationState, thoughts: List[Any], 
-                               relevant_experiences: List[Tuple[Any, Any]]) -> str:
+                               relevant_experiences: List[Tuple[Any, Any]], continued: bool = False) -> str:
         """
         Generate a prompt for action selection.
         
@@ -227,21 +261,24 @@ class LLMPolicy(Policy):
             state: The current state
             thoughts: List of generated thoughts
             relevant_experiences: List of relevant past experiences
+            continued: Whether the prompt continues the session the thoughts were
+                generated in, so the state and thoughts are left out
             
         Returns:
             A prompt for the LLM
         """
         prompt = "You are an AI agent tasked with selecting the best action to take in the current situation.\n\n"
         
-        prompt += f"Current state: {state.text}\n\n"
+        if not continued:
+            prompt += f"Current state: {state.text}\n\n"
         
-        if state.available_actions:
+        if state.available_actions and not continued:
             prompt += "Available actions:\n"
             for action in state.available_actions:
                 prompt += f"- {action}\n"
             prompt += "\n"
         
-        if thoughts:
+        if thoughts and not continued:
             prompt += "Your thoughts on the current situation:\n"
             for thought in thoughts:
                 prompt += f"[{thought.type}] {thought.text}\n\n"
@@ -0,0 +1,182 @@
+"""
+Fast construction of core records for Agentic IR.
+
+The pydantic models in ``state`` validate every field on construction, which
+is the right default at API boundaries but adds up on hot paths that build
+several states and transitions per agent step from values that are already
+known to be well-typed. This module provides a construction fast path for
+those internal call sites: models are assembled directly from their field
+values, and IDs are generated without building ``uuid.UUID`` objects.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from .state import InformationState, StateTransition
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_set_attr = object.__setattr__
+
+# Field layout per model class, built on first use
+_specs: Dict[type, Tuple[Tuple[str, ...], Tuple[Tuple[str, Any, Any], ...], Optional[Dict[str, Any]]]] = {}
+
+def new_id() -> str:
+    """
+    Generate a random (version 4) UUID string.
+
+    Returns:
+        A UUID string in the same format as ``str(uuid.uuid4())``
+    """
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
+
+def construct(model_cls: Type[ModelT], values: Dict[str, Any],
+              fields_set: Optional[Set[str]] = None) -> ModelT:
+    """
+    Build a model instance from trusted field values without validation.
+
+    Missing fields are filled from their defaults. Unlike ``model_construct``,
+    ``values`` is used as the instance's field dict directly when it lists
+    every field in declaration order, so callers must not reuse it.
+
+    Args:
+        model_cls: The pydantic model class
+        values: Field values, already of the declared types
+        fields_set: Names of the explicitly set fields (default: the keys of values)
+
+    Returns:
+        The model instance
+    """
+    spec = _specs.get(model_cls)
+    if spec is None:
+        spec = _specs[model_cls] = _build_spec(model_cls)
+    names, fields, private = spec
+
+    # Like model_construct, only the given fields count as explicitly set
+    if fields_set is None:
+        fields_set = set(values)
+    # Keep the declaration order validation produces, which model_dump() and
+    # JSON output follow
+    if tuple(values) != names:
+        values = _in_field_order(model_cls, values, fields)
+
+    # The same instance attributes model_construct sets (pydantic 2.x, pinned
+    # below 3 in requirements.txt); tests/test_core/test_records.py compares
+    # them with a validated instance. model_construct itself is slower than
+    # validating these models.
+    instance = model_cls.__new__(model_cls)
+    _set_attr(instance, "__dict__", values)
+    _set_attr(instance, "__pydantic_fields_set__", fields_set)
+    _set_attr(instance, "__pydantic_extra__", None)
+    _set_attr(instance, "__pydantic_private__", dict(private) if private is not None else None)
+    return instance
+
+def _in_field_order(model_cls: Type[BaseModel], given: Dict[str, Any],
+                    fields: Tuple[Tuple[str, Any, Any], ...]) -> Dict[str, Any]:
+    """Return the field values in declaration order, filling in defaults."""
+    if len(given) == len(fields):
+        try:
+            return {name: given[name] for name, _, _ in fields}
+        except KeyError:
+            pass
+    values = {}
+    for name, default, factory in fields:
+        if name in given:
+            values[name] = given[name]
+        elif factory is not None:
+            values[name] = factory()
+        elif default is not PydanticUndefined:
+            values[name] = default
+        else:
+            raise TypeError(f"{model_cls.__name__} requires field '{name}'")
+    return values
+
+def _build_spec(model_cls: Type[BaseModel]) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, Any, Any], ...],
+                                                     Optional[Dict[str, Any]]]:
+    """Collect the field names, (name, default, default factory) per field and the private attribute defaults."""
+    fields = tuple((name, field.default, field.default_factory)
+                   for name, field in model_cls.model_fields.items())
+    private = None
+    if model_cls.__private_attributes__:
+        private = {}
+        for name, attribute in model_cls.__private_attributes__.items():
+            default = attribute.get_default()
+            if default is not PydanticUndefined:
+                private[name] = default
+    return tuple(model_cls.model_fields), fields, private
+
+def new_state(text: str, parent_id: Optional[str] = None, available_actions: Optional[List[str]] = None,
+              data: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None,
+              state_id: Optional[str] = None, timestamp: Optional[float] = None) -> InformationState:
+    """
+    Create an information state on the fast path.
+
+    Args:
+        text: Textual representation of the state
+        parent_id: ID of the parent state, if any
+        available_actions: Actions available in the state
+        data: Structured data associated with the state
+        metadata: Metadata about the state
+        state_id: ID of the state (default: a new random ID)
+        timestamp: Creation time (default: now)
+
+    Returns:
+        The new state
+    """
+    # Mark the same fields as set as InformationState(id=..., text=..., ...) would,
+    # which also keeps the set small
+    fields_set = {"id", "text", "timestamp"}
+    if parent_id is not None:
+        fields_set.add("parent_id")
+    if available_actions is not None:
+        fields_set.add("available_actions")
+    if data is not None:
+        fields_set.add("data")
+    if metadata is not None:
+        fields_set.add("metadata")
+
+    return construct(InformationState, {
+        "id": state_id if state_id is not None else new_id(),
+        "text": text,
+        "data": data if data is not None else {},
+        "metadata": metadata if metadata is not None else {},
+        "parent_id": parent_id,
+        "available_actions": list(available_actions) if available_actions is not None else [],
+        "timestamp": timestamp if timestamp is not None else time.time(),
+    }, fields_set)
+
+def new_transition(source_state_id: str, target_state_id: str, action: str,
+                   action_params: Optional[Dict[str, Any]] = None, success: bool = True,
+                   reward: float = 0.0, timestamp: Optional[float] = None,
+                   metadata: Optional[Dict[str, Any]] = None) -> StateTransition:
+    """
+    Create a state transition on the fast path.
+
+    Args:
+        source_state_id: ID of the source state
+        target_state_id: ID of the target state
+        action: Action that caused the transition
+        action_params: Parameters for the action
+        success: Whether the transition was successful
+        reward: Reward associated with the transition
+        timestamp: Time of the transition (default: now)
+        metadata: Additional metadata about the transition
+
+    Returns:
+        The new transition
+    """
+    return construct(StateTransition, {
+        "source_state_id": source_state_id,
+        "target_state_id": target_state_id,
+        "action": action,
+        "action_params": action_params if action_params is not None else {},
+        "success": success,
+        "reward": float(reward),
+        "timestamp": timestamp if timestamp is not None else time.time(),
+        "metadata": metadata if metadata is not None else {},
+    })
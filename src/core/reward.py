@@ -10,6 +10,7 @@ from pydantic import BaseModel, Field
 import time
 
 from .state import InformationState, StateTransition
+from ..llm.metrics import tag_caller
 
 # Type definitions
 RewardFunction = Callable[[InformationState, InformationState, Optional[StateTransition]], float]
@@ -246,7 +247,8 @@ class LLMRewardModel(RewardModel):
         prompt = self._generate_reward_prompt(current_state, target_state, transition)
         
         # Get response from LLM
-        response = self.llm_fn(prompt)
+        with tag_caller("reward"):
+            response = self.llm_fn(prompt)
         
         # Parse the response to extract reward and components
         reward, components = self._parse_llm_response(response)
@@ -279,7 +281,8 @@ class LLMRewardModel(RewardModel):
         prompt = self._generate_cumulative_reward_prompt(states, transitions, target_state)
         
         # Get response from LLM
-        response = self.llm_fn(prompt)
+        with tag_caller("reward"):
+            response = self.llm_fn(prompt)
         
         # Parse the response to extract cumulative reward
         cumulative_reward = self._parse_cumulative_reward_response(response)
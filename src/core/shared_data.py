@@ -0,0 +1,306 @@
+"""
+Structurally shared state data for Agentic IR.
+
+This module implements a content-addressed store for the structured data
+attached to information states. Dicts and lists are hashed bottom-up like a
+Merkle tree, so identical sub-objects (the user profile, unchanged context
+entries, ...) are kept once in memory and written once to disk, with every
+state referencing them by hash.
+"""
+
+import json
+import hashlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# JSON scalar types that can be stored inline
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Key used to reference a blob from its parent in the encoded form
+REF_KEY = "$ref"
+
+# Marker for elements that cannot be content-addressed
+_OPAQUE = object()
+
+class FrozenDict(dict):
+    """
+    Read-only dict holding an interned mapping.
+
+    It is still a dict, so it serializes (JSON, msgpack, pydantic) like one;
+    build a new dict (e.g. ``{**context, "key": value}``) to change it.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("interned state data is immutable; build a new dict instead")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenDict":
+        return self
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[Any, Any]]]:
+        return FrozenDict, (dict(self),)
+
+class SharedDataStore:
+    """
+    Content-addressed, reference-counted store of state data sub-objects.
+
+    Interned dicts and lists become FrozenDicts and tuples, so a sub-object
+    shared between states cannot be changed through one of them. Each
+    intern() takes a reference that release() gives back; objects (and the
+    sub-objects only they hold) are dropped with their last reference.
+    """
+
+    def __init__(self):
+        """Initialize the shared data store."""
+        self._objects: Dict[str, Any] = {}
+        self._refs: Dict[str, int] = {}
+        # Digests of the canonical objects, keyed by identity; an entry is
+        # only trusted if the object stored under its digest is the same one
+        self._digests_by_id: Dict[int, str] = {}
+
+    def intern(self, value: Any) -> Any:
+        """
+        Replace a value with its canonical shared copy, taking a reference.
+
+        Args:
+            value: A JSON-like value (dicts, lists and scalars)
+
+        Returns:
+            An equal, immutable value whose containers are shared with every
+            other interned value containing the same content
+        """
+        return self._intern(value)[0]
+
+    def intern_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Intern the values of a state's data dict.
+
+        The top-level dict itself is copied rather than shared, so it can
+        still be assigned to a single state; the given dict is not changed.
+
+        Args:
+            data: The state data
+
+        Returns:
+            A new dict with shared values
+        """
+        return {key: self.intern(value) for key, value in data.items()}
+
+    def release(self, value: Any) -> None:
+        """
+        Give back the reference taken by interning a value.
+
+        Args:
+            value: A value returned by intern()
+        """
+        if isinstance(value, SCALAR_TYPES):
+            return
+        digest = self._canonical_digest(value)
+        if digest is not None:
+            self._refs[digest] -= 1
+            if self._refs[digest] > 0:
+                return
+            del self._objects[digest], self._refs[digest], self._digests_by_id[id(value)]
+        if isinstance(value, dict):
+            for child in value.values():
+                self.release(child)
+        elif isinstance(value, (list, tuple)):
+            for child in value:
+                self.release(child)
+
+    def release_data(self, data: Dict[str, Any]) -> None:
+        """
+        Give back the references taken by intern_data().
+
+        Args:
+            data: A dict returned by intern_data()
+        """
+        for value in data.values():
+            self.release(value)
+
+    def digest(self, value: Any) -> Optional[str]:
+        """
+        Compute the content hash of a value, without interning it.
+
+        Args:
+            value: A JSON-like value
+
+        Returns:
+            The hex digest, or None for scalars and values containing non-JSON objects
+        """
+        if isinstance(value, SCALAR_TYPES):
+            return None
+        known = self._canonical_digest(value)
+        if known is not None:
+            return known
+        if isinstance(value, dict):
+            parts = {}
+            for key, child in value.items():
+                parts[key] = self._part(child, self.digest(child))
+                if parts[key] is _OPAQUE or not isinstance(key, str):
+                    return None
+            return _hash(_canonical_json({"d": parts}))
+        if isinstance(value, (list, tuple)):
+            parts = [self._part(child, self.digest(child)) for child in value]
+            if any(part is _OPAQUE for part in parts):
+                return None
+            return _hash(_canonical_json({"l": parts}))
+        return None
+
+    def encode(self, value: Any, blobs: Dict[str, str],
+               is_stored: Optional[Callable[[str], bool]] = None) -> Any:
+        """
+        Encode a value into its content-addressed form.
+
+        Containers are replaced by ``{"$ref": digest}`` and their serialized
+        blobs are added to ``blobs``; scalars are kept inline. Non-JSON
+        leaves are stored as their string representation.
+
+        Args:
+            value: The value to encode
+            blobs: Dict that collects digest -> serialized blob
+            is_stored: Optional check for blobs that are already stored; interned
+                sub-objects whose blob is stored are referenced without re-encoding
+
+        Returns:
+            The encoded value
+        """
+        if isinstance(value, SCALAR_TYPES):
+            return value
+
+        known = self._canonical_digest(value)
+        if known is not None and is_stored is not None and is_stored(known):
+            return {REF_KEY: known}
+
+        if isinstance(value, dict):
+            body = {"d": {str(key): self.encode(child, blobs, is_stored) for key, child in value.items()}}
+        elif isinstance(value, (list, tuple)):
+            body = {"l": [self.encode(child, blobs, is_stored) for child in value]}
+        else:
+            return str(value)
+
+        blob = _canonical_json(body)
+        digest = _hash(blob)
+        blobs[digest] = blob
+        return {REF_KEY: digest}
+
+    def decode(self, encoded: Any, load_blob: Callable[[str], str], frozen: bool = True) -> Any:
+        """
+        Decode a value produced by encode().
+
+        Frozen containers already held by the store are reused, so values
+        loaded from disk share memory with them. No reference is taken:
+        intern the decoded value to keep it in the store.
+
+        Args:
+            encoded: The encoded value
+            load_blob: Function that returns the serialized blob for a digest
+            frozen: Whether to build immutable FrozenDicts and tuples rather
+                than plain dicts and lists
+
+        Returns:
+            The decoded value
+        """
+        if not isinstance(encoded, dict):
+            return encoded
+
+        digest = encoded[REF_KEY]
+        existing = self._objects.get(digest) if frozen else None
+        if existing is not None:
+            return existing
+
+        body = json.loads(load_blob(digest))
+        if "d" in body:
+            children = ((key, self.decode(child, load_blob, frozen)) for key, child in body["d"].items())
+            return FrozenDict(children) if frozen else dict(children)
+        children = (self.decode(child, load_blob, frozen) for child in body["l"])
+        return tuple(children) if frozen else list(children)
+
+    def clear(self) -> None:
+        """Remove all shared objects from the store."""
+        self._objects.clear()
+        self._refs.clear()
+        self._digests_by_id.clear()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _canonical_digest(self, value: Any) -> Optional[str]:
+        """Get the digest of a value if it is a canonical object held by the store."""
+        digest = self._digests_by_id.get(id(value))
+        if digest is not None and self._objects.get(digest) is value:
+            return digest
+        return None
+
+    def _intern(self, value: Any) -> Tuple[Any, Optional[str]]:
+        """
+        Intern a value, taking one reference on it for the caller.
+
+        Returns (canonical value, digest); scalars and values containing
+        non-JSON objects have no digest. The references taken on the
+        children of a new container are held by that container.
+        """
+        if isinstance(value, SCALAR_TYPES):
+            return value, None
+
+        known = self._canonical_digest(value)
+        if known is not None:
+            self._refs[known] += 1
+            return value, known
+
+        # Parts mirror the body that encode() writes, so both produce the same digest
+        shareable = True
+        if isinstance(value, dict):
+            children = {}
+            parts = {}
+            for key, child in value.items():
+                children[key], digest = self._intern(child)
+                parts[key] = self._part(children[key], digest)
+                shareable = shareable and parts[key] is not _OPAQUE and isinstance(key, str)
+            frozen = FrozenDict(children)
+            body = {"d": parts}
+        elif isinstance(value, (list, tuple)):
+            interned = [self._intern(child) for child in value]
+            frozen = tuple(child for child, _ in interned)
+            parts = [self._part(child, digest) for child, digest in interned]
+            shareable = all(part is not _OPAQUE for part in parts)
+            body = {"l": parts}
+        else:
+            # Opaque objects cannot be content-addressed or shared
+            return value, None
+
+        if not shareable:
+            # Held by the caller alone, together with the references on its children
+            return frozen, None
+
+        digest = _hash(_canonical_json(body))
+        existing = self._objects.get(digest)
+        if existing is not None:
+            # The existing copy already holds its children
+            self.release(frozen)
+            self._refs[digest] += 1
+            return existing, digest
+
+        self._objects[digest] = frozen
+        self._refs[digest] = 1
+        self._digests_by_id[id(frozen)] = digest
+        return frozen, digest
+
+    @staticmethod
+    def _part(child: Any, digest: Optional[str]) -> Any:
+        """Get the encoded part of a container element given its digest."""
+        if isinstance(child, SCALAR_TYPES):
+            return child
+        return {REF_KEY: digest} if digest is not None else _OPAQUE
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+def _hash(blob: str) -> str:
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
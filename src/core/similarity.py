@@ -0,0 +1,361 @@
+"""
+Text similarity for Agentic IR.
+
+This module implements the word-set similarity used to compare information
+states. Token sets, pairwise Jaccard scores and MinHash signatures are
+memoized by text, so repeated comparisons of the same states (the agent's
+target check and the reward model score the same pair every step) are
+dictionary lookups rather than fresh tokenizations. For scoring one state
+against many, SimilarityEngine keeps a sparse term-count matrix of all
+states and computes Jaccard or cosine similarities in one vectorized pass.
+"""
+
+import zlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Number of permutations in a MinHash signature; the standard error of the
+# Jaccard estimate is about 1 / sqrt(num_perm)
+DEFAULT_NUM_PERM = 128
+
+# Largest prime below 2**32, so (a * x + b) mod p never overflows uint64
+_MERSENNE_PRIME = np.uint64(4294967291)
+
+# Signature value of an empty token set
+_EMPTY = np.iinfo(np.uint64).max
+
+_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def tokenize(text: str) -> FrozenSet[str]:
+    """
+    Split a text into its set of lowercase words.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        The set of words
+    """
+    return frozenset(text.lower().split())
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def jaccard(text_a: str, text_b: str) -> float:
+    """
+    Compute the Jaccard similarity of the word sets of two texts.
+
+    Args:
+        text_a: The first text
+        text_b: The second text
+
+    Returns:
+        A value between 0 and 1 (0 if either text has no words)
+    """
+    tokens_a = tokenize(text_a)
+    tokens_b = tokenize(text_b)
+    if not tokens_a or not tokens_b:
+        return 0.0
+    overlap = len(tokens_a & tokens_b)
+    return overlap / (len(tokens_a) + len(tokens_b) - overlap)
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int):
+    """Return the (a, b) coefficients of the MinHash hash functions."""
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def minhash_signature(text: str, num_perm: int = DEFAULT_NUM_PERM) -> np.ndarray:
+    """
+    Compute the MinHash signature of the word set of a text.
+
+    Args:
+        text: The text
+        num_perm: Number of hash functions in the signature
+
+    Returns:
+        A read-only array of num_perm uint64 values
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        signature = np.full(num_perm, _EMPTY, dtype=np.uint64)
+    else:
+        a, b = _permutations(num_perm)
+        hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens),
+                             dtype=np.uint64, count=len(tokens))
+        hashes %= _MERSENNE_PRIME
+        signature = ((np.outer(hashes, a) + b) % _MERSENNE_PRIME).min(axis=0)
+    # Signatures are shared through the cache
+    signature.flags.writeable = False
+    return signature
+
+def estimate_jaccard(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two word sets from their MinHash signatures.
+
+    Args:
+        signature_a: The first signature
+        signature_b: The second signature
+
+    Returns:
+        A value between 0 and 1 (0 if either set is empty)
+    """
+    if signature_a[0] == _EMPTY or signature_b[0] == _EMPTY:
+        return 0.0
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+def estimate_jaccard_many(target: np.ndarray, signatures: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Estimate the Jaccard similarity of one signature against many.
+
+    Args:
+        target: The target signature
+        signatures: The signatures to score
+
+    Returns:
+        An array of estimates, one per signature
+    """
+    if not len(signatures):
+        return np.zeros(0)
+    matrix = np.vstack(signatures)
+    scores = (matrix == target).mean(axis=1)
+    if target[0] == _EMPTY:
+        scores[:] = 0.0
+    else:
+        scores[matrix[:, 0] == _EMPTY] = 0.0
+    return scores
+
+class SimilarityEngine:
+    """
+    Sparse term-count matrix of state texts for batch similarity queries.
+
+    The matrix is stored column-wise: each vocabulary term keeps growable
+    arrays of the rows that contain it and their counts, so appending a
+    state only extends the columns of its own terms. A query gathers the
+    columns of its terms and accumulates per-row overlaps (Jaccard) or dot
+    products (cosine) with ``np.bincount``, touching only rows that share a
+    term with the query. Similarities use the same word sets as
+    InformationState.compare. Removed rows are compacted away, together
+    with their column entries, once they outnumber the live ones.
+    """
+
+    METRICS = ("jaccard", "cosine")
+
+    # Removed rows tolerated before compaction, at least
+    COMPACT_MIN_ROWS = 64
+
+    def __init__(self, initial_capacity: int = 256):
+        """
+        Initialize the similarity engine.
+
+        Args:
+            initial_capacity: Number of rows to preallocate
+        """
+        self._capacity = max(1, initial_capacity)
+        self._vocabulary: Dict[str, int] = {}
+        self._column_rows: List[array] = []
+        self._column_counts: List[array] = []
+        self._row_sizes = np.zeros(self._capacity, dtype=np.int64)
+        self._row_norms = np.zeros(self._capacity, dtype=np.float64)
+        self._active = np.zeros(self._capacity, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+
+    def add(self, state_id: str, text: str) -> None:
+        """
+        Append a state's row, replacing any previous row for the state.
+
+        Args:
+            state_id: The ID of the state
+            text: The text of the state
+        """
+        self.remove(state_id)
+
+        row = len(self._ids)
+        if row >= self._capacity:
+            self._grow()
+        counts = Counter(text.lower().split())
+        for term, count in counts.items():
+            column = self._vocabulary.get(term)
+            if column is None:
+                column = self._vocabulary[term] = len(self._column_rows)
+                self._column_rows.append(array("l"))
+                self._column_counts.append(array("d"))
+            self._column_rows[column].append(row)
+            self._column_counts[column].append(count)
+
+        self._ids.append(state_id)
+        self._rows[state_id] = row
+        self._row_sizes[row] = len(counts)
+        self._row_norms[row] = np.sqrt(sum(count * count for count in counts.values()))
+        self._active[row] = True
+
+    def remove(self, state_id: str) -> None:
+        """
+        Remove a state from the engine.
+
+        Its row is left in place as a tombstone and scores 0 in queries
+        until the rows are compacted.
+
+        Args:
+            state_id: The ID of the state to remove
+        """
+        row = self._rows.pop(state_id, None)
+        if row is not None:
+            self._ids[row] = None
+            self._active[row] = False
+            self._row_sizes[row] = 0
+            self._row_norms[row] = 0.0
+            removed = len(self._ids) - len(self._rows)
+            if removed > max(self.COMPACT_MIN_ROWS, len(self._rows)):
+                self._compact()
+
+    def similarities(self, text: str, metric: str = "jaccard") -> np.ndarray:
+        """
+        Score a text against every row.
+
+        Args:
+            text: The query text
+            metric: "jaccard" for word-set Jaccard similarity, or "cosine" for
+                the cosine similarity of the term-count vectors
+
+        Returns:
+            An array of similarities indexed by row (0 for removed states)
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown similarity metric '{metric}', expected one of {self.METRICS}")
+
+        n = len(self._ids)
+        query = Counter(text.lower().split())
+        rows, weights = self._gather(query, weighted=metric == "cosine")
+        if n == 0 or not query:
+            return np.zeros(n)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if metric == "jaccard":
+                overlap = np.bincount(rows, minlength=n).astype(np.float64)
+                scores = overlap / (len(query) + self._row_sizes[:n] - overlap)
+            else:
+                dots = np.bincount(rows, weights=weights, minlength=n)
+                query_norm = np.sqrt(sum(count * count for count in query.values()))
+                scores = dots / (self._row_norms[:n] * query_norm)
+        scores[~self._active[:n]] = 0.0
+        return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def score(self, text: str, state_ids: Iterable[str], metric: str = "jaccard") -> List[float]:
+        """
+        Score a text against the given states.
+
+        Args:
+            text: The query text
+            state_ids: IDs of the states to score
+            metric: "jaccard" or "cosine"
+
+        Returns:
+            The similarity of each state, in order (0 for states not in the engine)
+        """
+        scores = self.similarities(text, metric)
+        return [float(scores[self._rows[state_id]]) if state_id in self._rows else 0.0
+                for state_id in state_ids]
+
+    def top_k(self, text: str, k: int, metric: str = "jaccard", exclude: Optional[str] = None,
+              min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Find the states most similar to a text.
+
+        Args:
+            text: The query text
+            k: Maximum number of results to return
+            metric: "jaccard" or "cosine"
+            exclude: Optional state ID to leave out of the results
+            min_score: Results must score strictly above this similarity
+
+        Returns:
+            A list of (state_id, similarity) tuples, most similar first
+        """
+        scores = self.similarities(text, metric)
+        if exclude is not None and exclude in self._rows:
+            scores[self._rows[exclude]] = 0.0
+        candidates = np.flatnonzero(scores > min_score)
+        if k <= 0 or len(candidates) == 0:
+            return []
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        # Stable sort keeps earlier rows first among equal scores
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._ids[row], float(scores[row])) for row in candidates]
+
+    def clear(self) -> None:
+        """Remove all states and terms from the engine."""
+        self._vocabulary.clear()
+        self._column_rows.clear()
+        self._column_counts.clear()
+        self._row_sizes[:] = 0
+        self._row_norms[:] = 0.0
+        self._active[:] = False
+        self._rows.clear()
+        self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _gather(self, query: Counter, weighted: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Collect the rows (and query-weighted counts) of the query terms' columns."""
+        rows = []
+        weights = []
+        for term, count in query.items():
+            column = self._vocabulary.get(term)
+            if column is None:
+                continue
+            # Copy out of the growable arrays so no buffer export outlives this call
+            rows.append(np.array(self._column_rows[column], dtype=np.int64))
+            if weighted:
+                weights.append(np.array(self._column_counts[column], dtype=np.float64) * count)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0) if weighted else None
+        return np.concatenate(rows), np.concatenate(weights) if weighted else None
+
+    def _compact(self) -> None:
+        """Drop removed rows and their column entries, keeping the live rows in order."""
+        n = len(self._ids)
+        live = np.flatnonzero(self._active[:n])
+        new_rows = np.full(n, -1, dtype=np.int64)
+        new_rows[live] = np.arange(live.size)
+
+        vocabulary: Dict[str, int] = {}
+        column_rows: List[array] = []
+        column_counts: List[array] = []
+        for term, column in self._vocabulary.items():
+            rows = new_rows[np.array(self._column_rows[column], dtype=np.int64)]
+            keep = rows >= 0
+            if not keep.any():
+                # Terms of removed states only
+                continue
+            vocabulary[term] = len(column_rows)
+            column_rows.append(array("l", rows[keep].tolist()))
+            column_counts.append(array("d", np.array(self._column_counts[column])[keep].tolist()))
+        self._vocabulary = vocabulary
+        self._column_rows = column_rows
+        self._column_counts = column_counts
+
+        for name in ("_row_sizes", "_row_norms", "_active"):
+            values = getattr(self, name)
+            values[:live.size] = values[live]
+            values[live.size:] = 0
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {state_id: row for row, state_id in enumerate(self._ids)}
+
+    def _grow(self) -> None:
+        """Double the row capacity."""
+        self._capacity *= 2
+        for name in ("_row_sizes", "_row_norms", "_active"):
+            old = getattr(self, name)
+            grown = np.zeros(self._capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
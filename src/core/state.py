@@ -5,8 +5,12 @@ This module defines the information state, which is a key concept in Agentic IR.
 An information state represents the current state of information for the agent and user.
 """
 
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, FrozenSet, Sequence
 from pydantic import BaseModel, Field
+import numpy as np
+
+from .similarity import (DEFAULT_NUM_PERM, tokenize, jaccard, minhash_signature,
+                         estimate_jaccard, estimate_jaccard_many)
 
 class InformationState(BaseModel):
     """
@@ -46,13 +50,39 @@ class InformationState(BaseModel):
         """
         return f"Current Information State: {self.text}\n\nAvailable Actions: {', '.join(self.available_actions)}"
     
-    def compare(self, target_state: "InformationState", similarity_fn: Optional[Callable] = None) -> float:
+    def tokens(self) -> FrozenSet[str]:
+        """
+        Get the set of lowercase words in the state text.
+
+        The set is cached by text, so repeated calls are dictionary lookups.
+
+        Returns:
+            The set of words
+        """
+        return tokenize(self.text)
+
+    def signature(self, num_perm: int = DEFAULT_NUM_PERM) -> np.ndarray:
+        """
+        Get the MinHash signature of the state's word set.
+
+        Args:
+            num_perm: Number of hash functions in the signature
+
+        Returns:
+            A read-only array of num_perm uint64 values
+        """
+        return minhash_signature(self.text, num_perm)
+
+    def compare(self, target_state: "InformationState", similarity_fn: Optional[Callable] = None,
+                approximate: bool = False) -> float:
         """
         Compare this state with a target state to compute similarity.
         
         Args:
             target_state: The target state to compare with
             similarity_fn: Optional custom similarity function
+            approximate: Whether to estimate the similarity from MinHash signatures
+                instead of computing it exactly
             
         Returns:
             float: A value between 0 and 1 indicating similarity (1 = identical)
@@ -60,18 +90,42 @@ class InformationState(BaseModel):
         if similarity_fn is not None:
             return similarity_fn(self, target_state)
         
-        # Default implementation: simple text similarity
+        # Default implementation: Jaccard similarity of the word sets
         # In a real implementation, you would use more sophisticated methods
-        common_words_self = set(self.text.lower().split())
-        common_words_target = set(target_state.text.lower().split())
-        
-        if not common_words_self or not common_words_target:
-            return 0.0
-            
-        overlap = len(common_words_self.intersection(common_words_target))
-        union = len(common_words_self.union(common_words_target))
-        
-        return overlap / union
+        if approximate:
+            return estimate_jaccard(self.signature(), target_state.signature())
+        return jaccard(self.text, target_state.text)
+
+def compare_many(target_state: InformationState, states: Sequence[InformationState],
+                 approximate: bool = False) -> List[float]:
+    """
+    Compare many states with a target state at once.
+
+    Args:
+        target_state: The target state to compare with
+        states: The states to score
+        approximate: Whether to estimate the similarities from MinHash signatures
+
+    Returns:
+        The similarity of each state to the target, in order
+    """
+    if approximate:
+        signatures = [state.signature() for state in states]
+        return estimate_jaccard_many(target_state.signature(), signatures).tolist()
+
+    target_tokens = target_state.tokens()
+    if not target_tokens:
+        return [0.0] * len(states)
+    target_size = len(target_tokens)
+    scores = []
+    for state in states:
+        tokens = state.tokens()
+        if not tokens:
+            scores.append(0.0)
+            continue
+        overlap = len(target_tokens & tokens)
+        scores.append(overlap / (target_size + len(tokens) - overlap))
+    return scores
 
 class StateTransition(BaseModel):
     """
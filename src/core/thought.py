@@ -12,6 +12,7 @@ import time
 import logging
 
 from .state import InformationState
+from ..llm.metrics import tag_caller
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -165,20 +166,27 @@ class ChainOfThoughtGenerator(ThoughtGenerator):
         self.max_thoughts = max_thoughts
         self.verbose = verbose
     
-    def generate_thoughts(self, state: InformationState, llm_fn: Optional[Callable[[str], str]] = None, **kwargs) -> List[Thought]:
+    def generate_thoughts(self, state: InformationState, llm_fn: Optional[Callable[[str], str]] = None,
+                          session: Optional[Callable[[str], str]] = None, **kwargs) -> List[Thought]:
         """
         Generate a chain of thoughts based on the current state.
         
+        With a session (a function that continues one conversation, such as
+        an OllamaSession), only the first step sends the state; later steps
+        send just their instruction, since the state and the previous
+        thoughts are already part of the conversation.
+        
         Args:
             state: The current state
             llm_fn: Function to call the LLM (overrides the one set in __init__)
+            session: Optional session to generate the chain in (overrides llm_fn)
             **kwargs: Additional arguments for thought generation
             
         Returns:
             A list of generated thoughts forming a chain
         """
-        # Use the provided llm_fn or the one from initialization
-        fn = llm_fn or self.llm_fn
+        # Use the session, the provided llm_fn or the one from initialization
+        fn = session or llm_fn or self.llm_fn
         if fn is None:
             raise ValueError("No LLM function provided for thought generation")
         
@@ -188,13 +196,17 @@ class ChainOfThoughtGenerator(ThoughtGenerator):
         # Generate thoughts for each step
         for i, step in enumerate(self.thought_steps[:self.max_thoughts]):
             # Generate prompt for this step
-            prompt = self._generate_step_prompt(step, state, thoughts)
+            if session is not None and thoughts:
+                prompt = self._step_instruction(step)
+            else:
+                prompt = self._generate_step_prompt(step, state, thoughts)
             
             if self.verbose:
                 logger.info(f"Generating thought of type '{step}'")
             
-            # Get response from LLM
-            response = fn(prompt)
+            # Get response from LLM, attributing the call to the step in the metrics
+            with tag_caller(f"thought.{step}"):
+                response = fn(prompt)
             
             # Create thought
             thought = Thought(
@@ -238,15 +250,27 @@ class ChainOfThoughtGenerator(ThoughtGenerator):
                 prompt += f"[{thought.type}] {thought.text}\n\n"
         
         # Add specific instructions based on the step
+        prompt += self._step_instruction(step)
+            
+        return prompt
+    
+    def _step_instruction(self, step: str) -> str:
+        """
+        Get the instruction for a specific thought step.
+        
+        Args:
+            step: The type of thought step
+            
+        Returns:
+            The instruction
+        """
         if step == "analyze":
-            prompt += "Analyze the current situation. What is the information provided and what is the goal?"
+            return "Analyze the current situation. What is the information provided and what is the goal?"
         elif step == "plan":
-            prompt += "Based on the analysis, what plan can be formulated to reach the goal? What steps need to be taken?"
+            return "Based on the analysis, what plan can be formulated to reach the goal? What steps need to be taken?"
         elif step == "decide":
-            prompt += "Based on the analysis and plan, what action should be taken next? Provide a clear decision."
+            return "Based on the analysis and plan, what action should be taken next? Provide a clear decision."
         elif step == "reflect":
-            prompt += "Reflect on the current state and the process so far. What has been learned and what could be improved?"
+            return "Reflect on the current state and the process so far. What has been learned and what could be improved?"
         else:
-            prompt += f"Generate a thought of type '{step}' based on the current state and previous thoughts."
-            
-        return prompt 
\ No newline at end of file
+            return f"Generate a thought of type '{step}' based on the current state and previous thoughts." 
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Trajectory store for Agentic IR.
+
+This module implements a columnar store of state transitions for offline
+analysis. Transitions are held in a NumPy structured array that can be saved
+to disk and memory-mapped back, so aggregations over rewards and success
+rates run as vectorized operations instead of loops over StateTransition objects.
+"""
+
+import os
+import json
+import logging
+import contextlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .index import TransitionTable
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRANSITION_DTYPE = np.dtype([
+    ("source", np.int64),
+    ("target", np.int64),
+    ("action", np.int32),
+    ("reward", np.float64),
+    ("success", np.bool_),
+    ("timestamp", np.float64),
+])
+
+class TrajectoryStore:
+    """
+    Columnar store of state transitions.
+
+    Source and target states and actions are stored as integer codes into the
+    ``state_ids`` and ``action_names`` vocabularies.
+    """
+
+    COLUMNS_FILE = "transitions.npy"
+    VOCABULARY_FILE = "vocabulary.json"
+
+    def __init__(self, transitions: np.ndarray, state_ids: List[str], action_names: List[str]):
+        """
+        Initialize the trajectory store.
+
+        Args:
+            transitions: Structured array with the TRANSITION_DTYPE layout
+            state_ids: State ID for each state code
+            action_names: Action name for each action code
+        """
+        self.transitions = transitions
+        self.state_ids = state_ids
+        self.action_names = action_names
+
+    @classmethod
+    def from_table(cls, table: TransitionTable) -> "TrajectoryStore":
+        """
+        Export the transitions of a transition table.
+
+        Args:
+            table: The transition table to export
+
+        Returns:
+            A trajectory store holding a copy of the table's live rows
+        """
+        # Slice the columns (a copy) rather than exporting the table's own
+        # buffers: an append while one is exported raises BufferError. The
+        # live flag is appended last, so every column has at least n rows.
+        n = len(table.live)
+        transitions = np.empty(n, dtype=TRANSITION_DTYPE)
+        transitions["source"] = np.frombuffer(table.sources[:n], dtype=np.dtype(f"i{table.sources.itemsize}"))
+        transitions["target"] = np.frombuffer(table.targets[:n], dtype=np.dtype(f"i{table.targets.itemsize}"))
+        transitions["action"] = np.frombuffer(table.actions[:n], dtype=np.dtype(f"i{table.actions.itemsize}"))
+        transitions["reward"] = np.frombuffer(table.rewards[:n], dtype=np.float64)
+        transitions["success"] = np.frombuffer(table.successes[:n], dtype=np.int8)
+        transitions["timestamp"] = np.frombuffer(table.timestamps[:n], dtype=np.float64)
+        live = np.frombuffer(table.live[:n], dtype=np.int8).astype(bool)
+        if not live.all():
+            transitions = transitions[live]
+        return cls(transitions, list(table.state_ids), list(table.action_names))
+
+    @classmethod
+    def from_memory(cls, memory) -> "TrajectoryStore":
+        """
+        Export the transitions of a memory.
+
+        The export holds the read lock of a ConcurrentMemory, so it is a
+        consistent snapshot while other threads keep adding transitions.
+
+        Args:
+            memory: An InMemoryStorage, ConcurrentMemory or PersistentMemory
+
+        Returns:
+            A trajectory store with all transitions in the memory
+        """
+        in_memory = getattr(memory, "in_memory", memory)
+        lock = getattr(in_memory, "lock", None)
+        with lock.read() if lock is not None else contextlib.nullcontext():
+            return cls.from_table(in_memory.transition_table)
+
+    def save(self, path: str) -> None:
+        """
+        Save the store to a directory.
+
+        Args:
+            path: Path to the directory (created if needed)
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, self.COLUMNS_FILE), self.transitions)
+        with open(os.path.join(path, self.VOCABULARY_FILE), "w", encoding="utf-8") as f:
+            json.dump({"state_ids": self.state_ids, "action_names": self.action_names}, f)
+        logger.info(f"Saved {len(self)} transitions to {path}")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TrajectoryStore":
+        """
+        Load a store saved with save().
+
+        Args:
+            path: Path to the directory
+            mmap: Whether to memory-map the columns instead of reading them into memory
+
+        Returns:
+            The loaded trajectory store
+        """
+        transitions = np.load(os.path.join(path, cls.COLUMNS_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(path, cls.VOCABULARY_FILE), "r", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        return cls(transitions, vocabulary["state_ids"], vocabulary["action_names"])
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    def mean_reward_per_action(self) -> Dict[str, float]:
+        """
+        Compute the mean reward of each action.
+
+        Returns:
+            A dictionary mapping action names to mean rewards
+        """
+        return self._mean_per_action(self.transitions["reward"])
+
+    def success_rate_per_action(self) -> Dict[str, float]:
+        """
+        Compute the success rate of each action.
+
+        Returns:
+            A dictionary mapping action names to success rates
+        """
+        return self._mean_per_action(self.transitions["success"])
+
+    def mean_reward_over_time(self, bucket_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the mean reward in consecutive time buckets.
+
+        Args:
+            bucket_seconds: Width of each time bucket in seconds
+
+        Returns:
+            A tuple of (bucket start timestamps, mean reward per bucket); empty
+            buckets are omitted
+        """
+        return self._mean_over_time(self.transitions["reward"], bucket_seconds)
+
+    def success_rate_over_time(self, bucket_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the success rate in consecutive time buckets.
+
+        Args:
+            bucket_seconds: Width of each time bucket in seconds
+
+        Returns:
+            A tuple of (bucket start timestamps, success rate per bucket); empty
+            buckets are omitted
+        """
+        return self._mean_over_time(self.transitions["success"], bucket_seconds)
+
+    def filter(self, action: Optional[str] = None, start: Optional[float] = None,
+               end: Optional[float] = None) -> "TrajectoryStore":
+        """
+        Select the transitions matching an action and/or time range.
+
+        Args:
+            action: Only keep transitions with this action name
+            start: Only keep transitions at or after this timestamp
+            end: Only keep transitions before this timestamp
+
+        Returns:
+            A trajectory store with the selected transitions
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if action is not None:
+            code = self.action_names.index(action) if action in self.action_names else -1
+            mask &= self.transitions["action"] == code
+        if start is not None:
+            mask &= self.transitions["timestamp"] >= start
+        if end is not None:
+            mask &= self.transitions["timestamp"] < end
+        return TrajectoryStore(self.transitions[mask], self.state_ids, self.action_names)
+
+    def _mean_per_action(self, values: np.ndarray) -> Dict[str, float]:
+        actions = self.transitions["action"]
+        counts = np.bincount(actions, minlength=len(self.action_names))
+        totals = np.bincount(actions, weights=values, minlength=len(self.action_names))
+        return {
+            name: float(totals[code] / counts[code])
+            for code, name in enumerate(self.action_names)
+            if counts[code]
+        }
+
+    def _mean_over_time(self, values: np.ndarray, bucket_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        if len(self) == 0:
+            return np.empty(0), np.empty(0)
+
+        timestamps = self.transitions["timestamp"]
+        origin = timestamps.min()
+        buckets = ((timestamps - origin) // bucket_seconds).astype(np.int64)
+        counts = np.bincount(buckets)
+        totals = np.bincount(buckets, weights=values)
+        present = np.flatnonzero(counts)
+        return origin + present * bucket_seconds, totals[present] / counts[present]
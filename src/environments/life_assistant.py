@@ -4,7 +4,6 @@ Life Assistant environment for Agentic IR.
 This module implements an environment for a life assistant application.
 """
 
-import uuid
 import time
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -13,6 +12,7 @@ import datetime
 from src.core.agent import Environment
 from src.core.policy import Action
 from src.core.state import InformationState
+from src.core.records import new_state
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -63,8 +63,7 @@ class LifeAssistantEnvironment(Environment):
         # Create a starting state with a user query
         query = self._get_random_query()
         
-        state = InformationState(
-            id=str(uuid.uuid4()),
+        state = new_state(
             text=query,
             available_actions=self.available_actions,
             timestamp=time.time(),
@@ -114,8 +113,7 @@ class LifeAssistantEnvironment(Environment):
             next_state, reward, done, info = self._handle_ask_clarification(action)
         else:
             # Unknown action
-            next_state = InformationState(
-                id=str(uuid.uuid4()),
+            next_state = new_state(
                 text=f"I don't know how to {action.name}. Can you please try a different action?",
                 parent_id=self.current_state.id,
                 available_actions=self.available_actions,
@@ -348,8 +346,7 @@ class LifeAssistantEnvironment(Environment):
         response += "2. There are several resources available that provide more details.\n"
         response += "3. You might want to check out some related information as well."
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -392,8 +389,7 @@ class LifeAssistantEnvironment(Environment):
         for day in forecast:
             response += f"- {day['day']}: {day['description']}, High {day['high']}°F, Low {day['low']}°F\n"
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -450,8 +446,7 @@ class LifeAssistantEnvironment(Environment):
         else:
             response = f"You have no events scheduled for {date.strftime('%A, %B %d')}."
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -497,8 +492,7 @@ class LifeAssistantEnvironment(Environment):
             done = True
             reward = 0.8  # Good reward for setting a reminder
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -560,8 +554,7 @@ class LifeAssistantEnvironment(Environment):
         else:
             response = "I couldn't find any restaurants matching your criteria."
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -635,8 +628,7 @@ class LifeAssistantEnvironment(Environment):
             done = True
             reward = 0.9  # Excellent reward for a complete trip plan
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -686,8 +678,7 @@ class LifeAssistantEnvironment(Environment):
             done = True
             reward = 0.6  # Good reward for sending a message
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=response,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
@@ -722,8 +713,7 @@ class LifeAssistantEnvironment(Environment):
         """
         question = action.parameters.get("question", "Can you please clarify what you're looking for?")
         
-        next_state = InformationState(
-            id=str(uuid.uuid4()),
+        next_state = new_state(
             text=question,
             parent_id=self.current_state.id,
             available_actions=self.available_actions,
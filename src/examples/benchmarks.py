@@ -0,0 +1,886 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Agentic IR framework.
+
+This script measures the performance of framework components in isolation,
+without a running LLM. Run a single benchmark by name, e.g.:
+
+    python -m src.examples.benchmarks codec --count 20000
+"""
+
+import gc
+import asyncio
+import time
+import threading
+import uuid
+import os
+import tempfile
+import argparse
+import logging
+import requests
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from src.core.state import InformationState, StateTransition
+from src.core.thought import Thought, ChainOfThoughtGenerator, ThoughtManager
+from src.core.reward import RewardEvent
+from src.core.codec import BinaryCodec
+from src.core.records import new_state, new_transition
+from src.core.similarity import SimilarityEngine
+from src.core.state import compare_many
+from src.core.memory import ConcurrentMemory
+from src.core.policy import LLMPolicy, RandomPolicy
+from src.core.reward import LLMRewardModel
+from src.llm.ollama import OllamaClient, REWARD_STOP_LABELS
+from src.llm.async_ollama import AsyncOllamaClient
+from src.llm.cache import EmbeddingCache, ResponseCache
+from src.llm.reliability import RetryPolicy, CircuitBreaker
+from src.llm.metrics import MetricsRegistry
+from src.llm.fake_server import FakeOllamaServer, RuleBasedResponder, lognormal
+from src.environments.life_assistant import LifeAssistantEnvironment
+
+# Set up logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def _time(fn: Callable[[], object], repeat: int = 3) -> float:
+    """
+    Time a function, returning the best of several runs.
+
+    Like timeit, garbage collection is disabled while timing.
+
+    Args:
+        fn: The function to time
+        repeat: Number of runs
+
+    Returns:
+        The fastest run time in seconds
+    """
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+def _metric(value: Optional[float], width: int) -> str:
+    """Format a metric with no decimals, or "n/a" if it is unknown (None)."""
+    return f"{value:>{width}.0f}" if value is not None else f"{'n/a':>{width}}"
+
+def _sample_records(count: int) -> List[object]:
+    """
+    Build a mix of realistic records for serialization benchmarks.
+
+    Args:
+        count: Number of records of each type
+
+    Returns:
+        A list of states, transitions, thoughts and reward events
+    """
+    env = LifeAssistantEnvironment()
+    profile = env.user_profile
+    records = []
+    parent_id = None
+    for i in range(count):
+        state = InformationState(
+            id=str(uuid.uuid4()),
+            text=f"The weather in San Francisco is sunny with a high of {60 + i % 20}F. "
+                 "You have a team meeting at 10:00 in Conference Room A.",
+            parent_id=parent_id,
+            available_actions=env.available_actions,
+            timestamp=time.time(),
+            data={
+                "user_profile": profile,
+                "context": {"weather": env.weather, "last_search": f"query {i}"},
+                "query_type": "weather"
+            }
+        )
+        records.append(state)
+        records.append(StateTransition(
+            source_state_id=parent_id or state.id,
+            target_state_id=state.id,
+            action="check_weather",
+            action_params={"location": "San Francisco, CA"},
+            success=True,
+            reward=0.8,
+            timestamp=time.time()
+        ))
+        records.append(Thought(
+            text="The user wants to know about the weather before their meeting.",
+            type="analyze",
+            state_id=state.id
+        ))
+        records.append(RewardEvent(
+            state_id=state.id,
+            value=0.63,
+            components={"target_similarity": 0.7, "step_cost": -0.05, "time_cost": -0.02}
+        ))
+        parent_id = state.id
+    return records
+
+def benchmark_codec(count: int) -> Dict[str, float]:
+    """
+    Compare the binary codec with pydantic JSON serialization.
+
+    Args:
+        count: Number of records of each type
+
+    Returns:
+        A dictionary of measurements
+    """
+    records = _sample_records(count)
+    codec = BinaryCodec()
+
+    json_encoded = [record.model_dump_json().encode("utf-8") for record in records]
+    binary_encoded = [codec.encode(record) for record in records]
+    model_types = [type(record) for record in records]
+
+    results = {
+        "records": len(records),
+        "json_encode_s": _time(lambda: [record.model_dump_json() for record in records]),
+        "binary_encode_s": _time(lambda: [codec.encode(record) for record in records]),
+        "json_decode_s": _time(lambda: [t.model_validate_json(b) for t, b in zip(model_types, json_encoded)]),
+        "binary_decode_s": _time(lambda: [codec.decode(b) for b in binary_encoded]),
+        "json_bytes": sum(len(b) for b in json_encoded),
+        "binary_bytes": sum(len(b) for b in binary_encoded),
+    }
+
+    print(f"Serialized {results['records']} records")
+    for name in ("json", "binary"):
+        print(f"  {name:<7} encode {results['records'] / results[name + '_encode_s']:>12,.0f} rec/s   "
+              f"decode {results['records'] / results[name + '_decode_s']:>12,.0f} rec/s   "
+              f"size {results[name + '_bytes']:>12,} bytes")
+    return results
+
+def _allocated(fn: Callable[[], object]) -> int:
+    """
+    Measure the memory allocated by a function and still held by its result.
+
+    Args:
+        fn: The function to measure
+
+    Returns:
+        The allocated size in bytes
+    """
+    tracemalloc.start()
+    try:
+        result = fn()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+def benchmark_records(count: int) -> Dict[str, float]:
+    """
+    Compare validated model construction with the records fast path.
+
+    Each step builds one state and one transition, as Agent.act does.
+
+    Args:
+        count: Number of steps
+
+    Returns:
+        A dictionary of measurements
+    """
+    actions = LifeAssistantEnvironment().available_actions
+
+    def validated():
+        steps = []
+        for i in range(count):
+            state = InformationState(id=str(uuid.uuid4()), text=f"After step {i}",
+                                     available_actions=actions, timestamp=time.time())
+            steps.append((state, StateTransition(source_state_id=state.id, target_state_id=state.id,
+                                                 action="check_weather", success=True, reward=0.5,
+                                                 timestamp=time.time())))
+        return steps
+
+    def fast():
+        steps = []
+        for i in range(count):
+            state = new_state(f"After step {i}", available_actions=actions)
+            steps.append((state, new_transition(state.id, state.id, "check_weather", reward=0.5)))
+        return steps
+
+    results = {
+        "steps": count,
+        "validated_s": _time(validated),
+        "fast_s": _time(fast),
+        "validated_bytes": _allocated(validated),
+        "fast_bytes": _allocated(fast),
+    }
+
+    print(f"Built {count} states and transitions")
+    for name in ("validated", "fast"):
+        print(f"  {name:<9} {count / results[name + '_s']:>12,.0f} steps/s   "
+              f"{results[name + '_bytes'] / count:>8,.0f} bytes/step")
+    return results
+
+def benchmark_similarity(count: int) -> Dict[str, float]:
+    """
+    Compare ways of scoring one state against many.
+
+    Args:
+        count: Number of stored states
+
+    Returns:
+        A dictionary of measurements
+    """
+    states = [record for record in _sample_records(count) if isinstance(record, InformationState)]
+    for i, state in enumerate(states):
+        # Vary the texts so the states have different similarities
+        state.text = f"{state.text} Step {i} of {i % 97} with {i % 13} results."
+    query = states[len(states) // 2]
+    engine = SimilarityEngine()
+    for state in states:
+        engine.add(state.id, state.text)
+
+    def fresh_loop():
+        # Baseline: rebuild both word sets for every pair
+        target = set(query.text.lower().split())
+        return [len(target & words) / len(target | words)
+                for words in (set(state.text.lower().split()) for state in states)]
+
+    results = {
+        "states": len(states),
+        "loop_s": _time(fresh_loop),
+        "compare_many_s": _time(lambda: compare_many(query, states)),
+        "engine_s": _time(lambda: engine.similarities(query.text)),
+    }
+
+    print(f"Scored one state against {len(states)} states")
+    for name in ("loop", "compare_many", "engine"):
+        print(f"  {name:<13} {results[name + '_s'] * 1e3:>10.2f} ms")
+    return results
+
+def benchmark_concurrency(count: int, writers: int = 8, readers: int = 8) -> Dict[str, float]:
+    """
+    Stress concurrent memory with writer and reader threads, then check its indexes.
+
+    Each writer records one session as a chain of states and transitions,
+    while readers search, walk histories and retrieve experiences.
+
+    Args:
+        count: Number of states per writer
+        writers: Number of writer threads
+        readers: Number of reader threads
+
+    Returns:
+        A dictionary of measurements
+    """
+    memory = ConcurrentMemory()
+    errors: List[BaseException] = []
+    done = threading.Event()
+    chains: Dict[int, List[str]] = {}
+    reads = [0] * readers
+
+    def write(session: int):
+        try:
+            parent = None
+            chain = chains[session] = []
+            for i in range(count):
+                state = new_state(f"session {session} step {i} weather restaurant calendar",
+                                  parent_id=parent.id if parent else None,
+                                  metadata={"session_id": str(session)})
+                memory.add_state(state)
+                if parent is not None:
+                    memory.add_transition(new_transition(parent.id, state.id, "step", reward=0.1))
+                chain.append(state.id)
+                parent = state
+        except BaseException as e:
+            errors.append(e)
+
+    def read(reader: int):
+        try:
+            while not done.is_set():
+                chain = chains.get(reader % writers)
+                if chain:
+                    state_id = chain[-1]
+                    history = memory.get_state_history(state_id)
+                    if history and history[-1].id != state_id:
+                        raise AssertionError("History does not end with the requested state")
+                    memory.get_transitions_to(state_id)
+                    state = memory.get_state(state_id)
+                    memory.get_relevant_experiences(state)
+                memory.search_states("weather step")
+                reads[reader] += 1
+        except BaseException as e:
+            errors.append(e)
+
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    reader_threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    # Every session must be fully and consistently indexed
+    expected_states = writers * count
+    if len(memory.states) != expected_states or len(memory.transition_table) != writers * (count - 1):
+        raise AssertionError("Memory lost states or transitions")
+    for chain in chains.values():
+        if [state.id for state in memory.get_state_history(chain[-1])] != chain:
+            raise AssertionError("State history is inconsistent")
+        for source_id, target_id in zip(chain, chain[1:]):
+            if memory.get_transition(source_id, target_id) is None:
+                raise AssertionError("Transition is missing")
+
+    results = {
+        "writes_per_s": (expected_states + len(memory.transition_table)) / elapsed,
+        "reads_per_s": sum(reads) / elapsed,
+    }
+    print(f"{writers} writers x {count} states, {readers} readers: indexes consistent")
+    print(f"  writes {results['writes_per_s']:>12,.0f} ops/s   reads {results['reads_per_s']:>12,.0f} batches/s")
+    return results
+
+def benchmark_http(count: int) -> Dict[str, float]:
+    """
+    Measure the per-call overhead of the Ollama client against a local stand-in server.
+
+    Compares a new connection per call (module-level ``requests.post``)
+    with the client's pooled keep-alive session.
+
+    Args:
+        count: Number of calls
+
+    Returns:
+        A dictionary of measurements
+    """
+    server = FakeOllamaServer(responder="ok").start()
+    base_url = server.base_url
+    payload = {"model": "stand-in", "prompt": "Hello", "stream": False}
+
+    def unpooled():
+        for _ in range(count):
+            requests.post(f"{base_url}/api/generate", json=payload).json()
+
+    client = OllamaClient(base_url=base_url, model_name="stand-in")
+
+    def pooled():
+        for _ in range(count):
+            client.generate("Hello")
+
+    try:
+        results = {
+            "calls": count,
+            "unpooled_s": _time(unpooled),
+            "pooled_s": _time(pooled),
+        }
+    finally:
+        client.close()
+        server.stop()
+
+    print(f"{count} generate calls against a local stand-in server")
+    for name in ("unpooled", "pooled"):
+        print(f"  {name:<9} {results[name + '_s'] / count * 1e6:>10.0f} us/call")
+    return results
+
+def benchmark_async_llm(count: int, latency: float = 0.02, max_in_flight: int = 8) -> Dict[str, float]:
+    """
+    Compare sequential and concurrent LLM calls against a stand-in server with latency.
+
+    Args:
+        count: Number of calls
+        latency: Simulated inference time per call in seconds
+        max_in_flight: In-flight limit of the async client
+
+    Returns:
+        A dictionary of measurements
+    """
+    server = FakeOllamaServer(responder="ok", latency=latency).start()
+    base_url = server.base_url
+    client = OllamaClient(base_url=base_url, model_name="stand-in")
+    async_client = AsyncOllamaClient(max_in_flight=max_in_flight, base_url=base_url, model_name="stand-in")
+    peak_in_flight = 0
+
+    async def generate(i: int):
+        nonlocal peak_in_flight
+        response = await async_client.agenerate(f"Prompt {i}")
+        peak_in_flight = max(peak_in_flight, async_client.in_flight + 1)
+        return response
+
+    async def concurrent():
+        await asyncio.gather(*(generate(i) for i in range(count)))
+
+    try:
+        results = {
+            "calls": count,
+            "sequential_s": _time(lambda: [client.generate(f"Prompt {i}") for i in range(count)], repeat=1),
+            "concurrent_s": _time(lambda: asyncio.run(concurrent()), repeat=1),
+        }
+    finally:
+        client.close()
+        asyncio.run(async_client.aclose())
+        server.stop()
+
+    print(f"{count} generate calls, {latency * 1e3:.0f} ms simulated inference, "
+          f"max {max_in_flight} in flight (peak {peak_in_flight})")
+    for name in ("sequential", "concurrent"):
+        print(f"  {name:<11} {results[name + '_s']:>8.2f} s   {count / results[name + '_s']:>8.1f} calls/s")
+    return results
+
+def benchmark_streaming(count: int, token_delay: float = 0.002) -> Dict[str, float]:
+    """
+    Measure time-to-decision of policy and reward calls with and without early stop.
+
+    The stand-in server generates a policy decision (a JSON object followed by
+    a long explanation) or a reward evaluation (the scored lines followed by
+    commentary), spending token_delay seconds on each token.
+
+    Args:
+        count: Number of calls of each kind
+        token_delay: Simulated decoding time per token in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    explanation = " ".join(["This choice is justified because the query needs more evidence."] * 20)
+    replies = {
+        "policy": ('{"action": "search", "parameters": {"query": "flights {to} Paris"}, '
+                   '"reasoning": "Need options"}\n\n' + explanation),
+        "reward": ("Reward: 0.6\nReasoning: Closer to the target.\nComponents:\n"
+                   "- Similarity: 0.7\n- Progress: 0.5\n- Efficiency: 0.4\n\n" + explanation),
+    }
+    stop_options = {"policy": {"stop_on_json": True}, "reward": {"stop_labels": REWARD_STOP_LABELS}}
+
+    results = {"calls": count}
+    for kind, reply in replies.items():
+        server = FakeOllamaServer(responder=reply, token_delay=token_delay).start()
+        client = OllamaClient(base_url=server.base_url, model_name="stand-in")
+        full = client.create_completion_function()
+        early = client.create_completion_function(**stop_options[kind])
+        try:
+            # The early-stopped text must hold everything the parser reads
+            assert early("prompt") in full("prompt")
+            results[kind + "_full_s"] = _time(lambda: [full("prompt") for _ in range(count)], repeat=1)
+            results[kind + "_early_s"] = _time(lambda: [early("prompt") for _ in range(count)], repeat=1)
+        finally:
+            client.close()
+            server.stop()
+
+    print(f"{count} calls of each kind, {token_delay * 1e3:.1f} ms simulated decoding per token")
+    for kind in replies:
+        full_s, early_s = results[kind + "_full_s"], results[kind + "_early_s"]
+        print(f"  {kind:<7} full {full_s / count * 1e3:>8.1f} ms/call   "
+              f"early stop {early_s / count * 1e3:>8.1f} ms/call   ({full_s / early_s:.1f}x)")
+    return results
+
+def benchmark_cache(count: int, distinct: int = 50, latency: float = 0.005) -> Dict[str, float]:
+    """
+    Measure completion calls with recurring prompts, without and with the response cache.
+
+    Args:
+        count: Number of calls
+        distinct: Number of distinct prompts the calls cycle through
+        latency: Simulated inference time per call in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    server = FakeOllamaServer(responder="ok", latency=latency).start()
+    base_url = server.base_url
+    prompts = [f"Please explain paper {i % distinct}" for i in range(count)]
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "responses.sqlite")
+
+    def run(cache):
+        client = OllamaClient(base_url=base_url, model_name="stand-in", cache=cache)
+        completion_fn = client.create_completion_function(temperature=0.0)
+        try:
+            elapsed = _time(lambda: [completion_fn(prompt) for prompt in prompts], repeat=1)
+        finally:
+            client.close()
+        return elapsed, cache.stats() if cache is not None else {}
+
+    try:
+        uncached_s, _ = run(None)
+        cold_s, cold = run(ResponseCache(path=path))
+        # A new process: the memory tier is empty, the disk tier is warm
+        warm_s, warm = run(ResponseCache(path=path))
+    finally:
+        server.stop()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    results = {"calls": count, "uncached_s": uncached_s, "cold_s": cold_s, "warm_s": warm_s,
+               "cold_hit_rate": cold["hit_rate"], "warm_hit_rate": warm["hit_rate"]}
+    print(f"{count} calls over {distinct} distinct prompts, {latency * 1e3:.0f} ms simulated inference")
+    print(f"  {'uncached':<22} {uncached_s:>8.3f} s")
+    print(f"  {'cache, empty':<22} {cold_s:>8.3f} s   hit rate {cold['hit_rate']:.1%}")
+    print(f"  {'cache, warm disk tier':<22} {warm_s:>8.3f} s   hit rate {warm['hit_rate']:.1%} "
+          f"({warm['disk_hits']} from disk)")
+    return results
+
+def benchmark_embeddings(count: int, latency: float = 0.002, batch_size: int = 32) -> Dict[str, float]:
+    """
+    Compare one embedding call per text with batched, parallel calls and a warm embedding cache.
+
+    Args:
+        count: Number of texts
+        latency: Simulated inference time per request in seconds
+        batch_size: Number of texts per batched request
+
+    Returns:
+        A dictionary of measurements
+    """
+    server = FakeOllamaServer(responder="ok", latency=latency).start()
+    base_url = server.base_url
+    texts = [f"Chunk {i} of a research paper about information retrieval" for i in range(count)]
+    directory = tempfile.mkdtemp()
+
+    def run(embed):
+        cache = EmbeddingCache(directory, "stand-in")
+        client = OllamaClient(base_url=base_url, model_name="stand-in", embedding_cache=cache)
+        try:
+            return _time(lambda: embed(client), repeat=1), cache.stats()
+        finally:
+            client.close()
+            cache.close()
+
+    try:
+        client = OllamaClient(base_url=base_url, model_name="stand-in")
+        single_s = _time(lambda: [client.get_embeddings(text) for text in texts], repeat=1)
+        client.close()
+        batched_s, _ = run(lambda client: client.get_embeddings_many(texts, batch_size=batch_size))
+        # Re-indexing the same texts in a new process reads the memory-mapped cache
+        reindex_s, reindex = run(lambda client: client.get_embeddings_many(texts, batch_size=batch_size))
+    finally:
+        server.stop()
+        for root, _, files in os.walk(directory, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            os.rmdir(root)
+
+    results = {"texts": count, "single_s": single_s, "batched_s": batched_s, "reindex_s": reindex_s,
+               "reindex_hit_rate": reindex["hit_rate"]}
+    print(f"{count} texts, {latency * 1e3:.0f} ms simulated inference per request")
+    print(f"  {'one request per text':<28} {single_s:>8.3f} s")
+    print(f"  {f'batches of {batch_size}, 4 in parallel':<28} {batched_s:>8.3f} s")
+    print(f"  {'re-index from cache':<28} {reindex_s:>8.3f} s   hit rate {reindex['hit_rate']:.1%}")
+    return results
+
+def benchmark_singleflight(count: int, sessions: int = 16, distinct: int = 4,
+                           latency: float = 0.02) -> Dict[str, float]:
+    """
+    Measure concurrent sessions sending the same prompts, without and with request coalescing.
+
+    Args:
+        count: Total number of calls
+        sessions: Number of threads issuing calls
+        distinct: Number of distinct prompts
+        latency: Simulated inference time per call in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    server = FakeOllamaServer(responder="ok", latency=latency).start()
+    base_url = server.base_url
+    per_session = max(1, count // sessions)
+
+    def run(coalesce: bool):
+        client = OllamaClient(base_url=base_url, model_name="stand-in", pool_size=sessions, coalesce=coalesce)
+        completion_fn = client.create_completion_function(temperature=0.0)
+
+        def session():
+            for i in range(per_session):
+                completion_fn(f"Is prompt {i % distinct} relevant?")
+
+        def all_sessions():
+            threads = [threading.Thread(target=session) for _ in range(sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        try:
+            elapsed = _time(all_sessions, repeat=1)
+        finally:
+            client.close()
+        stats = client.single_flight.stats() if coalesce else {"executed": sessions * per_session}
+        return elapsed, stats["executed"]
+
+    try:
+        separate_s, separate_calls = run(False)
+        coalesced_s, coalesced_calls = run(True)
+    finally:
+        server.stop()
+
+    calls = sessions * per_session
+    results = {"calls": calls, "separate_s": separate_s, "coalesced_s": coalesced_s,
+               "separate_generations": separate_calls, "coalesced_generations": coalesced_calls}
+    print(f"{sessions} sessions x {per_session} calls over {distinct} prompts, "
+          f"{latency * 1e3:.0f} ms simulated inference")
+    print(f"  {'separate':<10} {separate_s:>8.3f} s   {separate_calls:>6} generations")
+    print(f"  {'coalesced':<10} {coalesced_s:>8.3f} s   {coalesced_calls:>6} generations")
+    return results
+
+def benchmark_reliability(count: int, deadline: float = 0.1) -> Dict[str, float]:
+    """
+    Measure LLM policy decisions against a failing server.
+
+    First, a server that answers the first two requests with 503 is retried
+    transparently. Then the server hangs (answers after 1 s) and the policy
+    falls back to random actions, once with a circuit breaker that never
+    opens (every decision waits out the deadline) and once with the default
+    breaker (decisions fail fast once it opens).
+
+    Args:
+        count: Number of policy decisions against the hanging server
+        deadline: Deadline of each LLM call in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    state = new_state(text="Find flights to Paris", available_actions=["search", "book", "ask"])
+    results = {"decisions": count}
+    # Every failed call and fallback logs a warning
+    quiet = [logging.getLogger(name) for name in ("src.llm.ollama", "src.core.policy")]
+    levels = [logger.level for logger in quiet]
+    for logger in quiet:
+        logger.setLevel(logging.ERROR)
+
+    server = FakeOllamaServer(responder="ok", failures=2).start()
+    client = OllamaClient(base_url=server.base_url, model_name="stand-in",
+                          retry_policy=RetryPolicy(base_delay=0.01))
+    try:
+        start = time.perf_counter()
+        reply = client.create_completion_function()("prompt")
+        results["transient_s"] = time.perf_counter() - start
+    finally:
+        client.close()
+        server.stop()
+
+    server = FakeOllamaServer(responder="ok", latency=1.0).start()
+    base_url = server.base_url
+    try:
+        for name, breaker in (("no_breaker", CircuitBreaker(failure_threshold=10 ** 9)),
+                              ("breaker", CircuitBreaker())):
+            client = OllamaClient(base_url=base_url, model_name="stand-in", deadline=deadline,
+                                  retry_policy=RetryPolicy(max_attempts=1), circuit_breaker=breaker)
+            policy = LLMPolicy(llm_fn=client.create_completion_function(), fallback_policy=RandomPolicy())
+            try:
+                results[name + "_s"] = _time(lambda: [policy.select_action(state) for _ in range(count)],
+                                             repeat=1)
+            finally:
+                client.close()
+    finally:
+        server.stop()
+        for logger, level in zip(quiet, levels):
+            logger.setLevel(level)
+
+    print(f"503, 503, then {reply!r}: answered in {results['transient_s'] * 1e3:.0f} ms after retries")
+    print(f"{count} policy decisions against a hanging server, {deadline * 1e3:.0f} ms deadline")
+    for name in ("no_breaker", "breaker"):
+        print(f"  {name:<11} {results[name + '_s'] / count * 1e3:>8.2f} ms/decision")
+    return results
+
+def benchmark_session(count: int, state_words: int = 400, prompt_token_delay: float = 0.0002) -> Dict[str, float]:
+    """
+    Measure LLM policy decisions with chain-of-thought, without and with sessions.
+
+    Without a session every thought step and the action prompt resend the
+    state and the previous thoughts; with one, each decision sends the state
+    once and continues the server-side context.
+
+    Args:
+        count: Number of policy decisions
+        state_words: Number of words in the state text
+        prompt_token_delay: Simulated prompt processing time per word in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    state = new_state(text=" ".join(["The user wants a weekend trip to Paris with flights and a hotel."]
+                                    * (state_words // 13)),
+                      available_actions=["search", "book", "ask"])
+    reply = '{"action": "search", "parameters": {"query": "flights to Paris"}, "reasoning": "Need options"}'
+    server = FakeOllamaServer(responder=reply, prompt_token_delay=prompt_token_delay).start()
+    client = OllamaClient(base_url=server.base_url, model_name="stand-in")
+    results = {"decisions": count}
+    try:
+        for name, session_fn in (("resend", None), ("session", client.create_session_function())):
+            completion_fn = client.create_completion_function()
+            policy = LLMPolicy(llm_fn=completion_fn, thought_generator=ChainOfThoughtGenerator(),
+                               thought_manager=ThoughtManager(), session_fn=session_fn)
+            server.reset_stats()
+            results[name + "_s"] = _time(lambda: [policy.select_action(state) for _ in range(count)], repeat=1)
+            results[name + "_words"] = server.stats()["prompt_tokens"]
+            assert policy.select_action(state).name == "search"
+    finally:
+        client.close()
+        server.stop()
+
+    print(f"{count} decisions (3 thoughts + action) on a {state_words}-word state, "
+          f"{prompt_token_delay * 1e6:.0f} us simulated processing per prompt word")
+    for name in ("resend", "session"):
+        print(f"  {name:<8} {results[name + '_s'] / count * 1e3:>8.1f} ms/decision   "
+              f"{results[name + '_words'] / count:>8,.0f} prompt words evaluated/decision")
+    return results
+
+def benchmark_metrics(count: int, token_delay: float = 0.0005) -> Dict[str, float]:
+    """
+    Report per-component LLM metrics of agent decisions and the cost of recording them.
+
+    Each decision generates three thoughts and an action with LLMPolicy, and
+    scores the result with LLMRewardModel, against the fake server.
+
+    Args:
+        count: Number of decisions
+        token_delay: Simulated decoding time per token in seconds
+
+    Returns:
+        A dictionary of measurements
+    """
+    state = new_state(text="Find flights to Paris for the weekend", available_actions=["search", "book", "ask"])
+    target = new_state(text="Booked a flight to Paris")
+    server = FakeOllamaServer(token_delay=token_delay, prompt_token_delay=0.00002).start()
+    registry = MetricsRegistry()
+    client = OllamaClient(base_url=server.base_url, model_name="stand-in",
+                          metrics=registry)
+    policy = LLMPolicy(llm_fn=client.create_completion_function(), thought_generator=ChainOfThoughtGenerator(),
+                       thought_manager=ThoughtManager())
+    reward_model = LLMRewardModel(llm_fn=client.create_completion_function(stop_labels=REWARD_STOP_LABELS))
+    try:
+        for _ in range(count):
+            policy.select_action(state)
+            reward_model.calculate_reward(state, target)
+    finally:
+        client.close()
+        server.stop()
+
+    result = {"model": "stand-in", "prompt_eval_count": 120, "eval_count": 40, "total_duration": 10 ** 9,
+              "load_duration": 10 ** 6, "prompt_eval_duration": 2 * 10 ** 8, "eval_duration": 8 * 10 ** 8}
+    record_s = _time(lambda: [registry.record("overhead", 0.5, result, 400) for _ in range(10000)]) / 10000
+    summary_s = _time(registry.summary, repeat=3)
+
+    summary = registry.summary()
+    print(f"{count} decisions (3 thoughts, action, reward), {token_delay * 1e3:.1f} ms simulated decoding per token")
+    print(f"  {'component':<16} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'prompt tok':>10} {'tok/s':>8}")
+    for name, metrics in summary.items():
+        if name == "overhead":
+            continue
+        print(f"  {name:<16} {metrics['calls']:>6} {metrics['latency_p50_s'] * 1e3:>8.1f} "
+              f"{metrics['latency_p95_s'] * 1e3:>8.1f} {_metric(metrics['prompt_tokens_mean'], 10)} "
+              f"{_metric(metrics['tokens_per_s'], 8)}")
+    print(f"  record {record_s * 1e6:.2f} us/call, summary {summary_s * 1e3:.2f} ms")
+    return {"decisions": count, "record_us": record_s * 1e6, "summary_ms": summary_s * 1e3}
+
+def benchmark_load(count: int, sessions: int = 8, latency: float = 0.01, token_delay: float = 0.0002,
+                   failure_rate: float = 0.02) -> Dict[str, float]:
+    """
+    Load-test the decision pipeline against the fake server.
+
+    Sessions in parallel threads each run LLMPolicy decisions (three
+    thoughts and an action, continuing one server-side context) and score
+    them with LLMRewardModel. The server answers after a log-normal latency
+    and fails a share of requests, which are retried.
+
+    Args:
+        count: Total number of decisions
+        sessions: Number of concurrent sessions
+        latency: Median simulated latency per request in seconds
+        token_delay: Simulated decoding time per token in seconds
+        failure_rate: Share of requests answered with 503
+
+    Returns:
+        A dictionary of measurements
+    """
+    state = new_state(text="Find flights to Paris for the weekend", available_actions=["search", "book", "ask"])
+    target = new_state(text="Booked a flight to Paris for the weekend")
+    server = FakeOllamaServer(responder=RuleBasedResponder(explanation_words=100), latency=lognormal(latency),
+                              token_delay=token_delay, prompt_token_delay=token_delay / 10,
+                              failure_rate=failure_rate).start()
+    registry = MetricsRegistry()
+    client = OllamaClient(base_url=server.base_url, model_name="stand-in", pool_size=sessions, metrics=registry,
+                          retry_policy=RetryPolicy(max_attempts=5, base_delay=0.005))
+    quiet = logging.getLogger("src.llm.ollama")
+    level = quiet.level
+    quiet.setLevel(logging.ERROR)
+    actions: List[str] = []
+
+    def session(decisions: int):
+        policy = LLMPolicy(llm_fn=client.create_completion_function(), thought_generator=ChainOfThoughtGenerator(),
+                           thought_manager=ThoughtManager(), session_fn=client.create_session_function())
+        reward_model = LLMRewardModel(llm_fn=client.create_completion_function(stop_labels=REWARD_STOP_LABELS))
+        for _ in range(decisions):
+            actions.append(policy.select_action(state).name)
+            reward_model.calculate_reward(state, target)
+
+    threads = [threading.Thread(target=session, args=(count // sessions + (i < count % sessions),))
+               for i in range(sessions)]
+    try:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+        server.stop()
+        quiet.setLevel(level)
+    # Every decision must parse to one of the available actions
+    assert len(actions) == count and set(actions) <= set(state.available_actions)
+
+    stats = server.stats()
+    summary = registry.summary()
+    print(f"{count} decisions in {sessions} sessions, {latency * 1e3:.0f} ms median latency, "
+          f"{failure_rate:.0%} failed requests")
+    print(f"  {count / elapsed:>8.1f} decisions/s   {stats['requests']} requests, {stats['failures']} failed "
+          f"and retried")
+    for name, metrics in summary.items():
+        print(f"  {name:<16} p50 {metrics['latency_p50_s'] * 1e3:>7.1f} ms   "
+              f"p95 {metrics['latency_p95_s'] * 1e3:>7.1f} ms   {_metric(metrics['prompt_tokens_mean'], 6)} prompt tokens")
+    return {"decisions": count, "decisions_per_s": count / elapsed, "requests": stats["requests"],
+            "failures": stats["failures"]}
+
+BENCHMARKS = {
+    "async_llm": benchmark_async_llm,
+    "cache": benchmark_cache,
+    "concurrency": benchmark_concurrency,
+    "http": benchmark_http,
+    "load": benchmark_load,
+    "metrics": benchmark_metrics,
+    "codec": benchmark_codec,
+    "embeddings": benchmark_embeddings,
+    "records": benchmark_records,
+    "reliability": benchmark_reliability,
+    "session": benchmark_session,
+    "similarity": benchmark_similarity,
+    "singleflight": benchmark_singleflight,
+    "streaming": benchmark_streaming,
+}
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Agentic IR micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"],
+                        help="Benchmark to run")
+    parser.add_argument("--count", type=int, default=5000,
+                        help="Problem size for the benchmark")
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name](args.count)
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,11 @@ from typing import Optional
 
 from src.core.agent import Agent
 from src.core.memory import InMemoryStorage
+from src.core.index import ExperienceIndex
+from src.core.shared_data import SharedDataStore
 from src.core.thought import ChainOfThoughtGenerator, ThoughtManager
 from src.core.reward import SimpleRewardModel
-from src.core.policy import LLMPolicy
+from src.core.policy import LLMPolicy, RandomPolicy
 from src.llm.ollama import create_ollama_client, create_completion_function
 from src.environments.life_assistant import LifeAssistantEnvironment
 from src.tools.search import WebSearchTool, WebContentTool
@@ -42,8 +44,9 @@ def setup_agent(model_name: str = "deepseek-coder:latest", verbose: bool = False
     ollama_client = create_ollama_client(model_name=model_name)
     completion_fn = ollama_client.create_completion_function()
     
-    # Set up memory
-    memory = InMemoryStorage()
+    # Set up memory, retrieving past experiences by similarity to the current state.
+    # Every state copies the user profile and context, so their data is shared
+    memory = InMemoryStorage(experience_index=ExperienceIndex(), data_store=SharedDataStore())
     
     # Set up thought manager
     thought_manager = ThoughtManager()
@@ -64,13 +67,17 @@ def setup_agent(model_name: str = "deepseek-coder:latest", verbose: bool = False
         }
     )
     
-    # Set up policy
+    # Set up policy, picking a random action if the LLM server fails; each
+    # decision generates its thoughts and action in one session, so the
+    # state is processed by the model once per decision
     policy = LLMPolicy(
         llm_fn=completion_fn,
         thought_generator=thought_generator,
         thought_manager=thought_manager,
         memory=memory,
-        verbose=verbose
+        verbose=verbose,
+        fallback_policy=RandomPolicy(),
+        session_fn=ollama_client.create_session_function()
     )
     
     # Create agent
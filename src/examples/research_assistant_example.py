@@ -14,11 +14,14 @@ from typing import Optional, List
 
 from src.core.agent import Agent
 from src.core.memory import InMemoryStorage
+from src.core.index import ExperienceIndex
 from src.core.thought import ChainOfThoughtGenerator, ThoughtManager
 from src.core.reward import SimpleRewardModel
-from src.core.policy import LLMPolicy
+from src.core.policy import LLMPolicy, RandomPolicy
 from src.core.state import InformationState
 from src.llm.ollama import create_ollama_client, create_completion_function
+from src.llm.cache import ResponseCache
+from src.llm.metrics import MetricsRegistry, tag_caller
 from src.tools.document_retrieval import DocumentSearchTool, DocumentReadTool, DocumentListTool
 from src.tools.search import WebSearchTool
 
@@ -29,23 +32,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def setup_agent(model_name: str = "deepseek-r1:14b", verbose: bool = False) -> Agent:
+def setup_agent(model_name: str = "deepseek-r1:14b", verbose: bool = False,
+                cache_path: Optional[str] = None) -> Agent:
     """
     Set up the agent with all necessary components.
     
     Args:
         model_name: The name of the Ollama model to use
         verbose: Whether to print verbose output
+        cache_path: Optional sqlite file that keeps LLM responses across sessions
         
     Returns:
         An initialized agent
     """
-    # Set up LLM client
-    ollama_client = create_ollama_client(model_name=model_name)
+    # Set up LLM client for thoughts and the policy. Their sampled
+    # generations are not cached, so the agent keeps exploring. Every call is
+    # recorded in the metrics registry, by component
+    metrics = MetricsRegistry()
+    ollama_client = create_ollama_client(model_name=model_name, metrics=metrics)
     completion_fn = ollama_client.create_completion_function()
     
-    # Set up memory
-    memory = InMemoryStorage()
+    # Client for explanations, summaries and answers, on the same connection
+    # pool: repeated questions (e.g. explaining the same paper) are answered
+    # from the cache, sampled answers included
+    response_cache = ResponseCache(path=cache_path, cache_sampled=True)
+    answer_client = create_ollama_client(model_name=model_name, session=ollama_client.session,
+                                         cache=response_cache, metrics=metrics)
+    
+    # Set up memory, retrieving past experiences by similarity to the current state
+    memory = InMemoryStorage(experience_index=ExperienceIndex())
     
     # Set up thought manager
     thought_manager = ThoughtManager()
@@ -66,13 +81,14 @@ def setup_agent(model_name: str = "deepseek-r1:14b", verbose: bool = False) -> A
         }
     )
     
-    # Set up policy
+    # Set up policy, picking a random action if the LLM server fails
     policy = LLMPolicy(
         llm_fn=completion_fn,
         thought_generator=thought_generator,
         thought_manager=thought_manager,
         memory=memory,
-        verbose=verbose
+        verbose=verbose,
+        fallback_policy=RandomPolicy()
     )
     
     # Create agent
@@ -82,11 +98,14 @@ def setup_agent(model_name: str = "deepseek-r1:14b", verbose: bool = False) -> A
         thought_manager=thought_manager,
         policy=policy,
         reward_model=reward_model,
-        verbose=verbose
+        verbose=verbose,
+        metrics=metrics
     )
     
     # Store the model name directly on the agent for later use
     agent.model_name = model_name
+    # Ad-hoc LLM calls (explanations, summaries, answers) use the caching client
+    agent.llm_client = answer_client
     
     # Add tools to the agent
     agent.add_tool(DocumentSearchTool())
@@ -182,9 +201,9 @@ def run_interactive_session(agent: Agent):
                     
                     # Use the LLM to generate a summary
                     try:
-                        ollama_client = create_ollama_client(model_name=agent.model_name)
-                        completion_fn = ollama_client.create_completion_function()
-                        explanation = completion_fn(prompt)
+                        completion_fn = agent.llm_client.create_completion_function()
+                        with tag_caller("explanation"):
+                            explanation = completion_fn(prompt)
                         
                         print(f"\n🤖 Explanation of the PARTNR framework:\n")
                         print(explanation)
@@ -247,9 +266,9 @@ def run_interactive_session(agent: Agent):
                         
                         # Use the LLM to generate a summary
                         try:
-                            ollama_client = create_ollama_client(model_name=agent.model_name)
-                            completion_fn = ollama_client.create_completion_function()
-                            summary = completion_fn(prompt)
+                            completion_fn = agent.llm_client.create_completion_function()
+                            with tag_caller("summarization"):
+                                summary = completion_fn(prompt)
                             
                             print(f"\n🤖 Summary of {selected_paper['title']}:\n")
                             print(summary)
@@ -311,9 +330,9 @@ def run_interactive_session(agent: Agent):
             prompt += f"Research paper excerpts:\n{combined_content}"
             
             try:
-                ollama_client = create_ollama_client(model_name=agent.model_name)
-                completion_fn = ollama_client.create_completion_function()
-                response = completion_fn(prompt)
+                completion_fn = agent.llm_client.create_completion_function()
+                with tag_caller("answer"):
+                    response = completion_fn(prompt)
             except Exception as e:
                 response = f"I encountered an error while generating a response: {e}"
         else:
@@ -329,12 +348,17 @@ def main():
                         help="Ollama model name to use")
     parser.add_argument("--verbose", action="store_true",
                         help="Enable verbose output")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="sqlite file to keep LLM responses across sessions")
+    parser.add_argument("--metrics", type=str, default=None,
+                        help="JSON file to write LLM call metrics to on exit")
     args = parser.parse_args()
     
+    agent = None
     try:
         # Set up the agent
         print("📝 Setting up the Research Assistant...")
-        agent = setup_agent(model_name=args.model, verbose=args.verbose)
+        agent = setup_agent(model_name=args.model, verbose=args.verbose, cache_path=args.cache)
         
         # Run interactive session
         run_interactive_session(agent)
@@ -344,6 +368,10 @@ def main():
     except Exception as e:
         logger.error(f"Error during execution: {e}", exc_info=True)
         print(f"\n❌ An error occurred: {e}")
+    finally:
+        if agent is not None and args.metrics:
+            agent.dump_llm_metrics(args.metrics)
+            print(f"📊 LLM call metrics written to {args.metrics}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""
+Asynchronous Ollama integration for the Agentic IR framework.
+
+This module provides an asyncio client for Ollama, so independent LLM calls
+(thought steps of different sessions, reward scoring, embeddings) can run
+concurrently from one event loop. Calls are executed on worker threads over
+the pooled keep-alive session of an OllamaClient, and a semaphore caps the
+number of requests in flight to keep the local server saturated but not
+overloaded.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .ollama import (OllamaClient, parse_json_response,
+                     THOUGHT_PROCESS_SYSTEM_PROMPT, POLICY_SYSTEM_PROMPT)
+from .cache import request_key
+from .singleflight import AsyncSingleFlight
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AsyncOllamaClient:
+    """
+    Asyncio client for interacting with Ollama API.
+    """
+
+    def __init__(self, client: Optional[OllamaClient] = None, max_in_flight: int = 4,
+                 base_url: str = "http://localhost:11434", model_name: str = "deepseek-r1:14b",
+                 coalesce: bool = True, coalesce_sampled: bool = False, **kwargs):
+        """
+        Initialize the async Ollama client.
+
+        Args:
+            client: Optional synchronous client whose session (and response
+                cache, if any) is used; one with a connection pool of
+                max_in_flight is created if not provided
+            max_in_flight: Maximum number of requests sent to the server at once
+            base_url: The base URL of the Ollama API (used if client is not provided)
+            model_name: The name of the model to use (used if client is not provided)
+            coalesce: Whether identical greedy (temperature 0) completions
+                requested concurrently share one generation
+            coalesce_sampled: Whether identical sampled (temperature > 0)
+                completions are coalesced too, so concurrent callers get the same sample
+            **kwargs: Connection options for OllamaClient (used if client is not provided)
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if client is None:
+            kwargs.setdefault("pool_size", max_in_flight)
+            client = OllamaClient(base_url=base_url, model_name=model_name, **kwargs)
+        self.client = client
+        self.model_name = client.model_name
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ollama")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self.coalesce_sampled = coalesce_sampled
+        logger.info(f"Initialized AsyncOllamaClient with model: {self.model_name}")
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently sent to the server."""
+        return self._in_flight
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking client call on a worker thread, within the in-flight limit."""
+        # The call runs in a copy of the caller's context, so metrics caller tags apply
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        if self._semaphore is None:
+            # Created lazily so it belongs to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, call)
+            finally:
+                self._in_flight -= 1
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None,
+                        temperature: float = 0.7, max_tokens: int = 2000,
+                        deadline: Optional[float] = None, raise_errors: bool = False) -> Dict[str, Any]:
+        """
+        Generate text using Ollama.
+
+        Args:
+            prompt: The prompt to generate from
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate
+            deadline: Seconds the call may take, retries included (default: the client's deadline)
+            raise_errors: Whether to raise a typed LLMError on failure instead of
+                returning a dictionary with an "error" key
+
+        Returns:
+            A dictionary with the generated text
+        """
+        return await self._run(self.client.generate, prompt, system_prompt=system_prompt,
+                               temperature=temperature, max_tokens=max_tokens, deadline=deadline,
+                               raise_errors=raise_errors)
+
+    async def agenerate_until(self, prompt: str, system_prompt: Optional[str] = None,
+                              temperature: float = 0.7, max_tokens: int = 2000,
+                              stop: Optional[Sequence[str]] = None, stop_on_json: bool = False,
+                              stop_labels: Optional[Sequence[str]] = None, deadline: Optional[float] = None,
+                              raise_errors: bool = False) -> Dict[str, Any]:
+        """
+        Generate text using Ollama, stopping as soon as a stop condition is met.
+
+        See OllamaClient.generate_until; the slot in the in-flight limit is
+        released as soon as the stream is closed.
+
+        Args:
+            prompt: The prompt to generate from
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate
+            stop: Stop sequences; the text is cut before the first one
+            stop_on_json: Whether to stop once the first JSON object is complete
+            stop_labels: Line labels that end the generation once all are answered
+            deadline: Seconds the call may take (default: the client's deadline)
+            raise_errors: Whether to raise a typed LLMError on failure
+
+        Returns:
+            A dictionary with the generated text and a "stopped" flag
+        """
+        return await self._run(self.client.generate_until, prompt, system_prompt=system_prompt,
+                               temperature=temperature, max_tokens=max_tokens, stop=stop,
+                               stop_on_json=stop_on_json, stop_labels=stop_labels,
+                               deadline=deadline, raise_errors=raise_errors)
+
+    async def aembed(self, text: str) -> List[float]:
+        """
+        Get embeddings for a text.
+
+        Args:
+            text: The text to get embeddings for
+
+        Returns:
+            A list of embeddings
+        """
+        return await self._run(self.client.get_embeddings, text)
+
+    async def aembed_many(self, texts: Sequence[str], batch_size: int = 32) -> List[List[float]]:
+        """
+        Get embeddings for many texts in batched requests.
+
+        Each batch takes its own slot of the in-flight limit, so the batches
+        run in parallel alongside other calls without exceeding it.
+
+        Args:
+            texts: The texts to get embeddings for
+            batch_size: Number of texts per request
+
+        Returns:
+            A list of embeddings for each text, in order
+        """
+        # Embed each distinct text once
+        distinct = list(dict.fromkeys(texts))
+        batches = [distinct[start:start + batch_size] for start in range(0, len(distinct), batch_size)]
+        embedded = await asyncio.gather(*(
+            self._run(self.client.get_embeddings_many, batch, batch_size=batch_size, max_workers=1)
+            for batch in batches
+        ))
+        vectors = {text: vector for batch, batch_vectors in zip(batches, embedded)
+                   for text, vector in zip(batch, batch_vectors)}
+        return [vectors[text] for text in texts]
+
+    def create_completion_function(self, system_prompt: Optional[str] = None,
+                                   temperature: float = 0.7,
+                                   max_tokens: int = 2000,
+                                   stop: Optional[Sequence[str]] = None,
+                                   stop_on_json: bool = False,
+                                   stop_labels: Optional[Sequence[str]] = None,
+                                   deadline: Optional[float] = None) -> Callable[[str], Awaitable[str]]:
+        """
+        Create an async function for generating text.
+
+        Failed calls raise a typed LLMError (see errors.py).
+
+        Args:
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate
+            stop: Optional stop sequences
+            stop_on_json: Whether to stop once the first JSON object is complete
+            stop_labels: Optional line labels that end the generation once all are answered
+            deadline: Seconds each call may take (default: the client's deadline)
+
+        Returns:
+            A coroutine function that takes a prompt and returns generated text
+        """
+        streaming = bool(stop or stop_on_json or stop_labels)
+
+        async def call(prompt: str, cacheable: bool, key: str) -> str:
+            if streaming:
+                response = await self.agenerate_until(prompt, system_prompt=system_prompt,
+                                                      temperature=temperature, max_tokens=max_tokens,
+                                                      stop=stop, stop_on_json=stop_on_json,
+                                                      stop_labels=stop_labels, deadline=deadline,
+                                                      raise_errors=True)
+            else:
+                response = await self.agenerate(prompt, system_prompt=system_prompt,
+                                                temperature=temperature, max_tokens=max_tokens,
+                                                deadline=deadline, raise_errors=True)
+            text = response.get("response", "")
+            if cacheable:
+                self.client.cache.put(key, text)
+            return text
+
+        async def completion_function(prompt: str) -> str:
+            cache = self.client.cache
+            coalesce = self.single_flight is not None and (temperature <= 0 or self.coalesce_sampled)
+            if cache is None and not coalesce:
+                return await call(prompt, False, "")
+
+            key = request_key(self.model_name, system_prompt, prompt, temperature, max_tokens,
+                              stop=stop, stop_on_json=stop_on_json, stop_labels=stop_labels)
+            cacheable = cache is not None and cache.should_cache(temperature)
+            if cacheable:
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached
+
+            if not coalesce:
+                return await call(prompt, cacheable, key)
+            return await self.single_flight.do(key, lambda: call(prompt, cacheable, key))
+
+        return completion_function
+
+    def create_tool_calling_function(self, system_prompt: Optional[str] = None,
+                                     temperature: float = 0.1) -> Callable[[str], Awaitable[Dict[str, Any]]]:
+        """
+        Create an async function for tool calling.
+
+        This function will attempt to parse the LLM output as JSON.
+
+        Args:
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+
+        Returns:
+            A coroutine function that takes a prompt and returns a dictionary
+        """
+        completion_function = self.create_completion_function(system_prompt=system_prompt,
+                                                               temperature=temperature,
+                                                               stop_on_json=True)
+
+        async def tool_calling_function(prompt: str) -> Dict[str, Any]:
+            # Add instructions to output JSON
+            response_text = await completion_function(prompt + "\n\nYou must respond with a valid JSON object.")
+            return parse_json_response(response_text)
+
+        return tool_calling_function
+
+    async def aclose(self) -> None:
+        """
+        Wait for running requests, stop the worker threads and close the connections.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncOllamaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+def create_async_completion_function(
+    client: Optional[AsyncOllamaClient] = None,
+    system_prompt: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    model_name: str = "deepseek-r1:14b",
+    **stop_options
+) -> Callable[[str], Awaitable[str]]:
+    """
+    Create an async completion function using Ollama.
+
+    Args:
+        client: Optional AsyncOllamaClient; functions created from the same
+            client share its in-flight limit and connection pool
+        system_prompt: An optional system prompt
+        temperature: The temperature for generation
+        max_tokens: The maximum number of tokens to generate
+        model_name: The model to use (used if client is not provided)
+        **stop_options: Stop conditions (stop, stop_on_json, stop_labels)
+
+    Returns:
+        A coroutine function that takes a prompt and returns generated text
+    """
+    if client is None:
+        client = AsyncOllamaClient(model_name=model_name)
+    return client.create_completion_function(system_prompt=system_prompt, temperature=temperature,
+                                             max_tokens=max_tokens, **stop_options)
+
+def create_async_thought_process_function(
+    client: Optional[AsyncOllamaClient] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    model_name: str = "deepseek-r1:14b"
+) -> Callable[[str], Awaitable[str]]:
+    """
+    Create an async function for generating thought processes.
+
+    Args:
+        client: Optional AsyncOllamaClient (will be created if not provided)
+        temperature: Sampling temperature
+        max_tokens: Maximum number of tokens to generate
+        model_name: The model to use (used if client is not provided)
+
+    Returns:
+        A coroutine function that takes a prompt and returns a thought process
+    """
+    return create_async_completion_function(client, THOUGHT_PROCESS_SYSTEM_PROMPT, temperature,
+                                            max_tokens, model_name)
+
+def create_async_policy_function(
+    client: Optional[AsyncOllamaClient] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 1000,
+    model_name: str = "deepseek-r1:14b",
+    stop_on_json: bool = True
+) -> Callable[[str], Awaitable[str]]:
+    """
+    Create an async function for policy decisions.
+
+    Args:
+        client: Optional AsyncOllamaClient (will be created if not provided)
+        temperature: Sampling temperature
+        max_tokens: Maximum number of tokens to generate
+        model_name: The model to use (used if client is not provided)
+        stop_on_json: Whether to stop generating once the JSON action object is complete
+
+    Returns:
+        A coroutine function that takes a prompt and returns a policy decision
+    """
+    return create_async_completion_function(client, POLICY_SYSTEM_PROMPT, temperature,
+                                            max_tokens, model_name, stop_on_json=stop_on_json)
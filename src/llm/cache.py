@@ -0,0 +1,404 @@
+"""
+LLM response caching for the Agentic IR framework.
+
+This module provides a content-addressed cache of LLM completions. Entries
+are keyed on a hash of everything that determines the output (model, system
+prompt, prompt, sampling options), so prompts that recur, such as repeated
+paper explanations or chain-of-thought steps for identical states, are
+answered without a call to the model. The cache has an in-memory LRU tier
+and an optional sqlite tier on disk that survives restarts.
+
+It also provides a persistent embedding cache, which stores the vectors of
+each model in a memory-mapped float32 matrix, so re-indexing unchanged text
+costs no embedding calls.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def request_key(model: str, system_prompt: Optional[str], prompt: str, temperature: float,
+                max_tokens: int, **options: Any) -> str:
+    """
+    Compute the content-addressed key of a completion request.
+
+    Args:
+        model: The model name
+        system_prompt: The system prompt, if any
+        prompt: The prompt
+        temperature: The sampling temperature
+        max_tokens: The maximum number of tokens to generate
+        **options: Any other options that change the completion (e.g. stop conditions)
+
+    Returns:
+        The SHA-256 hex digest of the request
+    """
+    request = [model, system_prompt or "", prompt, float(temperature), int(max_tokens),
+               sorted((name, value) for name, value in options.items() if value)]
+    encoded = json.dumps(request, ensure_ascii=False, separators=(",", ":"), default=list)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM completions keyed on a hash of the request.
+
+    Lookups check the in-memory LRU tier first, then the disk tier; disk hits
+    are promoted to memory. Sampled completions (temperature > 0) are not
+    deterministic, so they bypass the cache unless cache_sampled is set.
+    The cache is thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None,
+                 cache_sampled: bool = False):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of completions kept in memory
+            path: Optional path of a sqlite database for the disk tier
+            cache_sampled: Whether to also cache completions generated with
+                temperature > 0 (a cached sample is then returned every time)
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.cache_sampled = cache_sampled
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Access is serialized by the lock, so the connection can be shared by threads
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                             "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, system_prompt: Optional[str], prompt: str, temperature: float,
+            max_tokens: int, **options: Any) -> str:
+        """
+        Compute the cache key of a request (see request_key).
+        """
+        return request_key(model, system_prompt, prompt, temperature, max_tokens, **options)
+
+    def should_cache(self, temperature: float) -> bool:
+        """
+        Check whether a completion with the given temperature goes through the cache.
+
+        Bypassed requests are counted in the stats.
+
+        Args:
+            temperature: The sampling temperature
+
+        Returns:
+            True if the completion should be looked up and stored
+        """
+        if temperature > 0 and not self.cache_sampled:
+            with self._lock:
+                self._bypassed += 1
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached completion, or None on a miss
+        """
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return response
+
+            if self._db is not None:
+                row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return row[0]
+
+            self._misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        """
+        Store a completion.
+
+        Args:
+            key: The cache key
+            response: The completion
+        """
+        with self._lock:
+            self._remember(key, response)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                                 (key, response, time.time()))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the cache statistics.
+
+        Returns:
+            A dictionary with hits, disk_hits, misses, bypassed, entries and
+            hit_rate (hits over cacheable lookups)
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "entries": len(self._entries),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """
+        Remove all completions from both tiers and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+            self._hits = self._disk_hits = self._misses = self._bypassed = 0
+
+    def close(self) -> None:
+        """
+        Close the disk tier.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, response: str) -> None:
+        """Add a completion to the LRU tier, evicting the least recently used one if full."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class EmbeddingCache:
+    """
+    Persistent cache of text embeddings for one model.
+
+    Vectors are rows of a float32 matrix in a memory-mapped file, indexed by
+    the SHA-256 hash of their text; the hashes are kept in an append-only
+    key file, one per row. Each model has its own subdirectory, so the cache
+    is keyed by (model, text hash). The cache is thread-safe.
+    """
+
+    MATRIX_FILE = "vectors.f32"
+    KEYS_FILE = "keys.txt"
+    META_FILE = "meta.json"
+
+    def __init__(self, path: str, model: str, initial_capacity: int = 1024):
+        """
+        Initialize the cache, loading any vectors stored earlier.
+
+        Args:
+            path: Path to the cache directory (created if needed)
+            model: The embedding model whose vectors are cached
+            initial_capacity: Number of rows to preallocate in a new matrix file
+        """
+        self.model = model
+        self.directory = os.path.join(path, re.sub(r"[^A-Za-z0-9._-]", "_", model))
+        os.makedirs(self.directory, exist_ok=True)
+        self._initial_capacity = max(1, initial_capacity)
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self.dim = 0
+        self._hits = 0
+        self._misses = 0
+
+        meta_path = os.path.join(self.directory, self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            with open(os.path.join(self.directory, self.KEYS_FILE), "r", encoding="utf-8") as f:
+                for row, key in enumerate(f.read().split()):
+                    self._rows[key] = row
+            self._open_matrix()
+        self._keys_file = open(os.path.join(self.directory, self.KEYS_FILE), "a", encoding="utf-8")
+
+    @staticmethod
+    def key(text: str) -> str:
+        """
+        Compute the cache key of a text.
+
+        Args:
+            text: The text
+
+        Returns:
+            The SHA-256 hex digest of the text
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            texts: The texts
+
+        Returns:
+            A float32 vector (a copy) for each cached text, None for the others
+        """
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            vectors = []
+            for key in keys:
+                row = self._rows.get(key)
+                vectors.append(None if row is None else np.array(self._matrix[row]))
+            hits = sum(vector is not None for vector in vectors)
+            self._hits += hits
+            self._misses += len(vectors) - hits
+            return vectors
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a text.
+
+        Args:
+            text: The text
+
+        Returns:
+            The float32 vector, or None on a miss
+        """
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Store the embeddings of several texts.
+
+        Empty vectors (failed embedding calls) and vectors whose dimension
+        differs from the cached ones are skipped.
+
+        Args:
+            texts: The texts
+            vectors: Their embeddings, in order
+        """
+        with self._lock:
+            new_keys = []
+            for text, vector in zip(texts, vectors):
+                if vector is None or not len(vector):
+                    continue
+                key = self.key(text)
+                if key in self._rows:
+                    continue
+                if self._matrix is None:
+                    self._create_matrix(len(vector))
+                if len(vector) != self.dim:
+                    logger.warning(f"Not caching embedding of dimension {len(vector)}, expected {self.dim}")
+                    continue
+                row = len(self._rows)
+                if row >= len(self._matrix):
+                    self._grow()
+                self._matrix[row] = vector
+                self._rows[key] = row
+                new_keys.append(key)
+
+            if new_keys:
+                # Vectors are flushed before their keys, so a key never names an unwritten row
+                self._matrix.flush()
+                self._keys_file.write("".join(key + "\n" for key in new_keys))
+                self._keys_file.flush()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        """
+        Store the embedding of a text.
+
+        Args:
+            text: The text
+            vector: Its embedding
+        """
+        self.put_many([text], [vector])
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the cache statistics.
+
+        Returns:
+            A dictionary with hits, misses, entries and hit_rate
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._rows),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """
+        Flush the matrix and close the files.
+        """
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self._keys_file.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _create_matrix(self, dim: int) -> None:
+        """Create the matrix file for vectors of the given dimension."""
+        self.dim = dim
+        with open(os.path.join(self.directory, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": dim}, f)
+        self._resize(self._initial_capacity)
+
+    def _open_matrix(self) -> None:
+        """Memory-map the whole matrix file."""
+        path = os.path.join(self.directory, self.MATRIX_FILE)
+        capacity = os.path.getsize(path) // (4 * self.dim)
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _grow(self) -> None:
+        """Double the row capacity of the matrix file."""
+        self._matrix.flush()
+        self._resize(2 * len(self._matrix))
+
+    def _resize(self, capacity: int) -> None:
+        """Extend the matrix file to the given number of rows and map it again."""
+        self._matrix = None
+        with open(os.path.join(self.directory, self.MATRIX_FILE), "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open_matrix()
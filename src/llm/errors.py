@@ -0,0 +1,61 @@
+"""
+LLM errors for the Agentic IR framework.
+
+This module defines the exceptions raised by the LLM clients, so callers can
+tell a slow or unreachable server from a bad request and fall back (e.g. to
+a random or cached decision) instead of treating an error as model output.
+Transient errors are those worth retrying.
+"""
+
+from typing import Optional
+
+class LLMError(Exception):
+    """Base class for errors of LLM calls."""
+
+    # Whether retrying the same call may succeed
+    transient = False
+
+class LLMTimeoutError(LLMError):
+    """The call did not complete within its deadline or the read timeout."""
+
+    transient = True
+
+class LLMConnectionError(LLMError):
+    """The server could not be reached or dropped the connection."""
+
+    transient = True
+
+class LLMServerError(LLMError):
+    """The server answered with an error status."""
+
+    def __init__(self, message: str, status_code: int, body: str = ""):
+        """
+        Initialize the error.
+
+        Args:
+            message: The error message
+            status_code: The HTTP status code
+            body: The response body
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+        # Overloaded or failing servers may recover; bad requests will not
+        self.transient = status_code == 429 or status_code >= 500
+
+class LLMResponseError(LLMError):
+    """The server's response could not be parsed."""
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open, so the call was not attempted."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Initialize the error.
+
+        Args:
+            message: The error message
+            retry_after: Seconds until the breaker lets a trial call through
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,544 @@
+"""
+Fake Ollama server for the Agentic IR framework.
+
+This module provides a local stand-in for the Ollama API, so the agent
+stack (Agent, LLMPolicy, reward models, the examples) can be benchmarked
+and load-tested without a model. It speaks the protocol the clients use:
+/api/generate (complete or streamed as NDJSON, with context continuation),
+/api/embeddings and /api/embed. Responses are scripted or produced by
+rules that read the prompt (action JSON for policy prompts, reward lines
+for reward prompts, thoughts otherwise), and the server simulates latency,
+prompt processing and decoding time drawn from configurable distributions.
+
+Run it in-process with FakeOllamaServer, or on localhost with:
+
+    python -m src.llm.fake_server --port 11434 --token-delay 0.01
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A duration in seconds: a constant, or a function drawing one from a random generator
+Distribution = Union[float, Callable[[random.Random], float]]
+
+# Produces the text generated for a prompt (the whole conversation) and its request
+Responder = Callable[[str, Dict[str, Any]], str]
+
+def constant(value: float) -> Callable[[random.Random], float]:
+    """
+    Get a distribution that always returns the same value.
+
+    Args:
+        value: The value in seconds
+
+    Returns:
+        The distribution
+    """
+    return lambda rng: value
+
+def uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    """
+    Get a uniform distribution.
+
+    Args:
+        low: The lowest value in seconds
+        high: The highest value in seconds
+
+    Returns:
+        The distribution
+    """
+    return lambda rng: rng.uniform(low, high)
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """
+    Get a log-normal distribution, the usual shape of service latencies.
+
+    Args:
+        median: The median value in seconds
+        sigma: The standard deviation of the logarithm (larger: heavier tail)
+
+    Returns:
+        The distribution
+    """
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+class ScriptedResponder:
+    """
+    Responder that returns the given replies in turn, starting over at the end.
+    """
+
+    def __init__(self, replies: Sequence[str]):
+        """
+        Initialize the responder.
+
+        Args:
+            replies: The replies
+        """
+        if not replies:
+            raise ValueError("At least one reply is required")
+        self.replies = list(replies)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str, request: Dict[str, Any]) -> str:
+        with self._lock:
+            reply = self.replies[self._next % len(self.replies)]
+            self._next += 1
+        return reply
+
+class RuleBasedResponder:
+    """
+    Responder that answers the framework's prompts in the format their parsers expect.
+
+    - Reward prompts get "Reward:" (or "Cumulative Reward:") lines, with
+      values from the word overlap of the current and target states.
+    - Action prompts (asking for an "action" JSON object) get a valid action
+      object naming one of the available actions.
+    - Other prompts, such as thought steps, get a thought of thought_words
+      words about the state.
+
+    Choices are derived from a hash of the prompt, so the same prompt always
+    gets the same reply.
+    """
+
+    def __init__(self, thought_words: int = 60, explanation_words: int = 0):
+        """
+        Initialize the responder.
+
+        Args:
+            thought_words: Length of generated thoughts in words
+            explanation_words: Words of explanation appended after action objects
+                and reward lines, like a chatty model (which early stop cuts off)
+        """
+        self.thought_words = thought_words
+        self.explanation_words = explanation_words
+
+    def __call__(self, prompt: str, request: Dict[str, Any]) -> str:
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        if "Cumulative Reward:" in prompt:
+            reward = self._overlap(prompt, "Target state:", "Final state:")
+            return (f"Cumulative Reward: {2 * reward - 1:.2f}\n"
+                    f"Reasoning: The final state covers {reward:.0%} of the target.\n" + self._explanation())
+        if "Reward:" in prompt:
+            similarity = self._overlap(prompt, "Target state:", "Current state:")
+            return (f"Reward: {2 * similarity - 1:.2f}\n"
+                    f"Reasoning: The current state covers {similarity:.0%} of the target.\n"
+                    f"Components:\n- Similarity: {similarity:.2f}\n- Progress: {similarity - 0.5:.2f}\n"
+                    f"- Efficiency: 0.50\n" + self._explanation())
+        if '"action"' in prompt:
+            actions = self._available_actions(prompt)
+            action = actions[seed % len(actions)] if actions else "respond"
+            decision = {"action": action, "parameters": {"query": self._topic(prompt)},
+                        "reasoning": f"'{action}' moves the task forward."}
+            return json.dumps(decision) + "\n" + self._explanation()
+        return self._thought(prompt, seed)
+
+    def _explanation(self) -> str:
+        """Get the trailing explanation."""
+        words = ["This", "follows", "from", "the", "state", "and", "the", "previous", "steps."]
+        return " ".join(words[i % len(words)] for i in range(self.explanation_words))
+
+    def _thought(self, prompt: str, seed: int) -> str:
+        """Write a thought about the prompt's state."""
+        instruction = prompt.rstrip().rsplit("\n", 1)[-1].lower()
+        if instruction.startswith("analyze"):
+            opening = "The situation is as follows:"
+        elif "what plan" in instruction:
+            opening = "The plan is to proceed step by step:"
+        elif "what action" in instruction:
+            opening = "The next action should address the goal directly:"
+        elif instruction.startswith("reflect"):
+            opening = "Looking back on the process so far:"
+        else:
+            opening = "Thinking about this:"
+        vocabulary = re.findall(r"[A-Za-z]{4,}", prompt) or ["information"]
+        rng = random.Random(seed)
+        words = opening.split()
+        while len(words) < self.thought_words:
+            words.append(rng.choice(vocabulary).lower())
+        return " ".join(words) + "."
+
+    @staticmethod
+    def _line_after(prompt: str, label: str) -> str:
+        """Get the text following the last occurrence of a label, up to the end of its line."""
+        start = prompt.rfind(label)
+        if start < 0:
+            return ""
+        start += len(label)
+        end = prompt.find("\n", start)
+        return prompt[start:] if end < 0 else prompt[start:end]
+
+    def _overlap(self, prompt: str, target_label: str, current_label: str) -> float:
+        """Get the share of target-state words present in the current state."""
+        target = set(re.findall(r"\w+", self._line_after(prompt, target_label).lower()))
+        current = set(re.findall(r"\w+", self._line_after(prompt, current_label).lower()))
+        return len(target & current) / len(target) if target else 0.5
+
+    def _available_actions(self, prompt: str) -> List[str]:
+        """Find the available actions listed in the prompt."""
+        listed = self._line_after(prompt, "Available Actions:")
+        if listed.strip():
+            return [action.strip() for action in listed.split(",") if action.strip()]
+        start = prompt.rfind("Available actions:\n")
+        if start < 0:
+            return []
+        actions = []
+        for line in prompt[start:].split("\n")[1:]:
+            if not line.startswith("- "):
+                break
+            actions.append(line[2:].strip())
+        return actions
+
+    def _topic(self, prompt: str) -> str:
+        """Get a short query from the state in the prompt."""
+        state = (self._line_after(prompt, "Current state:") or self._line_after(prompt, "Current Information State:"))
+        return " ".join(state.split()[:6])
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler of FakeOllamaServer."""
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    disable_nagle_algorithm = True  # Like Ollama; avoids delayed-ACK stalls on reused connections
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": fake.model, "model": fake.model}]})
+        else:
+            self._send(200, b"Ollama is running", "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        fake = self.server.fake
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if fake._should_fail():
+            self._send(503, b"", "application/json")
+            return
+        time.sleep(fake._draw(fake.latency))
+
+        if self.path == "/api/embeddings":
+            fake._count("embeddings")
+            self._send_json({"embedding": fake.embedding(request.get("prompt", ""))})
+        elif self.path == "/api/embed":
+            fake._count("embeddings")
+            inputs = request.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            self._send_json({"model": request.get("model", fake.model),
+                             "embeddings": [fake.embedding(text) for text in inputs]})
+        elif self.path == "/api/generate":
+            fake._count("generations")
+            reply, done = fake._generate(request)
+            if request.get("stream", True):
+                self._stream(reply, done)
+            else:
+                time.sleep(done["eval_duration"] / 1e9)
+                self._send_json(dict(done, response=reply))
+        else:
+            self._send(404, b"404 page not found", "text/plain; charset=utf-8")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        """Send a complete response."""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting
+            self.close_connection = True
+
+    def _send_json(self, body: Dict[str, Any]):
+        """Send a JSON response."""
+        self._send(200, json.dumps(body).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _stream(self, reply: str, done: Dict[str, Any]):
+        """Stream a reply as chunked NDJSON, one token per line, like Ollama."""
+        tokens = _tokens(reply)
+        token_delay = done["eval_duration"] / 1e9 / max(1, len(tokens))
+        chunks = [{"model": done["model"], "response": token, "done": False} for token in tokens]
+        chunks.append(dict(done, response=""))
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in chunks:
+                if token_delay and not chunk["done"]:
+                    time.sleep(token_delay)
+                line = json.dumps(chunk).encode("utf-8") + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early; stop generating
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def _tokens(text: str) -> List[str]:
+    """Split text into word-sized tokens."""
+    return [token for token in re.split(r"(\s+)", text) if token]
+
+class FakeOllamaServer:
+    """
+    Local stand-in for the Ollama API.
+
+    Generate requests are answered by the responder, given the whole
+    conversation: the request's prompt, preceded by the conversation its
+    "context" continues. Each generate request takes latency, plus
+    prompt_token_delay per prompt word not covered by the context, plus
+    token_delay per generated token; durations are drawn from their
+    distributions with a seeded generator. Responses carry a context and
+    Ollama's token counts and durations. The server runs on a background
+    thread and is thread-safe.
+    """
+
+    # Conversations kept for context continuation
+    MAX_CONVERSATIONS = 4096
+
+    def __init__(self, responder: Union[Responder, str, None] = None, host: str = "127.0.0.1", port: int = 0,
+                 latency: Distribution = 0.0, token_delay: Distribution = 0.0,
+                 prompt_token_delay: Distribution = 0.0, failures: int = 0, failure_rate: float = 0.0,
+                 embedding_dim: int = 8, model: str = "fake", seed: int = 0):
+        """
+        Initialize the server.
+
+        Args:
+            responder: Function producing the reply to a prompt, or a fixed
+                reply (default: a RuleBasedResponder)
+            host: The host to listen on
+            port: The port to listen on (0 for a free port)
+            latency: Seconds to wait before answering each request
+            token_delay: Seconds spent on each generated token (drawn once per request)
+            prompt_token_delay: Seconds spent on each evaluated prompt word (drawn once per request)
+            failures: Number of first requests answered with 503
+            failure_rate: Probability that any other request is answered with 503
+            embedding_dim: Dimension of the generated embeddings
+            model: The model name reported in responses
+            seed: Seed of the random generator for durations and failures
+        """
+        if responder is None:
+            responder = RuleBasedResponder()
+        elif isinstance(responder, str):
+            responder = ScriptedResponder([responder])
+        self.responder = responder
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_delay = token_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.failure_rate = failure_rate
+        self.embedding_dim = embedding_dim
+        self.model = model
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures = failures
+        self._conversations: "OrderedDict[int, str]" = OrderedDict()
+        self._stats: Dict[str, int] = {}
+        self.reset_stats()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The base URL of the running server, for OllamaClient(base_url=...)."""
+        if self._httpd is None:
+            raise RuntimeError("The server is not running")
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def start(self) -> "FakeOllamaServer":
+        """
+        Start serving on a background thread.
+
+        Returns:
+            The server
+        """
+        if self._httpd is not None:
+            return self
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _FakeOllamaHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the socket.
+        """
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+        self._thread = None
+
+    def serve_forever(self) -> None:
+        """
+        Serve on the calling thread until interrupted.
+        """
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _FakeOllamaHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the request statistics.
+
+        Returns:
+            A dictionary with the number of requests, generations, embedding
+            requests and failures, and the prompt and completion tokens processed
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self) -> None:
+        """
+        Reset the request statistics.
+        """
+        with self._lock:
+            self._stats = {"requests": 0, "generations": 0, "embeddings": 0, "failures": 0,
+                           "prompt_tokens": 0, "completion_tokens": 0}
+
+    def embedding(self, text: str) -> List[float]:
+        """
+        Derive a deterministic unit vector from a text.
+
+        Args:
+            text: The text
+
+        Returns:
+            The embedding
+        """
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.embedding_dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _draw(self, distribution: Distribution) -> float:
+        """Draw a duration in seconds."""
+        if not callable(distribution):
+            return distribution
+        with self._lock:
+            return max(0.0, distribution(self._rng))
+
+    def _should_fail(self) -> bool:
+        """Count a request and decide whether it is answered with 503."""
+        with self._lock:
+            self._stats["requests"] += 1
+            fail = self._failures > 0 or (self.failure_rate > 0 and self._rng.random() < self.failure_rate)
+            if fail:
+                self._failures = max(0, self._failures - 1)
+                self._stats["failures"] += 1
+            return fail
+
+    def _count(self, name: str, value: int = 1) -> None:
+        """Add to a statistic."""
+        with self._lock:
+            self._stats[name] += value
+
+    def _generate(self, request: Dict[str, Any]):
+        """
+        Produce the reply to a generate request and the fields of its final response.
+
+        Only the prompt words not covered by the request's context are
+        evaluated, taking their simulated time here; decoding time is
+        reported in eval_duration and spent by the caller.
+        """
+        prompt = str(request.get("prompt", ""))
+        context = list(request.get("context") or [])
+        with self._lock:
+            history = self._conversations.get(hash(tuple(context))) if context else None
+        if history is None:
+            # A new conversation (or an unknown context): the system prompt is evaluated too
+            context = []
+            history = ""
+            evaluated = str(request.get("system", "")).split() + prompt.split()
+        else:
+            evaluated = prompt.split()
+        conversation = f"{history}\n\n{prompt}" if history else prompt
+
+        reply = self.responder(conversation, request)
+        tokens = _tokens(reply)
+        prompt_eval_duration = self._draw(self.prompt_token_delay) * len(evaluated)
+        eval_duration = self._draw(self.token_delay) * len(tokens)
+        time.sleep(prompt_eval_duration)
+
+        context += [zlib.crc32(word.encode("utf-8")) & 0xFFFF for word in evaluated + reply.split()]
+        with self._lock:
+            self._conversations[hash(tuple(context))] = f"{conversation}\n\n{reply}"
+            while len(self._conversations) > self.MAX_CONVERSATIONS:
+                self._conversations.popitem(last=False)
+            self._stats["prompt_tokens"] += len(evaluated)
+            self._stats["completion_tokens"] += len(tokens)
+
+        done = {
+            "model": request.get("model", self.model),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "context": context,
+            "total_duration": int((prompt_eval_duration + eval_duration) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": len(evaluated),
+            "prompt_eval_duration": int(prompt_eval_duration * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_duration * 1e9),
+        }
+        return reply, done
+
+def main():
+    """Main entry point: serve on localhost until interrupted."""
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks and load tests")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=11434, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Median seconds before each answer (log-normal)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds per generated token")
+    parser.add_argument("--prompt-token-delay", type=float, default=0.0, help="Seconds per evaluated prompt word")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of answering with 503")
+    parser.add_argument("--reply", type=str, default=None, help="Fixed reply instead of rule-based ones")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(responder=args.reply, host=args.host, port=args.port,
+                              latency=lognormal(args.latency) if args.latency > 0 else 0.0,
+                              token_delay=args.token_delay, prompt_token_delay=args.prompt_token_delay,
+                              failure_rate=args.failure_rate, seed=args.seed)
+    logger.info(f"Fake Ollama server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+LLM call metrics for the Agentic IR framework.
+
+This module records, for every LLM call, the wall-clock latency and the
+token accounting Ollama returns (prompt_eval_count, eval_count,
+total_duration, load_duration, ...), and aggregates them per component:
+the caller that made the call, such as a thought step, the policy, the
+reward model or summarization. Callers tag their calls with tag_caller,
+which sets a context variable, so the tag reaches the client without being
+threaded through every completion function.
+"""
+
+import contextlib
+import contextvars
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Component the LLM calls of the current context are made for
+_caller: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_caller", default=None)
+
+@contextlib.contextmanager
+def tag_caller(component: str) -> Iterator[None]:
+    """
+    Attribute the LLM calls made in the block to a component.
+
+    Tags nest: the innermost one applies. Asyncio tasks started in the block
+    inherit the tag.
+
+    Args:
+        component: The component name, e.g. "policy" or "thought.analyze"
+    """
+    token = _caller.set(component)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+def current_caller() -> Optional[str]:
+    """
+    Get the component the LLM calls of the current context are attributed to.
+
+    Returns:
+        The component name, or None outside of tag_caller
+    """
+    return _caller.get()
+
+class _ComponentMetrics:
+    """Running totals and recent samples of the calls of one component."""
+
+    def __init__(self, max_samples: int):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_chars = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Calls whose response reported the token count (stopped streams do not)
+        self.prompt_token_calls = 0
+        self.completion_token_calls = 0
+        self.latency_s = 0.0
+        self.total_duration_s = 0.0
+        self.load_duration_s = 0.0
+        self.prompt_eval_duration_s = 0.0
+        self.eval_duration_s = 0.0
+        self.latencies: Deque[float] = deque(maxlen=max_samples)
+
+class MetricsRegistry:
+    """
+    Registry of LLM call metrics, aggregated per component.
+
+    Counters cover all recorded calls; latency percentiles are computed
+    over the most recent max_samples calls of each component. The registry
+    is thread-safe.
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        """
+        Initialize the registry.
+
+        Args:
+            max_samples: Number of recent latencies kept per component for percentiles
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._components: Dict[str, _ComponentMetrics] = {}
+
+    def record(self, component: str, latency: float, result: Optional[Dict[str, Any]] = None,
+               prompt_chars: int = 0, error: bool = False) -> None:
+        """
+        Record an LLM call.
+
+        Args:
+            component: The component the call was made for
+            latency: Wall-clock seconds the call took
+            result: The response of the call; its Ollama token counts and
+                durations (in nanoseconds) are accumulated
+            prompt_chars: Length of the prompt in characters
+            error: Whether the call failed
+        """
+        result = result or {}
+        with self._lock:
+            metrics = self._components.get(component)
+            if metrics is None:
+                metrics = self._components[component] = _ComponentMetrics(self.max_samples)
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.prompt_chars += prompt_chars
+            prompt_tokens = result.get("prompt_eval_count")
+            if prompt_tokens is not None:
+                metrics.prompt_tokens += prompt_tokens
+                metrics.prompt_token_calls += 1
+            completion_tokens = result.get("eval_count")
+            if completion_tokens is not None:
+                metrics.completion_tokens += completion_tokens
+                metrics.completion_token_calls += 1
+            metrics.latency_s += latency
+            metrics.total_duration_s += (result.get("total_duration") or 0) / 1e9
+            metrics.load_duration_s += (result.get("load_duration") or 0) / 1e9
+            # Calls without server timings (e.g. stopped streams) are timed by their latency
+            if result.get("prompt_eval_count"):
+                metrics.prompt_eval_duration_s += (result.get("prompt_eval_duration") or 0) / 1e9 or latency
+            if result.get("eval_count"):
+                metrics.eval_duration_s += (result.get("eval_duration") or 0) / 1e9 or latency
+            metrics.latencies.append(latency)
+
+    def components(self) -> List[str]:
+        """
+        Get the components that have recorded calls.
+
+        Returns:
+            The component names, sorted
+        """
+        with self._lock:
+            return sorted(self._components)
+
+    def summary(self, component: Optional[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get the aggregated metrics.
+
+        Token rates use the server's eval durations, or the latency of calls
+        for which the server reported counts but no durations. Token means
+        and rates only cover the calls that reported token counts, and are
+        None if none did (e.g. when every call was a stopped stream).
+
+        Args:
+            component: Optional component to summarize (default: all)
+
+        Returns:
+            A dictionary mapping each component to its calls, errors, token
+            and prompt-size totals, the number of calls that reported token
+            counts, server and load time, p50/p95 latency, and generated and
+            prompt tokens per second
+        """
+        with self._lock:
+            names = [component] if component is not None else sorted(self._components)
+            summary = {}
+            for name in names:
+                metrics = self._components.get(name)
+                if metrics is None:
+                    continue
+                latencies = np.fromiter(metrics.latencies, dtype=np.float64)
+                p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (0.0, 0.0)
+                summary[name] = {
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "prompt_tokens": metrics.prompt_tokens,
+                    "completion_tokens": metrics.completion_tokens,
+                    "prompt_token_calls": metrics.prompt_token_calls,
+                    "completion_token_calls": metrics.completion_token_calls,
+                    "prompt_chars_mean": metrics.prompt_chars / metrics.calls,
+                    "prompt_tokens_mean": (metrics.prompt_tokens / metrics.prompt_token_calls
+                                           if metrics.prompt_token_calls else None),
+                    "latency_p50_s": float(p50),
+                    "latency_p95_s": float(p95),
+                    "latency_total_s": metrics.latency_s,
+                    "server_total_s": metrics.total_duration_s,
+                    "load_total_s": metrics.load_duration_s,
+                    "tokens_per_s": (metrics.completion_tokens / metrics.eval_duration_s
+                                     if metrics.eval_duration_s else None),
+                    "prompt_tokens_per_s": (metrics.prompt_tokens / metrics.prompt_eval_duration_s
+                                            if metrics.prompt_eval_duration_s else None),
+                }
+            return summary
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """
+        Serialize the aggregated metrics.
+
+        Args:
+            indent: JSON indentation (None for a single line)
+
+        Returns:
+            The summary of all components as JSON
+        """
+        return json.dumps(self.summary(), indent=indent, sort_keys=True)
+
+    def dump(self, path: str) -> None:
+        """
+        Write the aggregated metrics to a JSON file.
+
+        Args:
+            path: The file to write
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def reset(self) -> None:
+        """
+        Remove all recorded calls.
+        """
+        with self._lock:
+            self._components.clear()
@@ -5,35 +5,287 @@ This module provides integration with Ollama for local LLM inference.
 """
 
 import json
+import time
 import logging
 import requests
-from typing import Dict, Any, List, Optional, Callable, Union
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, List, Optional, Callable, Sequence, Tuple, Union
+
+from .cache import EmbeddingCache, ResponseCache, request_key
+from .singleflight import SingleFlight
+from .errors import (LLMError, LLMTimeoutError, LLMConnectionError, LLMServerError,
+                     LLMResponseError)
+from .reliability import RetryPolicy, CircuitBreaker
+from .metrics import MetricsRegistry, current_caller
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Most bytes read from a complete (not streamed) response body at a time
+BODY_CHUNK_SIZE = 65536
+
 class OllamaClient:
     """
     Client for interacting with Ollama API.
+    
+    Requests go through a pooled ``requests.Session``, so connections to the
+    Ollama server are kept alive and reused across calls instead of paying
+    for a new TCP connection on every generation or embedding.
+    
+    Besides complete generations, the client can stream tokens as they are
+    produced (generate_stream) and stop a generation as soon as the caller
+    has what it needs (generate_until), e.g. once the first JSON object of a
+    policy decision is complete.
+    
+    Completion functions created from the client consult its response cache,
+    if one is set, before calling the model; embeddings likewise go through
+    its embedding cache. Identical greedy (temperature 0) completions
+    requested concurrently (e.g. by several sessions in threads) are
+    coalesced into one generation; sampled ones only with coalesce_sampled,
+    since callers sampling the same prompt usually want different answers.
+    
+    Every request has a deadline, which covers reading the response body
+    (complete or streamed) as well: each socket read is capped by the time
+    left, so a server that trickles bytes cannot keep a call past it. Transient failures (timeouts,
+    dropped connections, 5xx and 429 responses) are retried with jittered
+    backoff, and a circuit breaker fails calls fast while the server is down.
+    Completion functions raise the typed errors of ``errors.py`` rather
+    than returning error text.
+    
+    With a metrics registry, every generation and embedding request is
+    recorded with its latency and the token counts Ollama reports.
+    
+    Sessions (create_session) chain the ``context`` of each generation into
+    the next, so multi-step prompting over the same state does not make the
+    server evaluate the shared prefix again.
     """
     
-    def __init__(self, base_url: str = "http://localhost:11434", model_name: str = "deepseek-r1:14b"):
+    def __init__(self, base_url: str = "http://localhost:11434", model_name: str = "deepseek-r1:14b",
+                 pool_size: int = 10, connect_timeout: float = 5.0, read_timeout: Optional[float] = 300.0,
+                 session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None, coalesce: bool = True,
+                 coalesce_sampled: bool = False, deadline: Optional[float] = 600.0, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 keep_alive: Optional[Union[str, float]] = None,
+                 metrics: Optional[MetricsRegistry] = None):
         """
         Initialize the Ollama client.
         
         Args:
             base_url: The base URL of the Ollama API
             model_name: The name of the model to use
+            pool_size: Maximum number of connections kept open to the server,
+                i.e. the number of concurrent requests that reuse a connection
+            connect_timeout: Seconds to wait for a connection to the server
+            read_timeout: Seconds to wait between bytes of a response (None to
+                wait indefinitely, e.g. for very slow models)
+            session: Optional session to use instead of creating a pooled one
+            cache: Optional response cache used by the completion functions
+            embedding_cache: Optional persistent cache of embeddings for this model
+            coalesce: Whether identical greedy (temperature 0) completions
+                requested concurrently share one generation
+            coalesce_sampled: Whether identical sampled (temperature > 0)
+                completions are coalesced too, so concurrent callers get the same sample
+            deadline: Default seconds a call may take in total, retries
+                included (None for no limit beyond the timeouts)
+            retry_policy: Retry policy for transient failures (default: 3 attempts)
+            circuit_breaker: Circuit breaker for the server (default: opens
+                after 5 consecutive failures for 30 seconds)
+            keep_alive: How long the server keeps the model loaded after a
+                generation, e.g. "10m" or seconds (None for the server default)
+            metrics: Optional registry that records the latency and token counts
+                of every call, under the component set with metrics.tag_caller
         """
         self.base_url = base_url
         self.model_name = model_name
         self.generate_endpoint = f"{base_url}/api/generate"
         self.embeddings_endpoint = f"{base_url}/api/embeddings"
+        self.embed_endpoint = f"{base_url}/api/embed"
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.keep_alive = keep_alive
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.session = session if session is not None else self._create_session(pool_size)
+        self.cache = cache
+        self.embedding_cache = embedding_cache
+        self.metrics = metrics
+        self.single_flight = SingleFlight() if coalesce else None
+        self.coalesce_sampled = coalesce_sampled
+        # Whether the server has the batch endpoint /api/embed (None until known)
+        self._batch_embed_supported: Optional[bool] = None
         logger.info(f"Initialized OllamaClient with model: {model_name}")
     
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """
+        Create a session with a keep-alive connection pool.
+        
+        Args:
+            pool_size: Maximum number of pooled connections per host
+            
+        Returns:
+            The session
+        """
+        session = requests.Session()
+        # Retries are left to the caller; a retried generation is not free
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        return session
+    
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
+    
+    def _post(self, url: str, payload: Dict[str, Any], deadline: Optional[float] = None,
+              stream: bool = False) -> requests.Response:
+        """
+        Send a request, retrying transient failures within the deadline.
+        
+        Args:
+            url: The endpoint URL
+            payload: The JSON payload
+            deadline: Seconds the call may take in total (default: the client's deadline)
+            stream: Whether to stream the response body; otherwise the body
+                is read here, within the deadline
+            
+        Returns:
+            The response, with status 200
+            
+        Raises:
+            LLMError: A typed error if the call fails
+        """
+        if deadline is None:
+            deadline = self.deadline
+        expires = time.monotonic() + deadline if deadline is not None else None
+        attempt = 0
+        while True:
+            # An expired deadline fails the call before any request is sent,
+            # which says nothing about the server, so the breaker is not told
+            timeout = self._remaining_timeout(expires)
+            self.circuit_breaker.before_call()
+            attempt += 1
+            try:
+                # The body is always streamed, so that reading it can be held to the deadline
+                response = self.session.post(url, json=payload, stream=True, timeout=timeout)
+                if response.status_code != 200 or not stream:
+                    self._read_body(response, expires)
+                if response.status_code != 200:
+                    body = response.text
+                    raise LLMServerError(f"API error: {response.status_code}, {body[:200]}",
+                                         response.status_code, body)
+            except LLMError as e:
+                error = e
+            except (requests.Timeout, urllib3.exceptions.TimeoutError) as e:
+                error = LLMTimeoutError(f"Request to {url} timed out: {e}")
+            except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+                error = LLMConnectionError(f"Request to {url} failed: {e}")
+            else:
+                self.circuit_breaker.record_success()
+                return response
+            
+            if not error.transient:
+                # The server answered, so it is up
+                self.circuit_breaker.record_success()
+                raise error
+            self.circuit_breaker.record_failure()
+            if attempt >= self.retry_policy.max_attempts:
+                raise error
+            delay = self.retry_policy.delay(attempt)
+            if expires is not None and time.monotonic() + delay >= expires:
+                raise LLMTimeoutError(f"Deadline of {deadline}s exceeded: {error}") from error
+            logger.warning(f"Retrying after error (attempt {attempt}): {error}")
+            time.sleep(delay)
+    
+    def _remaining_timeout(self, expires: Optional[float]):
+        """Get the (connect, read) timeout of a request, capped by the time left before a deadline."""
+        if expires is None:
+            return self.timeout
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("Deadline exceeded")
+        connect_timeout, read_timeout = self.timeout
+        return (min(connect_timeout, remaining) if connect_timeout is not None else remaining,
+                min(read_timeout, remaining) if read_timeout is not None else remaining)
+    
+    def _cap_read_timeout(self, response: requests.Response, expires: Optional[float]) -> None:
+        """Cap the next socket read of a response body by the time left before a deadline."""
+        if expires is None:
+            return
+        # Raises LLMTimeoutError once the deadline has passed
+        read_timeout = self._remaining_timeout(expires)[1]
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is not None:
+            sock.settimeout(read_timeout)
+    
+    def _read_body(self, response: requests.Response, expires: Optional[float]) -> bytes:
+        """
+        Read a streamed response body within a deadline.
+        
+        urllib3 2's read1() returns after a single socket read, so the
+        deadline is checked (and the socket timeout capped) between reads.
+        The body is cached on the response as requests does, so .json() and
+        .text work as for a response that was not streamed.
+        """
+        raw = response.raw
+        read = getattr(raw, "read1", None) or raw.read
+        chunks = []
+        try:
+            while True:
+                self._cap_read_timeout(response, expires)
+                chunk = read(BODY_CHUNK_SIZE, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            response.close()
+        body = b"".join(chunks)
+        response._content = body
+        response._content_consumed = True
+        return body
+    
+    def _iter_lines(self, response: requests.Response, expires: Optional[float]) -> Iterator[bytes]:
+        """
+        Yield the lines of a streamed response body within a deadline.
+        
+        Lines are split from single socket reads, so that a line trickled
+        byte by byte is cut off at the deadline too; without read1() (urllib3
+        1.x) the deadline is only checked between HTTP chunks.
+        """
+        read = getattr(response.raw, "read1", None)
+        if read is None:
+            yield from response.iter_lines(chunk_size=None)
+            return
+        pending = b""
+        while True:
+            self._cap_read_timeout(response, expires)
+            chunk = read(BODY_CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            yield from lines
+        if pending:
+            yield pending
+    
+    def __enter__(self) -> "OllamaClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
     def generate(self, prompt: str, system_prompt: Optional[str] = None, 
-                temperature: float = 0.7, max_tokens: int = 2000) -> Dict[str, Any]:
+                temperature: float = 0.7, max_tokens: int = 2000,
+                deadline: Optional[float] = None, raise_errors: bool = False,
+                context: Optional[List[int]] = None,
+                keep_alive: Optional[Union[str, float]] = None) -> Dict[str, Any]:
         """
         Generate text using Ollama.
         
@@ -42,32 +294,27 @@ class OllamaClient:
             system_prompt: An optional system prompt
             temperature: The temperature for generation
             max_tokens: The maximum number of tokens to generate
+            deadline: Seconds the call may take, retries included (default: the client's deadline)
+            raise_errors: Whether to raise a typed LLMError on failure instead of
+                returning a dictionary with an "error" key
+            context: The "context" returned by a previous generation, to continue it
+            keep_alive: How long the server keeps the model loaded after the call
+                (e.g. "10m" or seconds; default: the client's keep_alive)
             
         Returns:
-            A dictionary with the generated text
+            A dictionary with the generated text (and the "context" to continue it)
         """
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False,
-            "temperature": temperature,
-            "num_predict": max_tokens
-        }
-        
-        if system_prompt:
-            payload["system"] = system_prompt
+        payload = self._generate_payload(prompt, system_prompt, temperature, max_tokens, False,
+                                         context, keep_alive)
         
+        started = time.perf_counter()
         try:
-            response = requests.post(self.generate_endpoint, json=payload)
-            
-            # Check for successful response
-            if response.status_code != 200:
-                logger.error(f"Error from Ollama API: {response.status_code}, {response.text}")
-                return {"error": f"API error: {response.status_code}", "response": ""}
+            response = self._post(self.generate_endpoint, payload, deadline)
             
             # Try to parse JSON response
             try:
                 result = response.json()
+                self._record(started, len(prompt), result)
                 return result
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing JSON from Ollama: {e}")
@@ -79,16 +326,208 @@ class OllamaClient:
                         response_text = text.split('"response":"')[1].split('","done')[0]
                         # Unescape JSON string
                         response_text = response_text.encode().decode('unicode_escape')
+                        self._record(started, len(prompt))
                         return {"response": response_text}
                     except:
                         pass
                 
-                # Return a fallback response
-                return {"error": "JSON parsing error", "response": text[:1000]}
+                raise LLMResponseError(f"JSON parsing error: {text[:200]}") from e
                 
-        except Exception as e:
+        except LLMError as e:
+            self._record(started, len(prompt), error=True)
+            if raise_errors:
+                raise
+            logger.error(f"Error generating text: {e}")
+            return {"error": str(e), "error_type": type(e).__name__, "response": ""}
+    
+    def _generate_payload(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                          max_tokens: int, stream: bool, context: Optional[List[int]],
+                          keep_alive: Optional[Union[str, float]]) -> Dict[str, Any]:
+        """Build the payload of a generate request."""
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+        
+        if system_prompt:
+            payload["system"] = system_prompt
+        if context:
+            payload["context"] = context
+        if keep_alive is None:
+            keep_alive = self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+    
+    def _stream_chunks(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                       max_tokens: int, deadline: Optional[float] = None,
+                       context: Optional[List[int]] = None,
+                       keep_alive: Optional[Union[str, float]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Send a streaming generate request and yield the response chunks.
+        
+        Closing the generator closes the response; if the generation is not
+        finished, the connection is dropped and Ollama stops generating.
+        Failures after the first chunk are not retried.
+        """
+        payload = self._generate_payload(prompt, system_prompt, temperature, max_tokens, True,
+                                         context, keep_alive)
+        
+        if deadline is None:
+            deadline = self.deadline
+        expires = time.monotonic() + deadline if deadline is not None else None
+        with self._post(self.generate_endpoint, payload, deadline, stream=True) as response:
+            try:
+                # Ollama sends one JSON object per line, flushed per token
+                for line in self._iter_lines(response, expires):
+                    if expires is not None and time.monotonic() > expires:
+                        raise LLMTimeoutError(f"Deadline of {deadline}s exceeded while streaming")
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise LLMResponseError(f"API error: {chunk['error']}")
+                    yield chunk
+                    if chunk.get("done"):
+                        return
+            except json.JSONDecodeError as e:
+                raise LLMResponseError(f"Malformed stream chunk: {e}") from e
+            except (requests.Timeout, urllib3.exceptions.TimeoutError) as e:
+                raise LLMTimeoutError(f"Stream timed out: {e}") from e
+            except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+                # requests reports read timeouts inside a body as connection errors
+                if expires is not None and time.monotonic() >= expires:
+                    raise LLMTimeoutError(f"Stream timed out: {e}") from e
+                raise LLMConnectionError(f"Stream failed: {e}") from e
+    
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                        temperature: float = 0.7, max_tokens: int = 2000) -> Iterator[str]:
+        """
+        Generate text using Ollama, yielding tokens as they arrive.
+        
+        Stopping iteration early (or closing the iterator) cancels the rest of
+        the generation.
+        
+        Args:
+            prompt: The prompt to generate from
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate
+            
+        Yields:
+            The generated text, token by token
+            
+        Raises:
+            LLMError: If the request fails or the server reports an error
+        """
+        chunks = self._stream_chunks(prompt, system_prompt, temperature, max_tokens)
+        try:
+            for chunk in chunks:
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+        finally:
+            chunks.close()
+    
+    def generate_until(self, prompt: str, system_prompt: Optional[str] = None,
+                       temperature: float = 0.7, max_tokens: int = 2000,
+                       stop: Optional[Sequence[str]] = None, stop_on_json: bool = False,
+                       stop_labels: Optional[Sequence[str]] = None, deadline: Optional[float] = None,
+                       raise_errors: bool = False, context: Optional[List[int]] = None,
+                       keep_alive: Optional[Union[str, float]] = None) -> Dict[str, Any]:
+        """
+        Generate text using Ollama, stopping as soon as a stop condition is met.
+        
+        The generation is streamed and the stop conditions are checked as
+        tokens arrive; when one is met the stream is closed, so the model
+        does not spend time on text the caller would discard. A leading
+        ``<think>`` block (reasoning models) is kept in the text but not
+        checked against the stop conditions.
+        
+        Args:
+            prompt: The prompt to generate from
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate
+            stop: Stop sequences; the text is cut before the first one
+            stop_on_json: Whether to stop once the first JSON object is complete
+            stop_labels: Line labels (e.g. "Reward:"); stop once a complete line
+                starting with each of them has been generated
+            deadline: Seconds the call may take (default: the client's deadline)
+            raise_errors: Whether to raise a typed LLMError on failure instead of
+                returning a dictionary with an "error" key
+            context: The "context" returned by a previous generation, to continue it
+            keep_alive: How long the server keeps the model loaded after the call
+            
+        Returns:
+            A dictionary with the generated text, like generate(), plus a
+            "stopped" flag telling whether a stop condition ended the generation
+            (a stopped generation has no "context")
+        """
+        conditions = []
+        if stop:
+            conditions.append(StopSequences(stop))
+        if stop_on_json:
+            conditions.append(JsonObjectStop())
+        if stop_labels:
+            conditions.append(LabeledLinesStop(stop_labels))
+        
+        text = ""
+        tokens = 0
+        answer_start = None
+        result: Dict[str, Any] = {}
+        started = time.perf_counter()
+        chunks = self._stream_chunks(prompt, system_prompt, temperature, max_tokens, deadline,
+                                     context, keep_alive)
+        try:
+            for chunk in chunks:
+                token = chunk.get("response", "")
+                if token:
+                    text += token
+                    tokens += 1
+                if chunk.get("done"):
+                    result = chunk
+                if not conditions:
+                    continue
+                if answer_start is None:
+                    answer_start = _answer_start(text)
+                    if answer_start is None:
+                        continue
+                answer = text[answer_start:]
+                ends = [end for end in (condition(answer) for condition in conditions) if end is not None]
+                if ends:
+                    text = text[:answer_start + min(ends)]
+                    # Ollama only reports token counts at the end; each chunk is one token
+                    result = {"model": self.model_name, "done": False, "stopped": True, "eval_count": tokens}
+                    break
+        except LLMError as e:
+            self._record(started, len(prompt), error=True)
+            if raise_errors:
+                raise
             logger.error(f"Error generating text: {e}")
-            return {"error": str(e), "response": ""}
+            return {"error": str(e), "error_type": type(e).__name__, "response": text}
+        finally:
+            chunks.close()
+        
+        result["response"] = text
+        result.setdefault("stopped", False)
+        self._record(started, len(prompt), result)
+        return result
+    
+    def _record(self, started: float, prompt_chars: int, result: Optional[Dict[str, Any]] = None,
+                error: bool = False, component: Optional[str] = None) -> None:
+        """
+        Record a call in the metrics registry, if there is one.
+        
+        Generations are attributed to the caller's tag ("completion" if
+        untagged), embedding requests to component "embedding".
+        """
+        if self.metrics is not None:
+            self.metrics.record(component or current_caller() or "completion", time.perf_counter() - started,
+                                result, prompt_chars, error)
     
     def get_embeddings(self, text: str) -> List[float]:
         """
@@ -100,45 +539,188 @@ class OllamaClient:
         Returns:
             A list of embeddings
         """
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(text)
+            if cached is not None:
+                return cached.tolist()
+        
+        embedding = self._embed_one(text)
+        if self.embedding_cache is not None and embedding:
+            self.embedding_cache.put(text, embedding)
+        return embedding
+    
+    def get_embeddings_many(self, texts: Sequence[str], batch_size: int = 32,
+                            max_workers: int = 4) -> List[List[float]]:
+        """
+        Get embeddings for many texts.
+        
+        Texts found in the embedding cache are not sent. The rest are grouped
+        into batches of batch_size per request to the /api/embed endpoint,
+        and batches are sent in parallel by up to max_workers threads (capped
+        at the connection pool size). Servers without /api/embed are sent
+        one /api/embeddings request per text instead.
+        
+        Args:
+            texts: The texts to get embeddings for
+            batch_size: Number of texts per request
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            A list of embeddings for each text, in order (empty for texts
+            whose embedding failed)
+        """
+        results: List[List[float]] = [[] for _ in texts]
+        if self.embedding_cache is not None:
+            for i, cached in enumerate(self.embedding_cache.get_many(texts)):
+                if cached is not None:
+                    results[i] = cached.tolist()
+        
+        # Embed each distinct missing text once
+        missing: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not results[i]:
+                missing.setdefault(text, []).append(i)
+        if not missing:
+            return results
+        
+        pending = list(missing)
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        workers = max(1, min(max_workers, self.pool_size, len(batches)))
+        if workers == 1:
+            embedded = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ollama-embed") as executor:
+                embedded = list(executor.map(self._embed_batch, batches))
+        
+        for batch, vectors in zip(batches, embedded):
+            if self.embedding_cache is not None:
+                self.embedding_cache.put_many(batch, vectors)
+            for text, vector in zip(batch, vectors):
+                for i in missing[text]:
+                    results[i] = vector
+        return results
+    
+    def _embed_one(self, text: str) -> List[float]:
+        """Embed a text with one /api/embeddings request (empty list on failure)."""
         payload = {
             "model": self.model_name,
             "prompt": text
         }
         
+        started = time.perf_counter()
         try:
-            response = requests.post(self.embeddings_endpoint, json=payload)
-            result = response.json()
+            result = self._post(self.embeddings_endpoint, payload).json()
+            self._record(started, len(text), result, component="embedding")
             return result.get("embedding", [])
-        except Exception as e:
+        except (LLMError, ValueError) as e:
+            self._record(started, len(text), error=True, component="embedding")
             logger.error(f"Error getting embeddings: {e}")
             return []
     
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with one /api/embed request, falling back to one request per text."""
+        if self._batch_embed_supported is not False:
+            payload = {
+                "model": self.model_name,
+                "input": texts
+            }
+            started = time.perf_counter()
+            try:
+                result = self._post(self.embed_endpoint, payload).json()
+                embeddings = result.get("embeddings", [])
+                self._record(started, sum(map(len, texts)), result, error=len(embeddings) != len(texts),
+                             component="embedding")
+                if len(embeddings) == len(texts):
+                    self._batch_embed_supported = True
+                    return embeddings
+                logger.error(f"Error getting embeddings: expected {len(texts)}, got {len(embeddings)}")
+                return [[] for _ in texts]
+            except LLMServerError as e:
+                if e.status_code != 404 or not e.body.startswith("404 page not found"):
+                    self._record(started, sum(map(len, texts)), error=True, component="embedding")
+                    logger.error(f"Error getting embeddings: {e}")
+                    return [[] for _ in texts]
+                # Older Ollama versions only have the single-text endpoint
+                logger.info("Ollama has no /api/embed endpoint, embedding one text per request")
+                self._batch_embed_supported = False
+            except (LLMError, ValueError) as e:
+                self._record(started, sum(map(len, texts)), error=True, component="embedding")
+                logger.error(f"Error getting embeddings: {e}")
+                return [[] for _ in texts]
+        
+        return [self._embed_one(text) for text in texts]
+    
     def create_completion_function(self, system_prompt: Optional[str] = None,
-                                 temperature: float = 0.7, max_tokens: int = 2000) -> Callable[[str], str]:
+                                 temperature: float = 0.7, max_tokens: int = 2000,
+                                 stop: Optional[Sequence[str]] = None, stop_on_json: bool = False,
+                                 stop_labels: Optional[Sequence[str]] = None,
+                                 deadline: Optional[float] = None) -> Callable[[str], str]:
         """
         Create a callable function for generating text.
         
+        If any stop condition is given, generations are streamed and cut
+        short as soon as it is met (see generate_until). Failed calls raise
+        a typed LLMError (see errors.py), so callers can fall back.
+        
         Args:
             system_prompt: An optional system prompt
             temperature: The temperature for generation
             max_tokens: The maximum number of tokens to generate
+            stop: Optional stop sequences
+            stop_on_json: Whether to stop once the first JSON object is complete
+            stop_labels: Optional line labels that end the generation once all are answered
+            deadline: Seconds each call may take (default: the client's deadline)
             
         Returns:
             A callable function that takes a prompt and returns generated text
         """
+        streaming = bool(stop or stop_on_json or stop_labels)
+        
+        def call(prompt: str, cacheable: bool, key: str) -> str:
+            if streaming:
+                response = self.generate_until(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stop=stop,
+                    stop_on_json=stop_on_json,
+                    stop_labels=stop_labels,
+                    deadline=deadline,
+                    raise_errors=True
+                )
+            else:
+                response = self.generate(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    deadline=deadline,
+                    raise_errors=True
+                )
+            
+            text = response.get("response", "")
+            # Failed calls raise, so only completions are cached
+            if cacheable:
+                self.cache.put(key, text)
+            return text
+        
         def completion_function(prompt: str) -> str:
-            response = self.generate(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            coalesce = self.single_flight is not None and (temperature <= 0 or self.coalesce_sampled)
+            if self.cache is None and not coalesce:
+                return call(prompt, False, "")
             
-            if "error" in response and response["error"]:
-                logger.error(f"Error in completion function: {response['error']}")
-                return f"Error: {response['error']}"
-                
-            return response.get("response", "")
+            key = request_key(self.model_name, system_prompt, prompt, temperature, max_tokens,
+                              stop=stop, stop_on_json=stop_on_json, stop_labels=stop_labels)
+            cacheable = self.cache is not None and self.cache.should_cache(temperature)
+            if cacheable:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+            
+            if not coalesce:
+                return call(prompt, cacheable, key)
+            return self.single_flight.do(key, lambda: call(prompt, cacheable, key))
         
         return completion_function
     
@@ -162,37 +744,320 @@ class OllamaClient:
             
             response_text = self.create_completion_function(
                 system_prompt=system_prompt,
-                temperature=temperature
+                temperature=temperature,
+                stop_on_json=True
             )(enhanced_prompt)
             
-            # Try to extract JSON from the response
-            try:
-                # Find JSON part in the response
-                start_idx = response_text.find("{")
-                end_idx = response_text.rfind("}")
-                
-                if start_idx >= 0 and end_idx > start_idx:
-                    json_str = response_text[start_idx:end_idx+1]
-                    return json.loads(json_str)
-                
-                # Try alternative format with ```json
-                json_pattern = "```json"
-                if json_pattern in response_text:
-                    parts = response_text.split(json_pattern)
-                    for part in parts[1:]:  # Skip the part before the first ```json
-                        closing_marker = "```"
-                        if closing_marker in part:
-                            json_str = part.split(closing_marker)[0].strip()
-                            return json.loads(json_str)
-                
-                # If no JSON found, try to parse the whole response
-                return json.loads(response_text)
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Error parsing JSON from response: {e}")
-                logger.error(f"Raw response: {response_text}")
-                return {"error": "Failed to parse JSON", "text": response_text}
+            return parse_json_response(response_text)
         
         return tool_calling_function
+    
+    def create_session(self, system_prompt: Optional[str] = None, temperature: float = 0.7,
+                       max_tokens: int = 2000, keep_alive: Optional[Union[str, float]] = "10m",
+                       deadline: Optional[float] = None) -> "OllamaSession":
+        """
+        Create a session that continues one conversation across calls.
+        
+        Args:
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate per call
+            keep_alive: How long the server keeps the model loaded between calls
+            deadline: Seconds each call may take (default: the client's deadline)
+            
+        Returns:
+            A new session
+        """
+        return OllamaSession(self, system_prompt=system_prompt, temperature=temperature,
+                             max_tokens=max_tokens, keep_alive=keep_alive, deadline=deadline)
+    
+    def create_session_function(self, system_prompt: Optional[str] = None, temperature: float = 0.7,
+                                max_tokens: int = 2000, keep_alive: Optional[Union[str, float]] = "10m",
+                                deadline: Optional[float] = None) -> Callable[[], "OllamaSession"]:
+        """
+        Create a function that opens a new session on each call.
+        
+        This is the session_fn of LLMPolicy: each decision chains its thought
+        steps and the action choice in a fresh session.
+        
+        Args:
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate per call
+            keep_alive: How long the server keeps the model loaded between calls
+            deadline: Seconds each call may take (default: the client's deadline)
+            
+        Returns:
+            A callable function that takes no arguments and returns a new session
+        """
+        def session_function() -> OllamaSession:
+            return self.create_session(system_prompt=system_prompt, temperature=temperature,
+                                       max_tokens=max_tokens, keep_alive=keep_alive, deadline=deadline)
+        
+        return session_function
+
+class OllamaSession:
+    """
+    A sequence of generations that continue one conversation.
+    
+    Each call sends only the new prompt, together with the ``context``
+    returned by the previous generation, so the server resumes from tokens
+    it has already processed instead of evaluating the shared prefix (the
+    state, the previous thoughts, ...) again on every step. The model is
+    kept loaded with ``keep_alive`` between calls.
+    
+    If the context is lost, because a generation was stopped early or the
+    server did not return one, the next call replays the conversation as
+    text. Session calls bypass the client's response cache and coalescing,
+    since their results depend on the conversation so far. A session is
+    meant for one sequence of calls and is not thread-safe.
+    """
+    
+    def __init__(self, client: OllamaClient, system_prompt: Optional[str] = None,
+                 temperature: float = 0.7, max_tokens: int = 2000,
+                 keep_alive: Optional[Union[str, float]] = "10m", deadline: Optional[float] = None):
+        """
+        Initialize the session.
+        
+        Args:
+            client: The client to generate with
+            system_prompt: An optional system prompt
+            temperature: The temperature for generation
+            max_tokens: The maximum number of tokens to generate per call
+            keep_alive: How long the server keeps the model loaded between calls
+            deadline: Seconds each call may take (default: the client's deadline)
+        """
+        self.client = client
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.keep_alive = keep_alive
+        self.deadline = deadline
+        self.context: Optional[List[int]] = None
+        self.turns: List[Tuple[str, str]] = []
+        # Prompt tokens the server evaluated, as reported in prompt_eval_count
+        self.prompt_tokens = 0
+    
+    def generate(self, prompt: str, stop: Optional[Sequence[str]] = None, stop_on_json: bool = False,
+                 stop_labels: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Continue the conversation with a prompt.
+        
+        Args:
+            prompt: The new prompt (without the conversation so far)
+            stop: Optional stop sequences
+            stop_on_json: Whether to stop once the first JSON object is complete
+            stop_labels: Optional line labels that end the generation once all are answered
+            
+        Returns:
+            A dictionary with the generated text, like OllamaClient.generate()
+            
+        Raises:
+            LLMError: If the call fails; the session is then left unchanged
+        """
+        full_prompt = prompt
+        if self.context is None and self.turns:
+            # No server-side context to continue, so resend the conversation
+            full_prompt = "\n\n".join([text for turn in self.turns for text in turn] + [prompt])
+        # The system prompt is part of the context after the first call
+        system_prompt = self.system_prompt if self.context is None else None
+        
+        options = dict(system_prompt=system_prompt, temperature=self.temperature,
+                       max_tokens=self.max_tokens, deadline=self.deadline, raise_errors=True,
+                       context=self.context, keep_alive=self.keep_alive)
+        if stop or stop_on_json or stop_labels:
+            result = self.client.generate_until(full_prompt, stop=stop, stop_on_json=stop_on_json,
+                                                stop_labels=stop_labels, **options)
+        else:
+            result = self.client.generate(full_prompt, **options)
+        
+        self.context = result.get("context") or None
+        self.turns.append((prompt, result.get("response", "")))
+        self.prompt_tokens += result.get("prompt_eval_count", 0)
+        return result
+    
+    def __call__(self, prompt: str, **stop_options) -> str:
+        """
+        Continue the conversation with a prompt and return the generated text.
+        
+        Args:
+            prompt: The new prompt
+            **stop_options: Stop conditions for generate (stop, stop_on_json, stop_labels)
+            
+        Returns:
+            The generated text
+        """
+        return self.generate(prompt, **stop_options).get("response", "")
+    
+    def reset(self) -> None:
+        """
+        Forget the conversation; the next call starts a new one.
+        """
+        self.context = None
+        self.turns = []
+        self.prompt_tokens = 0
+
+def parse_json_response(response_text: str) -> Dict[str, Any]:
+    """
+    Extract a JSON object from an LLM response.
+    
+    Args:
+        response_text: The generated text
+        
+    Returns:
+        The parsed object, or a dictionary with an "error" key if no JSON was found
+    """
+    try:
+        # Find JSON part in the response
+        start_idx = response_text.find("{")
+        end_idx = response_text.rfind("}")
+        
+        if start_idx >= 0 and end_idx > start_idx:
+            json_str = response_text[start_idx:end_idx+1]
+            return json.loads(json_str)
+        
+        # Try alternative format with ```json
+        json_pattern = "```json"
+        if json_pattern in response_text:
+            parts = response_text.split(json_pattern)
+            for part in parts[1:]:  # Skip the part before the first ```json
+                closing_marker = "```"
+                if closing_marker in part:
+                    json_str = part.split(closing_marker)[0].strip()
+                    return json.loads(json_str)
+        
+        # If no JSON found, try to parse the whole response
+        return json.loads(response_text)
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Error parsing JSON from response: {e}")
+        logger.error(f"Raw response: {response_text}")
+        return {"error": "Failed to parse JSON", "text": response_text}
+
+# Reasoning block that some models (e.g. deepseek-r1) emit before the answer
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+
+def _answer_start(text: str) -> Optional[int]:
+    """
+    Find where the answer starts in a generation, after any leading <think> block.
+    
+    Returns None while the generation may still be inside (or opening) the block.
+    """
+    stripped = text.lstrip()
+    if len(stripped) < len(_THINK_OPEN) and _THINK_OPEN.startswith(stripped):
+        return None
+    if not stripped.startswith(_THINK_OPEN):
+        return 0
+    end = text.find(_THINK_CLOSE)
+    return None if end < 0 else end + len(_THINK_CLOSE)
+
+class StopSequences:
+    """
+    Stop condition that is met when any of the given sequences appears.
+    
+    Called with the text generated so far, returns the index to cut the text
+    at (the start of the first stop sequence), or None to keep generating.
+    Only the new end of the text is searched on each call.
+    """
+    
+    def __init__(self, sequences: Sequence[str]):
+        """
+        Initialize the stop condition.
+        
+        Args:
+            sequences: The stop sequences
+        """
+        self.sequences = [sequence for sequence in sequences if sequence]
+        self._overlap = max((len(sequence) for sequence in self.sequences), default=1) - 1
+        self._searched = 0
+    
+    def __call__(self, text: str) -> Optional[int]:
+        start = max(0, self._searched - self._overlap)
+        self._searched = len(text)
+        found = [index for index in (text.find(sequence, start) for sequence in self.sequences) if index >= 0]
+        return min(found) if found else None
+
+class JsonObjectStop:
+    """
+    Stop condition that is met when the first top-level JSON object is complete.
+    
+    Braces are matched incrementally, ignoring those inside JSON strings, so
+    each call only scans the text added since the previous one. Returns the
+    index just past the closing brace, or None to keep generating.
+    """
+    
+    def __init__(self):
+        """Initialize the stop condition."""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def __call__(self, text: str) -> Optional[int]:
+        position = self._position
+        depth = self._depth
+        in_string = self._in_string
+        escaped = self._escaped
+        end = None
+        
+        for index in range(position, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == "{":
+                depth += 1
+            elif char == "}" and depth:
+                depth -= 1
+                if not depth:
+                    end = index + 1
+                    break
+            elif char == '"' and depth:
+                in_string = True
+        
+        self._position = len(text) if end is None else end
+        self._depth = depth
+        self._in_string = in_string
+        self._escaped = escaped
+        return end
+
+class LabeledLinesStop:
+    """
+    Stop condition for line-oriented answers such as "Reward: 0.5".
+    
+    Met once a complete line starting with each of the labels has been
+    generated (list markers like "- " before a label are ignored). Returns
+    the index just past the last of those lines, or None to keep generating.
+    """
+    
+    def __init__(self, labels: Sequence[str]):
+        """
+        Initialize the stop condition.
+        
+        Args:
+            labels: The line labels, e.g. ["Reward:", "Similarity:"]
+        """
+        self.labels = list(labels)
+        self._pending = set(self.labels)
+        self._line_start = 0
+    
+    def __call__(self, text: str) -> Optional[int]:
+        while True:
+            newline = text.find("\n", self._line_start)
+            if newline < 0:
+                return None
+            line = text[self._line_start:newline].strip().lstrip("-*• ").strip()
+            self._line_start = newline + 1
+            for label in self._pending:
+                if line.startswith(label):
+                    self._pending.discard(label)
+                    break
+            if not self._pending:
+                return newline + 1
 
 # Default system prompts
 DEFAULT_SYSTEM_PROMPT = """You are an AI assistant powered by the Agentic Information Retrieval framework.
@@ -206,35 +1071,50 @@ POLICY_SYSTEM_PROMPT = """You are determining the next action for an AI agent.
 Your role is to select the most appropriate action based on the current state and thoughts.
 Consider the available tools, the user's query, and the information collected so far."""
 
-def create_ollama_client(base_url: str = "http://localhost:11434", model_name: str = "deepseek-r1:14b") -> OllamaClient:
+# Lines LLMRewardModel reads from a reward evaluation; nothing after them is used
+REWARD_STOP_LABELS = ["Reward:", "Similarity:", "Progress:", "Efficiency:"]
+
+def create_ollama_client(base_url: str = "http://localhost:11434", model_name: str = "deepseek-r1:14b",
+                         **kwargs) -> OllamaClient:
     """
     Create an Ollama client.
     
     Args:
         base_url: The base URL of the Ollama API
         model_name: The name of the model to use
+        **kwargs: Connection options for OllamaClient (pool_size, timeouts, ...)
         
     Returns:
         An initialized OllamaClient
     """
-    return OllamaClient(base_url=base_url, model_name=model_name)
+    return OllamaClient(base_url=base_url, model_name=model_name, **kwargs)
 
 def create_completion_function(model_name: str = "deepseek-r1:14b", 
                              system_prompt: Optional[str] = None,
-                             temperature: float = 0.7) -> Callable[[str], str]:
+                             temperature: float = 0.7,
+                             max_tokens: int = 2000,
+                             client: Optional[OllamaClient] = None,
+                             **stop_options) -> Callable[[str], str]:
     """
     Create a completion function using Ollama.
     
     Args:
-        model_name: The name of the model to use
+        model_name: The name of the model to use (used if client is not provided)
         system_prompt: An optional system prompt
         temperature: The temperature for generation
+        max_tokens: The maximum number of tokens to generate
+        client: Optional OllamaClient; functions created from the same client
+            share its connection pool
+        **stop_options: Stop conditions for generate_until (stop, stop_on_json,
+            stop_labels)
         
     Returns:
         A callable function that takes a prompt and returns generated text
     """
-    client = create_ollama_client(model_name=model_name)
-    return client.create_completion_function(system_prompt=system_prompt, temperature=temperature)
+    if client is None:
+        client = create_ollama_client(model_name=model_name)
+    return client.create_completion_function(system_prompt=system_prompt, temperature=temperature,
+                                             max_tokens=max_tokens, **stop_options)
 
 def create_thought_process_function(
     client: Optional[OllamaClient] = None,
@@ -256,10 +1136,13 @@ def create_thought_process_function(
     Returns:
         A function that takes a prompt and returns a thought process
     """
+    if client is None:
+        client = create_ollama_client(base_url=base_url, model_name=model_name)
     return create_completion_function(
-        model_name=model_name,
         system_prompt=THOUGHT_PROCESS_SYSTEM_PROMPT,
-        temperature=temperature
+        temperature=temperature,
+        max_tokens=max_tokens,
+        client=client
     )
 
 def create_policy_function(
@@ -267,7 +1150,8 @@ def create_policy_function(
     temperature: float = 0.2,
     max_tokens: int = 1000,
     base_url: str = "http://localhost:11434",
-    model_name: str = "deepseek-r1:14b"
+    model_name: str = "deepseek-r1:14b",
+    stop_on_json: bool = True
 ) -> Callable[[str], str]:
     """
     Create a function for policy decisions.
@@ -278,12 +1162,50 @@ def create_policy_function(
         max_tokens: Maximum number of tokens to generate
         base_url: The base URL for the Ollama API (used if client is not provided)
         model_name: The model to use (used if client is not provided)
+        stop_on_json: Whether to stop generating once the JSON action object
+            is complete (LLMPolicy only reads that object)
         
     Returns:
         A function that takes a prompt and returns a policy decision
     """
+    if client is None:
+        client = create_ollama_client(base_url=base_url, model_name=model_name)
     return create_completion_function(
-        model_name=model_name,
         system_prompt=POLICY_SYSTEM_PROMPT,
-        temperature=temperature
+        temperature=temperature,
+        max_tokens=max_tokens,
+        client=client,
+        stop_on_json=stop_on_json
+    )
+
+def create_reward_function(
+    client: Optional[OllamaClient] = None,
+    temperature: float = 0.1,
+    max_tokens: int = 500,
+    base_url: str = "http://localhost:11434",
+    model_name: str = "deepseek-r1:14b",
+    stop_early: bool = True
+) -> Callable[[str], str]:
+    """
+    Create a function for LLM reward scoring (the llm_fn of LLMRewardModel).
+    
+    Args:
+        client: Optional OllamaClient (will be created if not provided)
+        temperature: Sampling temperature
+        max_tokens: Maximum number of tokens to generate
+        base_url: The base URL for the Ollama API (used if client is not provided)
+        model_name: The model to use (used if client is not provided)
+        stop_early: Whether to stop generating once the reward and its
+            components have been given
+        
+    Returns:
+        A function that takes a reward prompt and returns the evaluation
+    """
+    if client is None:
+        client = create_ollama_client(base_url=base_url, model_name=model_name)
+    return create_completion_function(
+        temperature=temperature,
+        max_tokens=max_tokens,
+        client=client,
+        stop_labels=REWARD_STOP_LABELS if stop_early else None
     ) 
\ No newline at end of file
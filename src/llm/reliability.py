@@ -0,0 +1,144 @@
+"""
+Reliability policies for LLM calls in the Agentic IR framework.
+
+This module provides the retry policy (bounded attempts with exponential,
+jittered backoff) and the circuit breaker used by the Ollama client. After
+repeated transient failures the breaker opens and calls fail immediately
+with CircuitOpenError, so an agent whose server is down falls back in
+microseconds instead of waiting out a timeout on every step.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .errors import CircuitOpenError
+
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter.
+
+    The delay before retry n (starting at 1) is drawn uniformly from
+    [0, min(max_delay, base_delay * 2 ** (n - 1))], which spreads out the
+    retries of clients that failed at the same moment.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Maximum number of attempts per call, including the first
+            base_delay: Upper bound of the first backoff delay in seconds
+            max_delay: Upper bound of any backoff delay in seconds
+            rng: Optional random generator for the jitter
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the backoff delay before a retry.
+
+        Args:
+            attempt: Number of attempts made so far
+
+        Returns:
+            The delay in seconds
+        """
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """
+    Circuit breaker over consecutive failures.
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    the breaker opens and rejects calls for reset_timeout seconds. It then
+    lets one trial call through (half-open): success closes the breaker,
+    failure opens it again. The breaker is thread-safe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a trial call
+            clock: Function returning the current time in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """The current state: "closed", "open" or "half_open"."""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Check that a call may be attempted.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a trial call in flight
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError("LLM server circuit is open after repeated failures",
+                               retry_after=max(0.0, remaining))
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get the breaker statistics.
+
+        Returns:
+            A dictionary with the state, consecutive failures and rejected calls
+        """
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, "rejected": self._rejected}
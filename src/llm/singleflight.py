@@ -0,0 +1,125 @@
+"""
+Request coalescing for the Agentic IR framework.
+
+This module implements single-flight deduplication: while a call for a key
+is in flight, identical calls do not start their own but wait for it and
+share its result, or its exception. The LLM clients key calls on the hash of
+the request, so concurrent sessions asking the same question (or the policy
+and the reward model sending the same prompt) cost one generation.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Thread-based single-flight group.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs block until it finishes and get the same result or exception.
+    """
+
+    def __init__(self):
+        """Initialize the group."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for the key, or wait for the call already in flight for it.
+
+        Args:
+            key: The request key
+            fn: The function to run if no call is in flight for the key
+
+        Returns:
+            The result of the call
+
+        Raises:
+            Exception: Whatever the call raised
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the coalescing statistics.
+
+        Returns:
+            A dictionary with the number of executed calls, the number of
+            calls that shared an in-flight one, and the number in flight
+        """
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
+
+class AsyncSingleFlight:
+    """
+    Asyncio single-flight group.
+
+    The first caller for a key starts the coroutine as a task; callers
+    arriving while it runs await the same task. Cancelling one waiter does
+    not cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        """Initialize the group."""
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn for the key, or await the call already in flight for it.
+
+        Args:
+            key: The request key
+            fn: The coroutine function to run if no call is in flight for the key
+
+        Returns:
+            The result of the call
+
+        Raises:
+            Exception: Whatever the call raised
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self._shared += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            self._executed += 1
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the coalescing statistics.
+
+        Returns:
+            A dictionary with the number of executed calls, the number of
+            calls that shared an in-flight one, and the number in flight
+        """
+        return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._tasks)}
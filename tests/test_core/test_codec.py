@@ -0,0 +1,121 @@
+"""
+Tests for the binary record codec.
+"""
+
+import random
+import struct
+
+import pytest
+
+from src.core.codec import BinaryCodec, CodecError, decode, encode
+from src.core.reward import RewardEvent
+from src.core.state import InformationState, StateTransition
+from src.core.thought import Thought
+
+RECORDS = [
+    InformationState(id="s1", text="Plan the trip ✈", data={"profile": {"name": "Ada", "tags": ["x"]}},
+                     metadata={"source": "test"}, parent_id=None, available_actions=["search", "ask"],
+                     timestamp=1.5),
+    StateTransition(source_state_id="s1", target_state_id="s2", action="search",
+                    action_params={"query": "flights"}, success=True, reward=0.25, timestamp=2.0),
+    Thought(id="t1", text="Check the weather", type="analyze", state_id="s1", parent_id="t0",
+            timestamp=3.0, metadata={"step": 1}),
+    RewardEvent(state_id="s2", transition_id=None, value=0.5, components={"progress": 0.5},
+                timestamp=4.0),
+    Thought(id="t2", text="Без родителя", type="reflect", state_id="s2", parent_id=None,
+            timestamp=5.0),
+]
+
+
+@pytest.fixture
+def codec():
+    return BinaryCodec()
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=lambda record: type(record).__name__)
+def test_round_trip(codec, record):
+    decoded = codec.decode(codec.encode(record))
+
+    assert type(decoded) is type(record)
+    assert decoded.model_dump() == record.model_dump()
+
+
+def test_round_trip_many(codec):
+    decoded = list(codec.iter_decode(codec.encode_many(RECORDS)))
+
+    assert [record.model_dump() for record in decoded] == [record.model_dump() for record in RECORDS]
+
+
+def test_default_codec():
+    assert decode(encode(RECORDS[0])).model_dump() == RECORDS[0].model_dump()
+
+
+def test_rejects_foreign_and_truncated_buffers(codec):
+    encoded = codec.encode(RECORDS[0])
+
+    with pytest.raises(CodecError):
+        codec.decode(b"XYZ" + encoded[3:])
+    with pytest.raises(CodecError):
+        codec.decode(encoded[:2])
+    for end in range(4, len(encoded)):
+        with pytest.raises(CodecError):
+            codec.decode(encoded[:end])
+    with pytest.raises(CodecError):
+        codec.decode(encoded + b"\0")
+
+
+def test_rejects_bad_frames(codec):
+    framed = codec.encode_many(RECORDS[:2])
+
+    with pytest.raises(CodecError):
+        list(codec.iter_decode(framed + b"\x01\x00"))
+    with pytest.raises(CodecError):
+        list(codec.iter_decode(framed[:-1]))
+    # A frame length shorter than its record
+    with pytest.raises(CodecError):
+        list(codec.iter_decode(struct.pack("<I", 10) + framed[4:]))
+
+
+def test_rejects_invalid_utf8(codec):
+    encoded = bytearray(codec.encode(RECORDS[0]))
+    start = encoded.index(b"s1")
+    encoded[start] = 0xFF
+
+    with pytest.raises(CodecError):
+        codec.decode(bytes(encoded))
+
+
+def test_rejects_malformed_dicts(codec):
+    state = InformationState(id="s", text="t", data={"k": "v"}, timestamp=0.0)
+    encoded = codec.encode(state)
+    body = b'{"k":"v"}'
+    start = encoded.index(body)
+
+    for garbage in (b"\xc1" * len(body), b"[" * len(body), b"1" + b" " * (len(body) - 1)):
+        with pytest.raises(CodecError):
+            codec.decode(encoded[:start] + garbage + encoded[start + len(body):])
+
+
+def test_rejects_unknown_dict_encodings_and_missing_text(codec):
+    encoded = bytearray(codec.encode(RECORDS[0]))
+    foreign = bytes(encoded[:5]) + b"\x01" + bytes(encoded[6:])
+    # Mark the required id field as None
+    encoded[6] |= 1
+
+    with pytest.raises(CodecError):
+        codec.decode(foreign)
+    with pytest.raises(CodecError):
+        codec.decode(bytes(encoded))
+
+
+def test_corrupted_buffers_raise_codec_errors(codec):
+    rng = random.Random(0)
+    framed = codec.encode_many(RECORDS)
+    for _ in range(500):
+        corrupted = bytearray(framed)
+        for _ in range(rng.randint(1, 4)):
+            corrupted[rng.randrange(len(corrupted))] = rng.randrange(256)
+        try:
+            list(codec.iter_decode(bytes(corrupted)))
+        except CodecError:
+            pass
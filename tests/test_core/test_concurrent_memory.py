@@ -0,0 +1,196 @@
+"""
+Stress tests for the thread-safe memory implementations.
+
+Writer threads add, link and remove states while reader threads query
+memory; afterwards every index must agree with ``memory.states``.
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from src.core.index import ExperienceIndex
+from src.core.memory import ConcurrentMemory, DecayingMemory, InMemoryStorage, ShardedMemory
+from src.core.shared_data import SharedDataStore
+from src.core.similarity import SimilarityEngine
+from src.core.state import InformationState, StateTransition
+
+WRITERS = 4
+READERS = 4
+STATES_PER_WRITER = 150
+
+
+def make_memory(kind: str):
+    options = dict(experience_index=ExperienceIndex(dim=64), similarity_engine=SimilarityEngine(),
+                   data_store=SharedDataStore())
+    if kind == "decaying":
+        return DecayingMemory(half_life=3600.0, **options)
+    return ConcurrentMemory(**options)
+
+
+def writer(memory, w: int, errors: list) -> None:
+    try:
+        profile = {"name": "Ada", "interests": ["travel", "music"]}
+        for i in range(STATES_PER_WRITER):
+            state_id = f"w{w}-{i}"
+            parent_id = f"w{w}-{i - 1}" if i else None
+            memory.add_state(InformationState(
+                id=state_id, text=f"writer {w} step {i} topic {i % 7}", parent_id=parent_id,
+                data={"profile": profile, "step": {"writer": w, "i": i}}, timestamp=float(i)
+            ))
+            if parent_id is not None:
+                memory.add_transition(StateTransition(
+                    source_state_id=parent_id, target_state_id=state_id, action=f"a{i % 3}",
+                    success=i % 2 == 0, reward=0.1, timestamp=float(i)
+                ))
+            if i % 5 == 4:
+                memory.remove_state(f"w{w}-{i - 3}")
+    except Exception as e:
+        errors.append(e)
+
+
+def reader(memory, seed: int, stop: threading.Event, errors: list) -> None:
+    rng = random.Random(seed)
+    try:
+        while not stop.is_set():
+            state_id = f"w{rng.randrange(WRITERS)}-{rng.randrange(STATES_PER_WRITER)}"
+            query = InformationState(id="query", text=f"step topic {rng.randrange(7)}", timestamp=0.0)
+            memory.get_state(state_id)
+            memory.get_state_history(state_id, max_depth=10)
+            memory.get_ancestor(state_id, 3)
+            memory.get_transitions_from(state_id)
+            memory.search_states("topic", limit=3)
+            memory.get_relevant_experiences(query, max_results=3)
+            memory.find_similar_states(query, limit=3, metric="cosine")
+    except Exception as e:
+        errors.append(e)
+
+
+def sweeper(memory, stop: threading.Event, errors: list) -> None:
+    try:
+        while not stop.is_set():
+            memory.sweep()
+    except Exception as e:
+        errors.append(e)
+
+
+def assert_consistent(memory) -> None:
+    ids = set(memory.states)
+
+    assert len(memory.recency_index) == len(ids)
+    assert set(memory.recency_index.most_recent()) == ids
+
+    search_index = memory.search_index
+    assert set(search_index._doc_terms) == ids
+    assert all(set(postings) <= ids for postings in search_index._postings.values())
+    assert search_index._total_length == sum(search_index._doc_lengths.values())
+
+    assert set(memory.ancestor_index._parents) == ids
+    for state_id in ids:
+        history = memory.get_state_history(state_id)
+        assert history[-1].id == state_id
+        assert {state.id for state in history} <= ids
+
+    table = memory.transition_table
+    for transition_id in table.ids():
+        transition = table.get(transition_id)
+        assert transition.source_state_id in ids
+        assert transition.target_state_id in ids
+    for state_id in ids:
+        assert all(t.source_state_id == state_id for t in memory.get_transitions_from(state_id))
+
+    assert set(memory.experience_index._rows) == ids
+    assert set(memory.similarity_engine._rows) == ids
+
+    # The shared data holds exactly the sub-objects of the stored states
+    fresh = SharedDataStore()
+    for state in memory.states.values():
+        fresh.intern_data(state.data)
+    assert len(memory.data_store) == len(fresh)
+
+
+@pytest.mark.parametrize("kind", ["concurrent", "decaying"])
+def test_concurrent_writers_and_readers(kind):
+    memory = make_memory(kind)
+    errors: list = []
+    stop = threading.Event()
+
+    writers = [threading.Thread(target=writer, args=(memory, w, errors)) for w in range(WRITERS)]
+    others = [threading.Thread(target=reader, args=(memory, seed, stop, errors)) for seed in range(READERS)]
+    if kind == "decaying":
+        others.append(threading.Thread(target=sweeper, args=(memory, stop, errors)))
+    for thread in others + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in others:
+        thread.join()
+
+    assert errors == []
+    # Each writer removes one of every 5 of its states
+    assert len(memory.states) == WRITERS * (STATES_PER_WRITER - STATES_PER_WRITER // 5)
+    assert_consistent(memory)
+    if kind == "decaying":
+        assert set(memory._importance) == set(memory.states)
+        assert set(memory._last_access) == set(memory.states)
+
+
+class SlowStorage(InMemoryStorage):
+    """In-memory shard whose writes take long enough to overlap an unload."""
+
+    def add_state(self, state: InformationState) -> None:
+        time.sleep(0.0001)
+        super().add_state(state)
+
+
+def test_sharded_memory_with_concurrent_unloads(tmp_path):
+    memory = ShardedMemory(shard_factory=lambda key: SlowStorage(), storage_path=str(tmp_path))
+    steps = 40
+    errors: list = []
+    stop = threading.Event()
+
+    def session(w: int) -> None:
+        try:
+            for i in range(steps):
+                parent_id = f"w{w}-{i - 1}" if i else None
+                memory.add_state(InformationState(
+                    id=f"w{w}-{i}", text=f"writer {w} step {i}", parent_id=parent_id,
+                    metadata={"session_id": f"user-{w}"} if not i else {}, timestamp=float(i)
+                ))
+                if parent_id is not None:
+                    memory.add_transition(StateTransition(
+                        source_state_id=parent_id, target_state_id=f"w{w}-{i}", action="next",
+                        success=True, timestamp=float(i)
+                    ))
+        except Exception as e:
+            errors.append(e)
+
+    def evictor() -> None:
+        try:
+            while not stop.is_set():
+                memory.unload_idle(0.0)
+                memory.search_states("step", limit=3)
+        except Exception as e:
+            errors.append(e)
+
+    # One writer per session, so the in-memory shards only see one writer each
+    sessions = [threading.Thread(target=session, args=(w,)) for w in range(WRITERS)]
+    evictors = [threading.Thread(target=evictor) for _ in range(2)]
+    for thread in evictors + sessions:
+        thread.start()
+    for thread in sessions:
+        thread.join()
+    stop.set()
+    for thread in evictors:
+        thread.join()
+
+    assert errors == []
+    # No write was lost to a shard that was unloaded meanwhile
+    for w in range(WRITERS):
+        last = f"w{w}-{steps - 1}"
+        assert [state.id for state in memory.get_state_history(last)] == [
+            f"w{w}-{i}" for i in range(steps)]
+        assert len(memory.get_transitions_from(f"w{w}-0")) == 1
@@ -0,0 +1,76 @@
+"""
+Tests for the experience index and similarity-based experience retrieval.
+"""
+
+import time
+
+import numpy as np
+
+from src.core.index import ExperienceIndex
+from src.core.memory import InMemoryStorage
+from src.core.state import InformationState, StateTransition
+
+
+def make_state(state_id: str, text: str, timestamp: float) -> InformationState:
+    return InformationState(id=state_id, text=text, timestamp=timestamp)
+
+
+def make_transition(source_id: str, target_id: str, success: bool = True) -> StateTransition:
+    return StateTransition(source_state_id=source_id, target_state_id=target_id,
+                           action="act", success=success, timestamp=time.time())
+
+
+def test_embed_does_not_mutate_embedding():
+    stored = np.array([3.0, 4.0], dtype=np.float32)
+    index = ExperienceIndex(embedding_fn=lambda text: stored)
+
+    vector = index.embed("anything")
+
+    np.testing.assert_allclose(vector, [0.6, 0.8])
+    np.testing.assert_array_equal(stored, [3.0, 4.0])
+
+
+def test_relevant_experiences_fall_back_to_recency():
+    memory = InMemoryStorage(experience_index=ExperienceIndex())
+    for i in range(3):
+        memory.add_state(make_state(f"s{i}", f"alpha beta {i}", float(i)))
+    memory.add_state(make_state("end", "end", 10.0))
+    for i in range(3):
+        memory.add_transition(make_transition(f"s{i}", "end"))
+
+    # No word in common with any stored state: the most recent ones are used
+    query = make_state("q", "zeta", 20.0)
+    results = memory.get_relevant_experiences(query, max_results=2)
+
+    assert [past_state.id for past_state, _ in results] == ["s2", "s1"]
+
+
+def test_relevant_experiences_fill_after_similar_states():
+    memory = InMemoryStorage(experience_index=ExperienceIndex())
+    memory.add_state(make_state("old", "invoice payment overdue", 0.0))
+    memory.add_state(make_state("new", "weather forecast", 1.0))
+    memory.add_state(make_state("end", "end", 2.0))
+    memory.add_transition(make_transition("old", "end"))
+    memory.add_transition(make_transition("new", "end"))
+
+    query = make_state("q", "overdue invoice", 3.0)
+    results = memory.get_relevant_experiences(query, max_results=3)
+
+    assert [past_state.id for past_state, _ in results] == ["old", "new"]
+
+
+def test_removed_rows_are_compacted():
+    index = ExperienceIndex(dim=64, initial_capacity=4)
+    index.add("keep", "kept state")
+    index.mark_transition("keep", success=True)
+    for i in range(500):
+        index.add(f"s{i}", f"state {i}")
+        index.remove(f"s{i}")
+
+    assert len(index) == 1
+    assert len(index._ids) <= 2 * ExperienceIndex.COMPACT_MIN_ROWS
+    assert index.top_k("kept state", 1, successful_only=True)[0][0] == "keep"
+
+    index.add("other", "other state")
+    index.mark_transition("other", success=False)
+    assert {state_id for state_id, _ in index.top_k("state", 5)} == {"keep", "other"}
@@ -0,0 +1,67 @@
+"""
+Tests for the record construction fast path.
+"""
+
+import uuid
+
+import pytest
+
+from src.core.records import construct, new_id, new_state, new_transition
+from src.core.reward import RewardEvent
+from src.core.state import InformationState, StateTransition
+from src.core.thought import Thought
+
+# The instance attributes construct() sets directly
+INSTANCE_ATTRIBUTES = ("__dict__", "__pydantic_fields_set__", "__pydantic_extra__", "__pydantic_private__")
+
+VALUES = [
+    (InformationState, {"id": "s1", "text": "Plan the trip", "data": {"k": [1]}, "parent_id": "s0",
+                        "available_actions": ["search"], "timestamp": 1.5}),
+    (InformationState, {"id": "s2", "text": "Minimal", "timestamp": 2.0}),
+    (StateTransition, {"source_state_id": "s1", "target_state_id": "s2", "action": "search",
+                       "success": True, "reward": 0.25, "timestamp": 3.0}),
+    (Thought, {"text": "Check the weather", "type": "analyze", "state_id": "s1", "timestamp": 4.0}),
+    (RewardEvent, {"state_id": "s2", "value": 0.5, "components": {"progress": 0.5}, "timestamp": 5.0}),
+]
+
+
+def assert_same_instance(built, validated):
+    assert type(built) is type(validated)
+    for name in INSTANCE_ATTRIBUTES:
+        assert getattr(built, name) == getattr(validated, name), name
+    assert built == validated
+    assert built.model_dump_json() == validated.model_dump_json()
+
+
+@pytest.mark.parametrize("model_cls, values", VALUES, ids=lambda value: getattr(value, "__name__", ""))
+def test_construct_matches_validation(model_cls, values):
+    validated = model_cls(**values)
+    # Default factories (such as Thought's random ID) must match too
+    if "id" in model_cls.model_fields and "id" not in values:
+        values = {**values, "id": validated.id}
+        validated = model_cls(**values)
+
+    assert_same_instance(construct(model_cls, dict(values)), validated)
+
+
+def test_fast_path_helpers_match_validation():
+    state = new_state("Plan the trip", parent_id="s0", data={"k": 1}, state_id="s1", timestamp=1.0)
+    transition = new_transition("s0", "s1", "search", reward=1, timestamp=2.0)
+
+    assert_same_instance(state, InformationState(id="s1", text="Plan the trip", parent_id="s0",
+                                                 data={"k": 1}, timestamp=1.0))
+    assert_same_instance(transition, StateTransition(source_state_id="s0", target_state_id="s1",
+                                                     action="search", success=True, reward=1.0,
+                                                     timestamp=2.0, action_params={}, metadata={}))
+
+
+def test_construct_requires_fields_without_defaults():
+    with pytest.raises(TypeError):
+        construct(StateTransition, {"source_state_id": "s1"})
+
+
+def test_new_id_is_a_uuid4():
+    value = new_id()
+
+    assert str(uuid.UUID(value)) == value
+    assert uuid.UUID(value).version == 4
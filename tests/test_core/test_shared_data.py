@@ -0,0 +1,143 @@
+"""
+Tests for the structurally shared state data store.
+"""
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from src.core.memory import InMemoryStorage, PersistentMemory
+from src.core.shared_data import FrozenDict, SharedDataStore
+from src.core.state import InformationState
+
+
+def make_state(state_id: str, data: dict) -> InformationState:
+    return InformationState(id=state_id, text=state_id, data=data, timestamp=0.0)
+
+
+def test_interned_values_are_shared_and_immutable():
+    store = SharedDataStore()
+    first = store.intern({"profile": {"name": "Ada", "tags": ["a", "b"]}})
+    second = store.intern({"profile": {"name": "Ada", "tags": ["a", "b"]}})
+
+    assert first is second
+    assert isinstance(first["profile"], FrozenDict)
+    assert first["profile"]["tags"] == ("a", "b")
+    with pytest.raises(TypeError):
+        first["profile"]["name"] = "Eve"
+    with pytest.raises(TypeError):
+        first["profile"].update(name="Eve")
+    assert json.loads(json.dumps(first)) == {"profile": {"name": "Ada", "tags": ["a", "b"]}}
+    assert copy.deepcopy(first) is first
+    assert pickle.loads(pickle.dumps(first)) == first
+
+
+def shared_memory() -> InMemoryStorage:
+    return InMemoryStorage(data_store=SharedDataStore())
+
+
+def test_memory_keeps_data_types_by_default():
+    memory = InMemoryStorage()
+    state = make_state("s", {"items": [1], "profile": {"name": "Ada"}})
+    memory.add_state(state)
+
+    stored = memory.get_state("s")
+    assert stored is state
+    assert type(stored.data["items"]) is list and type(stored.data["profile"]) is dict
+    stored.data["items"].append(2)
+    assert memory.get_state("s").data["items"] == [1, 2]
+
+
+def test_shared_memory_hands_out_read_only_data():
+    memory = shared_memory()
+    memory.add_state(make_state("a", {"items": [1], "profile": {"name": "Ada"}}))
+    memory.add_state(make_state("b", {"items": [1], "profile": {"name": "Ada"}}))
+
+    first, second = memory.get_state("a"), memory.get_state("b")
+    assert first.data["profile"] is second.data["profile"]
+    # Lists come back as tuples and dicts as FrozenDicts (still dicts)
+    assert first.data["items"] == (1,)
+    assert isinstance(first.data["profile"], dict) and isinstance(first.data["profile"], FrozenDict)
+    with pytest.raises(AttributeError):
+        first.data["items"].append(2)
+    with pytest.raises(TypeError):
+        first.data["profile"]["name"] = "Eve"
+    # The top-level dict is the state's own; build new values to change it
+    first.data["items"] = [*first.data["items"], 2]
+    assert second.data["items"] == (1,)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_persistent_memory_round_trip(tmp_path, shared):
+    options = {"data_store": SharedDataStore()} if shared else {}
+    memory = PersistentMemory(str(tmp_path), **options)
+    memory.add_state(make_state("s", {"items": [1, {"k": "v"}], "profile": {"name": "Ada"}}))
+
+    loaded = PersistentMemory(str(tmp_path), **options).get_state("s")
+    items = (1, {"k": "v"}) if shared else [1, {"k": "v"}]
+    assert loaded.data == {"items": items, "profile": {"name": "Ada"}}
+    assert isinstance(loaded.data["profile"], FrozenDict) is shared
+
+
+def test_add_state_leaves_caller_data_alone():
+    memory = shared_memory()
+    profile = {"name": "Ada"}
+    state = make_state("s1", {"profile": profile})
+    memory.add_state(state)
+    memory.add_state(make_state("s2", {"profile": {"name": "Ada"}}))
+
+    # The caller's dict is neither replaced nor shared with memory
+    assert state.data["profile"] is profile
+    profile["name"] = "Eve"
+    assert memory.get_state("s1").data["profile"] == {"name": "Ada"}
+    assert memory.get_state("s2").data["profile"] == {"name": "Ada"}
+
+
+def test_digest_follows_content():
+    store = SharedDataStore()
+    value = {"a": [1, 2]}
+    digest = store.digest(value)
+    value["a"].append(3)
+
+    assert store.digest(value) != digest
+    assert store.digest({"a": [1, 2, 3]}) == store.digest(value)
+    assert store.digest(store.intern(value)) == store.digest(value)
+    assert len(store) == 2
+
+
+def test_removed_states_release_their_data():
+    memory = shared_memory()
+    memory.add_state(make_state("keep", {"profile": {"name": "Ada"}}))
+    baseline = len(memory.data_store)
+
+    for i in range(500):
+        memory.add_state(make_state(f"s{i}", {"profile": {"name": "Ada"}, "step": {"n": [i]}}))
+        memory.remove_state(f"s{i}")
+
+    assert len(memory.data_store) == baseline
+    assert memory.get_state("keep").data["profile"] == {"name": "Ada"}
+
+    memory.remove_state("keep")
+    assert len(memory.data_store) == 0
+
+
+def test_replacing_a_state_releases_its_old_data():
+    memory = shared_memory()
+    memory.add_state(make_state("s", {"context": {"step": 1}}))
+    memory.add_state(make_state("s", {"context": {"step": 2}}))
+
+    assert len(memory.data_store) == 1
+    assert memory.get_state("s").data["context"] == {"step": 2}
+
+
+def test_opaque_values_are_not_shared():
+    store = SharedDataStore()
+    marker = object()
+    value = store.intern({"a": {"b": 1}, "c": marker})
+
+    assert value["c"] is marker
+    assert store.digest(value) is None
+    store.release(value)
+    assert len(store) == 0
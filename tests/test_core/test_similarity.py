@@ -0,0 +1,54 @@
+"""
+Tests for the sparse similarity engine.
+"""
+
+import random
+
+import pytest
+
+from src.core.similarity import SimilarityEngine, jaccard
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa".split()
+
+
+def random_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+
+
+def test_scores_match_pairwise_jaccard():
+    rng = random.Random(0)
+    engine = SimilarityEngine(initial_capacity=2)
+    texts = {f"s{i}": random_text(rng) for i in range(50)}
+    for state_id, text in texts.items():
+        engine.add(state_id, text)
+
+    query = "alpha beta gamma"
+    scores = engine.score(query, texts)
+    assert scores == pytest.approx([jaccard(query, text) for text in texts.values()])
+
+
+def test_removed_rows_are_compacted():
+    rng = random.Random(1)
+    engine = SimilarityEngine(initial_capacity=4)
+    texts = {f"keep{i}": random_text(rng) for i in range(10)}
+    for state_id, text in texts.items():
+        engine.add(state_id, text)
+    for i in range(1000):
+        engine.add(f"tmp{i}", random_text(rng) + f" unique{i}")
+        engine.remove(f"tmp{i}")
+        # Re-adding a state replaces its row
+        engine.add("keep0", texts["keep0"])
+
+    assert len(engine) == 10
+    assert len(engine._ids) <= 2 * SimilarityEngine.COMPACT_MIN_ROWS
+    # Column entries and terms of compacted rows are dropped too
+    assert sum(len(rows) for rows in engine._column_rows) <= 2 * SimilarityEngine.COMPACT_MIN_ROWS * 7
+    assert len(engine._vocabulary) <= len(WORDS) + 2 * SimilarityEngine.COMPACT_MIN_ROWS
+
+    query = "alpha delta"
+    for metric in SimilarityEngine.METRICS:
+        scores = engine.score(query, texts, metric=metric)
+        assert len(scores) == 10
+    assert engine.score(query, texts) == pytest.approx([jaccard(query, text) for text in texts.values()])
+    assert engine.score(query, ["tmp999"]) == [0.0]
+    assert all(state_id in texts for state_id, _ in engine.top_k(query, 20))
@@ -0,0 +1,81 @@
+"""
+Tests for exporting transitions to the trajectory store.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.core.memory import ConcurrentMemory, InMemoryStorage
+from src.core.state import InformationState, StateTransition
+from src.core.trajectory import TrajectoryStore
+
+
+def make_transition(i: int) -> StateTransition:
+    return StateTransition(source_state_id=f"s{i}", target_state_id=f"s{i + 1}",
+                           action=f"a{i % 3}", success=i % 2 == 0, reward=float(i),
+                           timestamp=time.time())
+
+
+def test_export_and_reload(tmp_path):
+    memory = InMemoryStorage()
+    for i in range(6):
+        memory.add_transition(make_transition(i))
+
+    store = TrajectoryStore.from_memory(memory)
+    store.save(str(tmp_path / "trajectories"))
+    loaded = TrajectoryStore.load(str(tmp_path / "trajectories"))
+
+    assert len(store) == len(loaded) == 6
+    assert store.transitions["reward"].tolist() == [float(i) for i in range(6)]
+    assert loaded.mean_reward_per_action() == pytest.approx({"a0": 1.5, "a1": 2.5, "a2": 3.5})
+    assert loaded.success_rate_per_action() == pytest.approx({"a0": 0.5, "a1": 0.5, "a2": 0.5})
+
+
+def test_export_skips_removed_transitions():
+    memory = ConcurrentMemory()
+    ids = [memory.add_transition(make_transition(i)) for i in range(4)]
+    memory.transition_table.remove(ids[1])
+
+    store = TrajectoryStore.from_memory(memory)
+
+    assert len(store) == 3
+    assert sorted(store.transitions["reward"].tolist()) == [0.0, 2.0, 3.0]
+    assert set(store.action_names) == {"a0", "a1", "a2"}
+
+
+def test_export_while_writing():
+    memory = ConcurrentMemory()
+    for i in range(4):
+        memory.add_state(InformationState(id=f"s{i}", text=f"state {i}", timestamp=float(i)))
+    errors = []
+    stop = threading.Event()
+
+    def write(offset: int) -> None:
+        try:
+            for i in range(2000):
+                memory.add_transition(make_transition(offset + i))
+        except Exception as e:
+            errors.append(e)
+
+    def export() -> None:
+        try:
+            while not stop.is_set():
+                store = TrajectoryStore.from_memory(memory)
+                assert len(store) <= len(memory.transition_table)
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=write, args=(k * 10000,)) for k in range(2)]
+    exporter = threading.Thread(target=export)
+    exporter.start()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    exporter.join()
+
+    assert errors == []
+    assert len(TrajectoryStore.from_memory(memory)) == 4000
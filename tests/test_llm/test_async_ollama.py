@@ -0,0 +1,94 @@
+"""
+Tests for the asyncio Ollama client.
+"""
+
+import asyncio
+import io
+import json
+import threading
+import time
+
+from src.llm.async_ollama import AsyncOllamaClient
+
+
+class Body(io.BytesIO):
+    """The raw body of a reply, read like urllib3's."""
+
+    def read1(self, size: int = -1, decode_content: bool = True) -> bytes:
+        return super().read1(size)
+
+
+class Reply:
+    """A complete (not streamed) Ollama response."""
+
+    status_code = 200
+
+    def __init__(self, body: dict):
+        self.body = body
+        self.text = json.dumps(body)
+        self.raw = Body(self.text.encode())
+
+    def json(self) -> dict:
+        return self.body
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Reply":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def embedding(text: str) -> list:
+    return [float(len(text)), float(sum(map(ord, text)) % 97)]
+
+
+class SlowServer:
+    """Replaces a session's post, answering after a delay and recording the peak number of requests in flight."""
+
+    def __init__(self, session, delay: float):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+        self.embed_requests = 0
+        session.post = self
+
+    def __call__(self, url: str, **kwargs) -> Reply:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            time.sleep(self.delay)
+            payload = kwargs["json"]
+            if url.endswith("/api/embed"):
+                with self._lock:
+                    self.embed_requests += 1
+                return Reply({"embeddings": [embedding(text) for text in payload["input"]]})
+            return Reply({"model": payload["model"], "response": "ok", "done": True})
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+def test_embed_many_respects_the_in_flight_limit():
+    client = AsyncOllamaClient(max_in_flight=2, base_url="http://127.0.0.1:9", model_name="fake")
+    server = SlowServer(client.client.session, delay=0.02)
+    texts = [f"text {i % 30}" for i in range(60)]
+
+    async def run():
+        return await asyncio.gather(
+            client.aembed_many(texts, batch_size=4),
+            *(client.agenerate(f"prompt {i}") for i in range(4))
+        )
+
+    vectors, *generations = asyncio.run(run())
+    client.client.close()
+
+    assert server.peak == 2
+    assert vectors == [embedding(text) for text in texts]
+    assert all(generation["response"] == "ok" for generation in generations)
+    # Distinct texts are embedded once, in batches of 4
+    assert server.embed_requests == 8
@@ -0,0 +1,104 @@
+"""
+Tests for the response and embedding caches.
+"""
+
+import numpy as np
+
+from src.llm.cache import EmbeddingCache, ResponseCache
+from src.llm.ollama import OllamaClient
+
+
+def test_request_key():
+    key = ResponseCache.key("m", None, "p", 0.0, 10)
+
+    assert key == ResponseCache.key("m", "", "p", 0, 10)
+    assert key != ResponseCache.key("m", None, "p", 0.5, 10)
+    assert key != ResponseCache.key("m", None, "p", 0.0, 10, stop_on_json=True)
+    # Options left at their defaults do not change the key
+    assert key == ResponseCache.key("m", None, "p", 0.0, 10, stop=None, stop_on_json=False)
+
+
+def test_lru_hits_and_misses():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 1, 2)
+
+
+def test_disk_tier(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(path=path)
+    cache.put("k", "stored")
+    cache.close()
+
+    reopened = ResponseCache(max_entries=1, path=path)
+    assert reopened.get("k") == "stored"
+    assert reopened.get("k") == "stored"
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.clear()
+    assert reopened.get("k") is None
+    reopened.close()
+
+
+def test_sampled_completions_bypass_the_cache():
+    cache = ResponseCache()
+
+    assert cache.should_cache(0.0)
+    assert not cache.should_cache(0.7)
+    assert cache.stats()["bypassed"] == 1
+    assert ResponseCache(cache_sampled=True).should_cache(0.7)
+
+
+class CountingGenerate:
+    """Stands in for OllamaClient.generate, counting the generations."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.calls = 0
+
+    def __call__(self, prompt: str, **kwargs):
+        self.calls += 1
+        return {"response": self.reply}
+
+
+def test_completion_function_uses_the_cache():
+    cache = ResponseCache()
+    client = OllamaClient(base_url="http://127.0.0.1:9", model_name="fake", cache=cache)
+    client.generate = generate = CountingGenerate("cached reply")
+    greedy = client.create_completion_function(temperature=0.0)
+    sampled = client.create_completion_function(temperature=0.7)
+
+    assert [greedy("question") for _ in range(3)] == ["cached reply"] * 3
+    assert generate.calls == 1
+    assert [sampled("question") for _ in range(2)] == ["cached reply"] * 2
+    assert generate.calls == 3
+
+    client.cache = ResponseCache(cache_sampled=True)
+    sampled("question")
+    sampled("question")
+    assert generate.calls == 4
+    client.close()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (2, 1, 2)
+
+
+def test_embedding_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "embed:model", initial_capacity=1)
+    cache.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    cache.put("c", [0.5, 0.5])
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "embed:model")
+    vectors = reopened.get_many(["b", "missing", "c"])
+    np.testing.assert_allclose(vectors[0], [0.0, 1.0])
+    assert vectors[1] is None
+    np.testing.assert_allclose(vectors[2], [0.5, 0.5])
+    assert EmbeddingCache(str(tmp_path), "other").get("a") is None
+    reopened.close()
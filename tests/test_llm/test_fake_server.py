@@ -0,0 +1,127 @@
+"""
+End-to-end tests of the Ollama clients against the fake Ollama server.
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.llm.async_ollama import AsyncOllamaClient
+from src.llm.errors import LLMTimeoutError
+from src.llm.fake_server import FakeOllamaServer, RuleBasedResponder, ScriptedResponder
+from src.llm.ollama import OllamaClient
+from src.llm.reliability import RetryPolicy
+
+
+def make_client(server: FakeOllamaServer, **kwargs) -> OllamaClient:
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001))
+    return OllamaClient(base_url=server.base_url, model_name="fake", coalesce=False, **kwargs)
+
+
+def test_rule_based_replies():
+    responder = RuleBasedResponder(thought_words=8)
+    action_prompt = ('Current state: find papers on graphs\nAvailable Actions: search, summarize\n'
+                     'Answer with a JSON object with an "action" key.')
+    reward_prompt = "Target state: papers on graphs\nCurrent state: papers on trees\nGive the Reward:"
+
+    decision = json.loads(responder(action_prompt, {}))
+    assert decision["action"] in {"search", "summarize"}
+    assert responder(action_prompt, {}) == responder(action_prompt, {})
+    assert responder(reward_prompt, {}).startswith("Reward: 0.33\n")
+    assert len(responder("Analyze the state.", {}).split()) == 8
+
+
+def test_scripted_replies_cycle():
+    responder = ScriptedResponder(["a", "b"])
+
+    assert [responder("prompt", {}) for _ in range(3)] == ["a", "b", "a"]
+
+
+def test_generate_until_cuts_the_stream():
+    reply = '<think>{"draft": 1}</think> {"action": "search"} trailing words that are never needed'
+    with FakeOllamaServer(responder=reply) as server:
+        client = make_client(server)
+        result = client.generate_until("prompt", stop_on_json=True, raise_errors=True)
+        unstopped = client.generate_until("prompt", raise_errors=True)
+        client.close()
+
+    assert result["stopped"] is True
+    assert result["response"] == '<think>{"draft": 1}</think> {"action": "search"}'
+    assert "context" not in result
+    assert unstopped["stopped"] is False
+    assert unstopped["response"] == reply
+
+
+def test_transient_failures_are_retried():
+    with FakeOllamaServer(responder="ok", failures=2) as server:
+        client = make_client(server)
+        result = client.generate("prompt", raise_errors=True)
+        client.close()
+
+    assert result["response"] == "ok"
+    assert server.stats()["requests"] == 3
+    assert server.stats()["failures"] == 2
+
+
+def test_slow_server_hits_the_deadline():
+    with FakeOllamaServer(responder="ok", latency=0.5) as server:
+        client = make_client(server)
+        with pytest.raises(LLMTimeoutError):
+            client.generate("prompt", deadline=0.1, raise_errors=True)
+        client.close()
+
+
+def test_session_continues_from_the_context():
+    with FakeOllamaServer(responder="noted") as server:
+        client = make_client(server)
+        session = client.create_session(system_prompt="You are terse.")
+        session("first step with a long shared state")
+        first = server.stats()["prompt_tokens"]
+        session("second step")
+        client.close()
+
+    # The second call only evaluates its own words
+    assert server.stats()["prompt_tokens"] - first == 2
+
+
+def test_embed_many_against_the_server():
+    with FakeOllamaServer(responder="ok", latency=0.02, embedding_dim=4) as server:
+        client = AsyncOllamaClient(max_in_flight=2, base_url=server.base_url, model_name="fake")
+        texts = [f"text {i % 30}" for i in range(60)]
+
+        async def run():
+            return await asyncio.gather(
+                client.aembed_many(texts, batch_size=4),
+                *(client.agenerate(f"prompt {i}") for i in range(4))
+            )
+
+        vectors, *generations = asyncio.run(run())
+        client.client.close()
+
+    assert vectors == [server.embedding(text) for text in texts]
+    assert all(generation["response"] == "ok" for generation in generations)
+    assert server.stats()["embeddings"] == 8
+
+
+def test_concurrent_greedy_completions_share_one_generation():
+    with FakeOllamaServer(responder="shared", latency=0.3) as server:
+        client = OllamaClient(base_url=server.base_url, model_name="fake", pool_size=8)
+        completion_fn = client.create_completion_function(temperature=0.0)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(completion_fn("same prompt"))
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+
+    assert results == ["shared"] * 8
+    assert server.stats()["generations"] == 1
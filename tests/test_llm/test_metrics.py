@@ -0,0 +1,45 @@
+"""
+Tests for the per-component LLM call metrics.
+"""
+
+import json
+
+from src.llm.metrics import MetricsRegistry, current_caller, tag_caller
+
+COMPLETE = {"prompt_eval_count": 100, "eval_count": 20, "prompt_eval_duration": 5 * 10 ** 8,
+            "eval_duration": 10 ** 9, "total_duration": 2 * 10 ** 9}
+
+
+def test_token_means_only_cover_calls_that_report_counts():
+    registry = MetricsRegistry()
+    registry.record("policy", 0.5, COMPLETE, prompt_chars=400)
+    # An early-stopped stream reports no token counts
+    registry.record("policy", 0.1, {"response": "partial"}, prompt_chars=400)
+
+    summary = registry.summary("policy")["policy"]
+    assert summary["calls"] == 2
+    assert summary["prompt_token_calls"] == 1
+    assert summary["prompt_tokens_mean"] == 100
+    assert summary["prompt_chars_mean"] == 400
+    assert summary["prompt_tokens_per_s"] == 200
+    assert summary["tokens_per_s"] == 20
+
+
+def test_unknown_token_counts_are_none():
+    registry = MetricsRegistry()
+    registry.record("reward", 0.2, {"response": "Reward: 0.5"})
+    registry.record("reward", 0.3, error=True)
+
+    summary = registry.summary()["reward"]
+    assert summary["prompt_tokens_mean"] is None
+    assert summary["prompt_tokens_per_s"] is None
+    assert summary["tokens_per_s"] is None
+    assert json.loads(registry.to_json())["reward"]["prompt_tokens_mean"] is None
+
+
+def test_tag_caller_nests():
+    with tag_caller("policy"):
+        with tag_caller("thought.analyze"):
+            assert current_caller() == "thought.analyze"
+        assert current_caller() == "policy"
+    assert current_caller() is None
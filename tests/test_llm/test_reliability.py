@@ -0,0 +1,260 @@
+"""
+Tests for retries, deadlines and the circuit breaker of the Ollama client.
+"""
+
+import io
+import json
+import random
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from src.llm.errors import CircuitOpenError, LLMConnectionError, LLMServerError, LLMTimeoutError
+from src.llm.ollama import OllamaClient
+from src.llm.reliability import CircuitBreaker, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Body(io.BytesIO):
+    """The raw body of a reply, read like urllib3's."""
+
+    def read1(self, size: int = -1, decode_content: bool = True) -> bytes:
+        return super().read1(size)
+
+
+class Reply:
+    """A complete (not streamed) Ollama response."""
+
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self.body = body
+        self.text = json.dumps(body)
+        self.raw = Body(self.text.encode())
+
+    def json(self) -> dict:
+        return self.body
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Reply":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class FlakyServer:
+    """Replaces a session's post: answers with the given error statuses first, then with "ok"."""
+
+    def __init__(self, session, statuses=(), latency: float = 0.0):
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.requests = 0
+        session.post = self
+
+    def __call__(self, url: str, **kwargs) -> Reply:
+        self.requests += 1
+        read_timeout = kwargs["timeout"][1]
+        if read_timeout is not None and read_timeout < self.latency:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout("read timed out")
+        time.sleep(self.latency)
+        if self.statuses:
+            status = self.statuses.pop(0)
+            return Reply(status, {"error": f"status {status}"})
+        return Reply(200, {"model": kwargs["json"]["model"], "response": "ok", "done": True})
+
+
+class TricklingServer:
+    """An HTTP server on a real socket that sends each response body one byte at a time."""
+
+    def __init__(self, body: bytes, interval: float, streamed: bool = False):
+        self.body = body
+        self.interval = interval
+        self.streamed = streamed
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.base_url = f"http://127.0.0.1:{self.listener.getsockname()[1]}"
+        self.stopped = threading.Event()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._answer, args=(connection,), daemon=True).start()
+
+    def _answer(self, connection: socket.socket) -> None:
+        with connection:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                request += connection.recv(4096)
+            if self.streamed:
+                # One chunk holding one NDJSON line, as Ollama streams a token
+                head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                head += f"{len(self.body):x}\r\n".encode()
+            else:
+                head = f"HTTP/1.1 200 OK\r\nContent-Length: {len(self.body)}\r\n\r\n".encode()
+            try:
+                connection.sendall(head)
+                for i in range(len(self.body)):
+                    if self.stopped.wait(self.interval):
+                        return
+                    connection.sendall(self.body[i:i + 1])
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.listener.close()
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_client(base_url: str = "http://127.0.0.1:9", **kwargs) -> OllamaClient:
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001))
+    return OllamaClient(base_url=base_url, model_name="fake", coalesce=False, **kwargs)
+
+
+def test_retry_delays_are_bounded():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=2.0, rng=random.Random(0))
+
+    for attempt, bound in [(1, 0.5), (2, 1.0), (3, 2.0), (6, 2.0)]:
+        assert all(0.0 <= policy.delay(attempt) <= bound for _ in range(100))
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+
+
+def test_breaker_opens_and_lets_one_trial_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 4.0
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.retry_after == pytest.approx(6.0)
+
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # A failed trial opens the breaker again
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats() == {"state": CircuitBreaker.CLOSED, "consecutive_failures": 0, "rejected": 2}
+
+
+def test_transient_failures_are_retried():
+    client = make_client()
+    server = FlakyServer(client.session, statuses=[503, 503])
+    result = client.generate("prompt", raise_errors=True)
+    client.close()
+
+    assert result["response"] == "ok"
+    assert server.requests == 3
+    assert client.circuit_breaker.stats()["consecutive_failures"] == 0
+
+
+def test_retries_are_bounded():
+    client = make_client(circuit_breaker=CircuitBreaker(failure_threshold=10))
+    server = FlakyServer(client.session, statuses=[503] * 6)
+    with pytest.raises(LLMServerError) as info:
+        client.generate("prompt", raise_errors=True)
+    failed = client.generate("prompt")
+    client.close()
+
+    assert info.value.status_code == 503
+    assert failed["error_type"] == "LLMServerError" and failed["response"] == ""
+    assert server.requests == 6
+
+
+def test_client_errors_are_not_retried():
+    client = make_client()
+    server = FlakyServer(client.session, statuses=[404])
+    with pytest.raises(LLMServerError) as info:
+        client.generate("prompt", raise_errors=True)
+    client.close()
+
+    assert info.value.status_code == 404
+    assert server.requests == 1
+    assert client.circuit_breaker.stats()["consecutive_failures"] == 0
+
+
+def test_breaker_fails_fast_while_server_is_down():
+    client = make_client(f"http://127.0.0.1:{unused_port()}",
+                         circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60.0))
+
+    with pytest.raises(LLMConnectionError):
+        client.generate("prompt", raise_errors=True)
+    with pytest.raises(CircuitOpenError):
+        client.generate("prompt", raise_errors=True)
+    assert client.circuit_breaker.stats()["rejected"] == 1
+    client.close()
+
+
+def test_expired_deadline_is_not_a_breaker_failure():
+    client = make_client(circuit_breaker=CircuitBreaker(failure_threshold=1))
+    server = FlakyServer(client.session)
+    for _ in range(3):
+        with pytest.raises(LLMTimeoutError):
+            client.generate("prompt", deadline=0.0, raise_errors=True)
+
+    assert server.requests == 0
+    assert client.circuit_breaker.stats()["consecutive_failures"] == 0
+    assert client.generate("prompt", raise_errors=True)["response"] == "ok"
+    client.close()
+
+
+def test_slow_server_hits_the_deadline():
+    client = make_client()
+    FlakyServer(client.session, latency=0.5)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.generate("prompt", deadline=0.1, raise_errors=True)
+    client.close()
+
+    assert time.monotonic() - started < 0.4
+
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["complete", "streamed"])
+def test_trickling_body_hits_the_deadline(streamed):
+    body = json.dumps({"model": "fake", "response": "ok" * 20, "done": True}).encode() + b"\n"
+    server = TricklingServer(body, interval=0.02, streamed=streamed)
+    client = make_client(server.base_url)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        if streamed:
+            client.generate_until("prompt", deadline=0.3, raise_errors=True)
+        else:
+            client.generate("prompt", deadline=0.3, raise_errors=True)
+    elapsed = time.monotonic() - started
+    client.close()
+    server.close()
+
+    # The whole body would take about 1.5s
+    assert elapsed < 0.6
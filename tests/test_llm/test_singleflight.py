@@ -0,0 +1,162 @@
+"""
+Tests for request coalescing.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.llm.async_ollama import AsyncOllamaClient
+from src.llm.ollama import OllamaClient
+from src.llm.singleflight import AsyncSingleFlight, SingleFlight
+
+CALLERS = 8
+
+
+def run_threads(target, count: int = CALLERS) -> None:
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def wait_for_waiters(group: SingleFlight, release: threading.Event, waiters: int) -> None:
+    """Release the leader once the other callers have joined its call."""
+    def watch():
+        while group.stats()["shared"] < waiters:
+            time.sleep(0.001)
+        release.set()
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    executions = []
+    results = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return object()
+
+    wait_for_waiters(group, release, CALLERS - 1)
+    run_threads(lambda: results.append(group.do("key", fn)))
+
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    assert group.stats() == {"executed": 1, "shared": CALLERS - 1, "in_flight": 0}
+
+
+def test_errors_fan_out_to_every_caller():
+    group = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            group.do("key", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    wait_for_waiters(group, release, CALLERS - 1)
+    run_threads(call)
+
+    assert len(errors) == CALLERS
+    assert all(error is errors[0] for error in errors)
+    # The failed call is forgotten, so the next one runs again
+    assert group.do("key", lambda: "retried") == "retried"
+    assert group.stats()["executed"] == 2
+
+
+def test_async_errors_fan_out_and_survive_cancellation():
+    async def run():
+        group = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            raise ValueError("boom")
+
+        waiters = [asyncio.ensure_future(group.do("key", fn)) for _ in range(CALLERS)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        release.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        retried = await group.do("key", lambda: asyncio.sleep(0, result="retried"))
+        return group, outcomes, retried
+
+    group, outcomes, retried = asyncio.run(run())
+
+    assert isinstance(outcomes[0], asyncio.CancelledError)
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes[1:])
+    assert all(outcome is outcomes[1] for outcome in outcomes[1:])
+    assert retried == "retried"
+    assert group.stats() == {"executed": 2, "shared": CALLERS - 1, "in_flight": 0}
+
+
+class SlowGenerate:
+    """Stands in for OllamaClient.generate, counting the generations."""
+
+    def __init__(self, reply: str, delay: float):
+        self.reply = reply
+        self.delay = delay
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, prompt: str, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"response": self.reply}
+
+
+@pytest.mark.parametrize("temperature, coalesce_sampled, generations", [
+    (0.0, False, 1),
+    (0.7, False, CALLERS),
+    (0.7, True, 1),
+])
+def test_client_coalesces_greedy_completions(temperature, coalesce_sampled, generations):
+    client = OllamaClient(base_url="http://127.0.0.1:9", model_name="fake", coalesce_sampled=coalesce_sampled)
+    client.generate = generate = SlowGenerate("shared", delay=0.3)
+    completion_fn = client.create_completion_function(temperature=temperature)
+    barrier = threading.Barrier(CALLERS)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(completion_fn("same prompt"))
+
+    run_threads(call)
+    client.close()
+
+    assert results == ["shared"] * CALLERS
+    assert generate.calls == generations
+
+
+@pytest.mark.parametrize("temperature, coalesce_sampled, generations", [
+    (0.0, False, 1),
+    (0.7, False, 4),
+    (0.7, True, 1),
+])
+def test_async_client_coalesces_greedy_completions(temperature, coalesce_sampled, generations):
+    client = AsyncOllamaClient(max_in_flight=4, base_url="http://127.0.0.1:9", model_name="fake",
+                               coalesce_sampled=coalesce_sampled)
+    client.client.generate = generate = SlowGenerate("shared", delay=0.1)
+    completion_fn = client.create_completion_function(temperature=temperature)
+
+    async def run():
+        return await asyncio.gather(*(completion_fn("same prompt") for _ in range(4)))
+
+    results = asyncio.run(run())
+    client.client.close()
+
+    assert results == ["shared"] * 4
+    assert generate.calls == generations
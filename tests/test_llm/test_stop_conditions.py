@@ -0,0 +1,135 @@
+"""
+Tests for the stop conditions of streamed generations.
+"""
+
+import json
+
+import pytest
+
+from src.llm.ollama import JsonObjectStop, LabeledLinesStop, OllamaClient, StopSequences, _answer_start
+
+
+class StreamedReply:
+    """A streamed /api/generate response with one NDJSON chunk per word."""
+
+    status_code = 200
+    raw = None
+
+    def __init__(self, text: str):
+        words = text.split(" ")
+        tokens = [word + " " for word in words[:-1]] + words[-1:]
+        self.chunks = [{"response": token, "done": False} for token in tokens]
+        self.chunks.append({"response": "", "done": True})
+        self.sent = 0
+        self.closed = False
+
+    def iter_lines(self, chunk_size=None):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield json.dumps(chunk).encode()
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __enter__(self) -> "StreamedReply":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def serve(client: OllamaClient, text: str) -> list:
+    """Answer the client's requests with streamed replies, returning them as they are made."""
+    replies = []
+
+    def post(url, **kwargs):
+        replies.append(StreamedReply(text))
+        return replies[-1]
+
+    client.session.post = post
+    return replies
+
+
+def feed(condition, text: str, step: int = 1):
+    """Call a stop condition as tokens arrive, returning (cut index, length fed)."""
+    for end in range(step, len(text) + step, step):
+        cut = condition(text[:end])
+        if cut is not None:
+            return cut, min(end, len(text))
+    return None, len(text)
+
+
+@pytest.mark.parametrize("step", [1, 3, 100])
+def test_stop_sequences(step):
+    text = "Answer: yes\nObservation: more"
+    cut, _ = feed(StopSequences(["Observation:", "\n\n"]), text, step)
+
+    assert text[:cut] == "Answer: yes\n"
+
+
+def test_stop_sequence_split_across_tokens():
+    condition = StopSequences(["STOP"])
+
+    assert condition("go ST") is None
+    assert condition("go STO") is None
+    assert condition("go STOP now") == 3
+
+
+def test_stop_sequences_ignore_empty():
+    assert StopSequences(["", "x"])("abc") is None
+
+
+@pytest.mark.parametrize("step", [1, 4, 1000])
+def test_json_object_stop(step):
+    text = 'Sure: {"action": "search", "params": {"q": "a } b \\" {"}} and then more {"x": 1}'
+    cut, fed = feed(JsonObjectStop(), text, step)
+
+    assert text[:cut] == 'Sure: {"action": "search", "params": {"q": "a } b \\" {"}}'
+    assert fed <= cut + step
+
+
+def test_json_object_stop_waits_for_the_object():
+    condition = JsonObjectStop()
+
+    assert condition("no braces } here") is None
+    assert condition('no braces } here {"a": [1, {"b": 2}') is None
+    assert condition('no braces } here {"a": [1, {"b": 2}]}') == len('no braces } here {"a": [1, {"b": 2}]}')
+
+
+@pytest.mark.parametrize("step", [1, 5, 1000])
+def test_labeled_lines_stop(step):
+    text = "Thinking first\n- Reward: 0.5\nSimilarity: 0.2\n* Progress: 0.1\nExtra: ignored\n"
+    cut, _ = feed(LabeledLinesStop(["Reward:", "Similarity:", "Progress:"]), text, step)
+
+    assert text[:cut] == "Thinking first\n- Reward: 0.5\nSimilarity: 0.2\n* Progress: 0.1\n"
+
+
+def test_labeled_lines_stop_needs_complete_lines():
+    condition = LabeledLinesStop(["Reward:"])
+
+    assert condition("Reward: 0.") is None
+    assert condition("Reward: 0.75\n") == len("Reward: 0.75\n")
+
+
+def test_answer_start_skips_think_block():
+    assert _answer_start("plain answer") == 0
+    assert _answer_start("<thi") is None
+    assert _answer_start("<think> still {thinking}") is None
+    assert _answer_start("<think>x</think>{}") == len("<think>x</think>")
+
+
+def test_generate_until_cuts_the_stream():
+    reply = '<think>{"draft": 1}</think> {"action": "search"} trailing words that are never needed'
+    client = OllamaClient(base_url="http://127.0.0.1:9", model_name="fake")
+    replies = serve(client, reply)
+
+    result = client.generate_until("prompt", stop_on_json=True)
+    unstopped = client.generate_until("prompt")
+    client.close()
+
+    assert result["stopped"] is True
+    assert result["response"] == '<think>{"draft": 1}</think> {"action": "search"}'
+    assert replies[0].closed and replies[0].sent < len(replies[0].chunks)
+    assert unstopped["stopped"] is False
+    assert unstopped["response"] == reply
+    assert replies[1].sent == len(replies[1].chunks)